@@ -4,66 +4,197 @@ extract_points.py
 从 FreeCAD 解压后的 Document.xml 中提取指定 Sketch 的 GeomPoint 坐标。
 用法：
   python extract_points.py --xml Document.xml --sketch Sketch001
+  python extract_points.py --xml Document.xml --sketch Sketch001 --sketch Sketch002 --stream --stats
+  python extract_points.py --fcstd 123.FCStd --sketch Sketch001 --stream
+
+--fcstd 直接从 .FCStd/.FCBak 压缩包中流式读取 Document.xml，无需先解压到 123_extracted。
+
+--stream 使用 iterparse 流式解析：边解析边清理元素，只保留目标 Sketch 的子树，
+所有目标 Sketch 的 ObjectData/Object 关闭后立即停止读取，适合几百 MB 的大文档。
+--stats 输出耗时与峰值内存（tracemalloc）；--compare 同时运行两种解析方式并校验结果一致。
 """
 import argparse
+import os
+import sys
+import time
+import tracemalloc
 import xml.etree.ElementTree as ET
 
-parser = argparse.ArgumentParser(description='Extract GeomPoint coordinates from Document.xml')
-parser.add_argument('--xml', required=True, help='Path to Document.xml')
-parser.add_argument('--sketch', required=True, help='Sketch object name (e.g., Sketch001)')
-args = parser.parse_args()
-
-tree = ET.parse(args.xml)
-root = tree.getroot()
-
-# 找到对应的 ObjectData 下 name==SketchXXX 节点
-found = False
-for obj in root.findall('.//ObjectData/Object'):
-    name = obj.get('name')
-    if name == args.sketch:
-        found = True
-        geom_list = obj.find('.//Property[@name="ExternalGeo"]/GeometryList')
-        # Some files put GeomPoint under Property name="Geometry" or "ExternalGeo"; 检查多个位置
-        if geom_list is None:
-            geom_list = obj.find('.//Property[@name="Geometry"]/GeometryList')
-        points = []
-        if geom_list is not None:
-            for geom in geom_list.findall('Geometry'):
-                # 两种表示：GeomPoint 的标签名可能为 Geometry 元素下包含 GeomPoint 子元素
-                # 或 Geometry 本身有 type="Part::GeomPoint" 并包含 GeomPoint 属性
-                gtype = geom.get('type')
-                if gtype and 'GeomPoint' in gtype:
-                    gp = geom.find('GeomPoint')
-                    if gp is None:
-                        # 有时坐标直接作为属性在 Geometry 的子节点
-                        gp = geom
-                    x = gp.get('X') or gp.get('x')
-                    y = gp.get('Y') or gp.get('y')
-                    z = gp.get('Z') or gp.get('z')
-                    if x and y and z:
-                        points.append((float(x), float(y), float(z)))
-                else:
-                    # 查找直接的 GeomPoint 子元素
-                    gp = geom.find('GeomPoint')
-                    if gp is not None:
-                        x = gp.get('X')
-                        y = gp.get('Y')
-                        z = gp.get('Z')
-                        points.append((float(x), float(y), float(z)))
-        # 备用：查找任意 GeomPoint 在该 Object 子树中
-        if not points:
-            for gp in obj.findall('.//GeomPoint'):
-                x = gp.get('X')
-                y = gp.get('Y')
-                z = gp.get('Z')
-                try:
+# 仓库根目录（fcstd_reader.py 所在位置）加入导入路径
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from fcstd_reader import open_fcstd  # noqa: E402
+
+
+def _points_from_object(obj):
+    """从单个 ObjectData/Object 元素中提取 GeomPoint 坐标列表。"""
+    geom_list = obj.find('.//Property[@name="ExternalGeo"]/GeometryList')
+    # Some files put GeomPoint under Property name="Geometry" or "ExternalGeo"; 检查多个位置
+    if geom_list is None:
+        geom_list = obj.find('.//Property[@name="Geometry"]/GeometryList')
+    points = []
+    if geom_list is not None:
+        for geom in geom_list.findall('Geometry'):
+            # 两种表示：GeomPoint 的标签名可能为 Geometry 元素下包含 GeomPoint 子元素
+            # 或 Geometry 本身有 type="Part::GeomPoint" 并包含 GeomPoint 属性
+            gtype = geom.get('type')
+            if gtype and 'GeomPoint' in gtype:
+                gp = geom.find('GeomPoint')
+                if gp is None:
+                    # 有时坐标直接作为属性在 Geometry 的子节点
+                    gp = geom
+                x = gp.get('X') or gp.get('x')
+                y = gp.get('Y') or gp.get('y')
+                z = gp.get('Z') or gp.get('z')
+                if x and y and z:
+                    points.append((float(x), float(y), float(z)))
+            else:
+                # 查找直接的 GeomPoint 子元素
+                gp = geom.find('GeomPoint')
+                if gp is not None:
+                    x = gp.get('X')
+                    y = gp.get('Y')
+                    z = gp.get('Z')
                     points.append((float(x), float(y), float(z)))
-                except Exception:
-                    pass
-        print(f"Found {len(points)} GeomPoint(s) in {args.sketch}:")
-        for i,p in enumerate(points,1):
+    # 备用：查找任意 GeomPoint 在该 Object 子树中
+    if not points:
+        for gp in obj.findall('.//GeomPoint'):
+            x = gp.get('X')
+            y = gp.get('Y')
+            z = gp.get('Z')
+            try:
+                points.append((float(x), float(y), float(z)))
+            except Exception:
+                pass
+    return points
+
+
+def extract_points_tree(source, sketches):
+    """整树解析（ET.parse）。返回 {sketch: [(x, y, z), ...]}，未找到的 sketch 不在结果中。"""
+    root = ET.parse(source).getroot()
+    wanted = set(sketches)
+    result = {}
+    # 找到对应的 ObjectData 下 name==SketchXXX 节点（同名只取第一个）
+    for obj in root.findall('.//ObjectData/Object'):
+        name = obj.get('name')
+        if name in wanted and name not in result:
+            result[name] = _points_from_object(obj)
+            if len(result) == len(wanted):
+                break
+    return result
+
+
+def extract_points_stream(source, sketches):
+    """流式解析（ET.iterparse），结果与 extract_points_tree 一致。
+
+    source 可以是路径或二进制文件对象（例如 zip 成员流）。
+    目标 Object 之外的元素在 end 事件时立即清理并从父节点摘除，
+    因此内存占用只与最大的目标 Sketch 子树有关；全部目标找到后立即停止读取。
+    """
+    wanted = set(sketches)
+    result = {}
+    stack = []         # 当前打开的元素链
+    target_depth = -1  # 正在收集的目标 Object 在 stack 中的位置；-1 表示不在目标内
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            if (target_depth < 0 and elem.tag == 'Object' and stack
+                    and stack[-1].tag == 'ObjectData'):
+                name = elem.get('name')
+                if name in wanted and name not in result:
+                    target_depth = len(stack)
+            stack.append(elem)
+            continue
+        stack.pop()
+        if target_depth >= 0:
+            if len(stack) > target_depth:
+                # 目标子树内部：保留，等 Object 关闭后统一提取
+                continue
+            result[elem.get('name')] = _points_from_object(elem)
+            target_depth = -1
+            if len(result) == len(wanted):
+                break
+        elem.clear()
+        if stack:
+            # 已清理的元素总是父节点最后一个子元素，摘除代价为 O(1)
+            stack[-1].remove(elem)
+    return result
+
+
+def _run_engine(engine, xml_path, fcstd_path, sketches):
+    """在 Document.xml 路径或 FCStd 压缩包中的 Document.xml 成员上运行解析引擎。"""
+    if not fcstd_path:
+        return engine(xml_path, sketches)
+    with open_fcstd(fcstd_path) as fc:
+        with fc.open_document() as f:
+            return engine(f, sketches)
+
+
+def _measure(func, *args, trace_memory=True):
+    """运行 func 并返回 (结果, 耗时秒, 峰值内存字节)；trace_memory=False 时不启用 tracemalloc，峰值为 None。"""
+    if not trace_memory:
+        t0 = time.perf_counter()
+        out = func(*args)
+        return out, time.perf_counter() - t0, None
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        out = func(*args)
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def _print_result(result, sketches, xml_path):
+    for name in sketches:
+        if name not in result:
+            print(f"Sketch '{name}' not found in {xml_path}")
+            continue
+        points = result[name]
+        print(f"Found {len(points)} GeomPoint(s) in {name}:")
+        for i, p in enumerate(points, 1):
             print(f"  Point {i}: X={p[0]:.6f} Y={p[1]:.6f} Z={p[2]:.6f}")
-        break
 
-if not found:
-    print(f"Sketch '{args.sketch}' not found in {args.xml}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract GeomPoint coordinates from Document.xml')
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument('--xml', help='Path to Document.xml')
+    src.add_argument('--fcstd', help='Path to .FCStd/.FCBak archive (read without extracting)')
+    parser.add_argument('--sketch', required=True, action='append',
+                        help='Sketch object name (e.g., Sketch001); repeat for several sketches')
+    parser.add_argument('--stream', action='store_true', help='Use streaming iterparse engine')
+    parser.add_argument('--stats', action='store_true', help='Report elapsed time and peak memory')
+    parser.add_argument('--compare', action='store_true',
+                        help='Run both engines and verify that results are identical')
+    args = parser.parse_args(argv)
+    # 去重但保持顺序
+    sketches = list(dict.fromkeys(args.sketch))
+    source_label = args.fcstd or args.xml
+
+    engine = extract_points_stream if args.stream else extract_points_tree
+    # tracemalloc 会拖慢解析并抬高内存占用，只在需要统计时开启
+    result, elapsed, peak = _measure(_run_engine, engine, args.xml, args.fcstd, sketches,
+                                     trace_memory=args.stats or args.compare)
+    _print_result(result, sketches, source_label)
+    if args.stats:
+        label = 'stream' if args.stream else 'tree'
+        print(f"[{label}] time={elapsed * 1000:.2f} ms peak_mem={peak / 1024:.1f} KiB")
+
+    if args.compare:
+        other = extract_points_tree if args.stream else extract_points_stream
+        other_result, other_elapsed, other_peak = _measure(_run_engine, other, args.xml, args.fcstd, sketches)
+        label = 'tree' if args.stream else 'stream'
+        print(f"[{label}] time={other_elapsed * 1000:.2f} ms peak_mem={other_peak / 1024:.1f} KiB")
+        if other_result != result:
+            print('Mismatch between tree and stream results')
+            return 1
+        print('tree/stream results match')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,71 +2,157 @@
 """
 提取 Document.xml 中的 GeomPoint，并计算左视图可见点（按 Y,Z 分组，取最小 X）。
 输出 JSON: left_view_points.json
+用法：
+  python extract_visible_left_points.py                      # 默认读取 123_extracted/Document.xml
+  python extract_visible_left_points.py --fcstd 123.FCStd     # 直接读取压缩包，无需解压
+  python extract_visible_left_points.py --view front --tol 0.01
+  python extract_visible_left_points.py --fcstd 123.FCStd --shape Body   # 用实体顶点（读 Body.Shape.brp）代替草图点
+
+其它视图（front/top/right/left）共用同一套 API：
+  pts = load_points(source)                         # (N,3) ndarray，只遍历一次 XML
+  vis = visible_points(pts, view='left', tol=1e-3)  # 按投影平面坐标量化分组，保留离观察者最近的点
+分组用 lexsort + 相邻比较完成，不经过 Python 循环，可处理百万级顶点。
 """
 import xml.etree.ElementTree as ET
+import argparse
 import json
 import os
+import sys
+
+import numpy as np
+
+# 仓库根目录（fcstd_reader.py 所在位置）加入导入路径
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from brep_reader import read_brep  # noqa: E402
+from fcstd_reader import open_fcstd  # noqa: E402
 
-xml_path = r"d:\FreeCad\FreeCadTest\FCStd\123_extracted\Document.xml"
-out_json = r"d:\FreeCad\FreeCadTest\FCStd\left_view_points.json"
-
-if not os.path.exists(xml_path):
-    print('Document.xml 未找到：', xml_path)
-    raise SystemExit(1)
-
-tree = ET.parse(xml_path)
-root = tree.getroot()
-
-points = []
-# 查找所有 GeomPoint 子元素
-for gp in root.findall('.//GeomPoint'):
-    x = gp.get('X') or gp.get('x')
-    y = gp.get('Y') or gp.get('y')
-    z = gp.get('Z') or gp.get('z')
-    try:
-        xf = float(x)
-        yf = float(y)
-        zf = float(z)
-        points.append((xf,yf,zf))
-    except Exception:
-        continue
-
-# 也查找 Geometry elements that may have GeomPoint as child under Geometry nodes
-for geom in root.findall('.//Geometry'):
-    for child in geom:
-        if child.tag == 'GeomPoint':
-            x = child.get('X') or child.get('x')
-            y = child.get('Y') or child.get('y')
-            z = child.get('Z') or child.get('z')
+# 视图定义：(深度轴, 深度符号, (投影平面轴 u, v))；深度*符号 越小表示离观察者越近
+# left: 从 -X 方向看（取最小 X）；right: 从 +X 看；front: 从 -Y 看；top: 从 +Z 看
+VIEWS = {
+    'left': (0, 1.0, (1, 2)),
+    'right': (0, -1.0, (1, 2)),
+    'front': (1, 1.0, (0, 2)),
+    'top': (2, -1.0, (0, 1)),
+}
+
+
+def load_points(source):
+    """单次流式遍历 Document.xml，返回所有 GeomPoint 的 (N,3) 坐标数组。
+
+    source 可以是路径或二进制文件对象。
+    """
+    coords = []
+    stack = []  # 当前打开的元素链
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if elem.tag == 'GeomPoint':
+            x = elem.get('X') or elem.get('x')
+            y = elem.get('Y') or elem.get('y')
+            z = elem.get('Z') or elem.get('z')
             try:
-                xf = float(x); yf = float(y); zf = float(z)
-                points.append((xf,yf,zf))
-            except Exception:
+                coords.extend((float(x), float(y), float(z)))
+            except (TypeError, ValueError):
                 pass
+        # end 事件时子元素均已处理：清理后再从父节点摘除，树不随元素数量增长
+        elem.clear()
+        if stack:
+            # 之前的兄弟节点都已摘除，elem 是父节点唯一的子元素，摘除代价为 O(1)
+            stack[-1].remove(elem)
+    return np.array(coords, dtype=np.float64).reshape(-1, 3)
+
+
+def load_shape_vertices(source, obj_name):
+    """读取对象 <obj_name>.Shape.brp 中的实体顶点（已应用全部 Location），返回 (N,3) 数组。
+
+    source 可以是 .FCStd 压缩包、解压目录或其中的 Document.xml；无需 FreeCAD。
+    """
+    with open_fcstd(source) as fc:
+        member = fc.shape_member(obj_name)
+        if member is None:
+            raise KeyError(f'{obj_name}.Shape.brp 不存在')
+        with fc.open_text(member) as f:
+            return read_brep(f).vertices()
+
+
+def visible_points(points, view='left', tol=1e-3):
+    """计算指定视图下的可见点。
+
+    按投影平面坐标量化（步长 tol）分组，每组保留离观察者最近的点（深度相同时保留先出现者），
+    结果按投影平面坐标 (u 降序, v 降序) 排序。
+    """
+    if view not in VIEWS:
+        raise ValueError(f"unknown view '{view}', expected one of {sorted(VIEWS)}")
+    pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if len(pts) == 0:
+        return pts
+    depth_axis, sign, (u, v) = VIEWS[view]
+    keys = np.round(pts[:, (u, v)] / tol).astype(np.int64)
+    depth = pts[:, depth_axis] * sign
+    # lexsort 以最后一个键为主键：先按 (ku, kv) 分组，组内按深度升序；排序稳定，保证先出现者优先
+    order = np.lexsort((depth, keys[:, 1], keys[:, 0]))
+    k = keys[order]
+    first = np.empty(len(order), dtype=bool)
+    first[0] = True
+    np.any(k[1:] != k[:-1], axis=1, out=first[1:])
+    vis = pts[order[first]]
+    out_order = np.lexsort((-vis[:, v], -vis[:, u]))
+    return vis[out_order]
+
+
+def to_records(points):
+    return [{'index': i, 'X': round(float(p[0]), 6), 'Y': round(float(p[1]), 6), 'Z': round(float(p[2]), 6)}
+            for i, p in enumerate(points, start=1)]
+
 
-# Deduplicate
-uniq = {}
-for p in points:
-    key = (round(p[0],6), round(p[1],6), round(p[2],6))
-    uniq[key] = p
-points = list(uniq.values())
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute visible view points from GeomPoints')
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument('--xml', default=r"d:\FreeCad\FreeCadTest\FCStd\123_extracted\Document.xml",
+                     help='Path to extracted Document.xml')
+    src.add_argument('--fcstd', help='Path to .FCStd/.FCBak archive (read without extracting)')
+    parser.add_argument('--view', default='left', choices=sorted(VIEWS), help='Projection view')
+    parser.add_argument('--tol', type=float, default=1e-3, help='Grouping tolerance on the view plane (mm)')
+    parser.add_argument('--shape', help='Use the solid vertices of this object (its .Shape.brp) instead of GeomPoints')
+    parser.add_argument('--out', help='Output JSON path (default: <view>_view_points.json)')
+    args = parser.parse_args(argv)
 
-# Compute visible in left view: group by Y,Z (rounded to 3 decimals), select minimal X
-groups = {}
-for p in points:
-    key = (round(p[1],3), round(p[2],3))
-    if key not in groups or p[0] < groups[key][0]:
-        groups[key] = p
+    out_json = args.out or os.path.join(r"d:\FreeCad\FreeCadTest\FCStd", f"{args.view}_view_points.json")
+    if args.shape:
+        source = args.fcstd or args.xml
+        if not os.path.exists(source):
+            print('文件未找到：', source)
+            return 1
+        try:
+            points = load_shape_vertices(source, args.shape)
+        except KeyError as e:
+            print(e.args[0])
+            return 1
+    elif args.fcstd:
+        if not os.path.exists(args.fcstd):
+            print('FCStd 未找到：', args.fcstd)
+            return 1
+        with open_fcstd(args.fcstd) as fc:
+            with fc.open_document() as f:
+                points = load_points(f)
+    else:
+        if not os.path.exists(args.xml):
+            print('Document.xml 未找到：', args.xml)
+            return 1
+        points = load_points(args.xml)
 
-visible = list(groups.values())
-# sort by label-ish order: by Y desc then Z desc
-visible.sort(key=lambda p: (-p[1], -p[2]))
+    out = to_records(visible_points(points, args.view, args.tol))
+    with open(out_json, 'w', encoding='utf-8') as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
 
-out = []
-for i,p in enumerate(visible, start=1):
-    out.append({'index':i, 'X':round(p[0],6), 'Y':round(p[1],6), 'Z':round(p[2],6)})
+    print('Wrote', out_json, 'with', len(out), 'visible points')
+    return 0
 
-with open(out_json,'w',encoding='utf-8') as f:
-    json.dump(out,f,ensure_ascii=False,indent=2)
 
-print('Wrote', out_json, 'with', len(out), 'visible points')
+if __name__ == '__main__':
+    sys.exit(main())
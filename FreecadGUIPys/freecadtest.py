@@ -5,35 +5,47 @@ FreeCAD API测试脚本（GUI 控制台友好）：覆盖核心工作台常用
 在 GUI 中可直接粘贴运行；也可被 headless runner 导入复用
 """
 
-import FreeCAD
-import Part
 import os
+import sys
 from datetime import datetime
 
-# 可选模块（在无界面/精简环境可能不可用）
-try:
-    import TechDraw  # type: ignore
-    TECHDRAW_AVAILABLE = True
-except Exception:
-    TECHDRAW_AVAILABLE = False
+# 仓库根目录的共享模块（lazy_modules、stl_io 等）
+_REPO_ROOT = os.path.dirname(os.path.abspath(os.path.join(__file__, os.pardir)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+
+# FC_IMPORT_REPORT=1 时在退出前打印各模块导入耗时
+import lazy_modules  # type: ignore
+lazy_modules.start_from_env()
 
-try:
-    import Sketcher  # type: ignore
-    SKETCHER_AVAILABLE = True
-except Exception:
-    SKETCHER_AVAILABLE = False
+import output_manager  # type: ignore
+
+import FreeCAD
+import Part
 
-try:
-    import Mesh  # type: ignore
-    MESH_AVAILABLE = True
-except Exception:
-    MESH_AVAILABLE = False
+# 可选模块（在无界面/精简环境可能不可用）：首次使用时才真正导入，
+# *_AVAILABLE 只查找模块是否存在，不执行导入
+TechDraw = lazy_modules.lazy('TechDraw')
+Sketcher = lazy_modules.lazy('Sketcher')
+Mesh = lazy_modules.lazy('Mesh')
+MeshPart = lazy_modules.lazy('MeshPart')
+TECHDRAW_AVAILABLE = TechDraw.available
+SKETCHER_AVAILABLE = Sketcher.available
+MESH_AVAILABLE = Mesh.available
+MESHPART_AVAILABLE = MeshPart.available
 
-try:
-    import MeshPart  # type: ignore
-    MESHPART_AVAILABLE = True
-except Exception:
-    MESHPART_AVAILABLE = False
+# stl_io（NumPy 二进制 STL 读写）与三角化缓存同样延迟导入；不可用时回退 Mesh.export
+stl_io = lazy_modules.lazy('stl_io')
+tessellation_cache = lazy_modules.lazy('tessellation_cache')
+STL_IO_AVAILABLE = stl_io.available and lazy_modules.available('numpy')
+# hidden_line：无界面三视图（TechDraw 需要 GUI 时的替代）
+hidden_line = lazy_modules.lazy('hidden_line')
+HIDDEN_LINE_AVAILABLE = hidden_line.available and lazy_modules.available('numpy')
+# mesh_compare：设置 FC_GOLDEN_DIR 后，导出的 STL 与同名基准文件比对（Hausdorff/RMS、包围盒、体积、面积）
+mesh_compare = lazy_modules.lazy('mesh_compare')
+MESH_COMPARE_AVAILABLE = mesh_compare.available and lazy_modules.available('numpy')
+# output_store：设置 FC_OUTPUT_DEDUP 后，相同内容的输出只保留一份（硬链接或仅记录清单）
+output_store = lazy_modules.lazy('output_store')
 
 GUI_AVAILABLE = getattr(FreeCAD, 'GuiUp', False)
 
@@ -62,25 +74,21 @@ def _ext_folder(ext: str) -> str:
         return 'PDF'
     return 'Other'
 
+# 输出管理：各类型子文件夹每次运行只解析/创建一次，同名输出总是得到同一路径；
+# FC_OUTPUT_BACKGROUND=1 时 OUTPUTS.write(...) 经后台线程写出（有界队列，批量 fsync）；
+# FC_OUTPUT_DEDUP=1|manifest 时输出按内容哈希去重，FC_OUTPUT_KEEP / FC_OUTPUT_MAX_MB 为 close() 时的保留策略
+OUTPUTS = output_manager.OutputManager(OUTPUT_PATH, timestamp=TIMESTAMP, folder_for=_ext_folder,
+                                       background=bool(os.environ.get("FC_OUTPUT_BACKGROUND")),
+                                       dedup=output_store.options_from_env() if os.environ.get("FC_OUTPUT_DEDUP") else None)
+
 def build_out(name: str, ext: str) -> str:
     """构造带时间戳的输出路径，并按文件类型分类到子文件夹。
     例如：<OUTPUT_PATH>/STEP/part_export_YYYYMMDD-HHMMSS.step
+    已存在的同名（不区分大小写）文件夹会被复用，避免重复创建不同大小写的目录。
     """
-    preferred = _ext_folder(ext)
-    # 尝试复用已存在的同名（不区分大小写）文件夹，避免重复创建不同大小写的目录
-    folder = None
-    try:
-        for entry in os.listdir(OUTPUT_PATH):
-            p = os.path.join(OUTPUT_PATH, entry)
-            if os.path.isdir(p) and entry.lower() == preferred.lower():
-                folder = p
-                break
-    except Exception:
-        folder = None
-    if folder is None:
-        folder = os.path.join(OUTPUT_PATH, preferred)
-    os.makedirs(folder, exist_ok=True)
-    return os.path.join(folder, f"{name}_{TIMESTAMP}.{ext}")
+    # OUTPUT_PATH 可能被回退逻辑或 headless 运行器改写；未变化时不访问文件系统
+    OUTPUTS.set_root(OUTPUT_PATH)
+    return OUTPUTS.path(name, ext)
 
 def _ensure_output_path():
     """确保基础输出目录可用；若不可用则回退到仓库同级 FreeCadTest。"""
@@ -145,6 +153,7 @@ def test_part_workbench(doc):
     except Exception:
         # 回退：导出融合体的形状
         Part.export([fuse.Shape], step_path)
+    OUTPUTS.track(step_path)
     print(f"立方体+圆柱体求和完成，STEP导出至：{step_path}")
 
 # -------------------------- 3. Sketcher工作台（草图绘制）--------------------------
@@ -195,9 +204,23 @@ def test_techdraw_workbench(doc):
     # 4.3 导出PDF
     pdf_path = build_out("techdraw_export", "pdf")
     TechDraw.exportPageAsPDF(page, pdf_path)
+    OUTPUTS.track(pdf_path)
     doc.recompute()
     print(f"2D工程图导出至：{pdf_path}")
 
+def test_three_view_drawing(doc):
+    """无界面替代 TechDraw：用 hidden_line 生成立方体三视图 PDF（隐藏线为虚线）"""
+    print("\n【4. 三视图（hidden_line，无界面）】")
+    if not HIDDEN_LINE_AVAILABLE:
+        print("【跳过三视图】未检测到 numpy")
+        return
+    cube = doc.getObject("Cube")
+    pdf_path = build_out("three_view", "pdf")
+    drawing = hidden_line.from_object(cube)
+    drawing.write(pdf_path)
+    OUTPUTS.track(pdf_path)
+    print(f"三视图导出至：{pdf_path}（{drawing.stats['seconds']:.3f} 秒）")
+
 # -------------------------- 5. Mesh工作台（网格操作）--------------------------
 def test_mesh_workbench(doc):
     print("\n【5. Mesh工作台测试】")
@@ -205,14 +228,24 @@ def test_mesh_workbench(doc):
     cube = doc.getObject("Cube")
     stl_path = build_out("mesh_export", "stl")
     ok = False
-    if MESHPART_AVAILABLE:
+    if STL_IO_AVAILABLE and MESH_AVAILABLE:
+        try:
+            # 三角化结果按形体几何哈希+精度缓存，同一形体的后续导出直接复用
+            vertices, facets = tessellation_cache.tessellate(cube.Shape, 0.5, 0.5)
+            mesh_obj = doc.addObject("Mesh::Feature", "CubeMesh")
+            mesh_obj.Mesh = tessellation_cache.to_mesh(vertices, facets)
+            doc.recompute()
+            stl_io.write_stl(stl_path, vertices, facets)
+            ok = True
+        except Exception as e:
+            print(f"【stl_io 失败】原因: {e}")
+    if not ok and MESHPART_AVAILABLE and MESH_AVAILABLE:
         try:
             mesh_data = MeshPart.meshFromShape(Shape=cube.Shape, LinearDeflection=0.5, AngularDeflection=0.5)
             mesh_obj = doc.addObject("Mesh::Feature", "CubeMesh")
             mesh_obj.Mesh = mesh_data
             doc.recompute()
-            if MESH_AVAILABLE:
-                Mesh.export([mesh_obj], stl_path)
+            Mesh.export([mesh_obj], stl_path)
             ok = True
         except Exception as e:
             print(f"【MeshPart 失败】原因: {e}")
@@ -226,10 +259,24 @@ def test_mesh_workbench(doc):
         except Exception as e:
             print(f"【Mesh 失败】原因: {e}")
     if ok:
+        OUTPUTS.track(stl_path)
         print(f"立方体转网格完成，STL导出至：{stl_path}")
+        check_golden(stl_path)
     else:
         print("【跳过 Mesh】未检测到 Mesh/MeshPart 或转换失败")
 
+def check_golden(path):
+    """FC_GOLDEN_DIR 中有同名（去掉时间戳）基准文件时比对，返回是否通过；未配置或无基准时返回 None"""
+    if not os.environ.get("FC_GOLDEN_DIR") or not MESH_COMPARE_AVAILABLE:
+        return None
+    report = mesh_compare.check_golden(path)
+    if report is None:
+        print(f"【基准比对】{os.path.basename(path)} 无对应基准文件，跳过")
+        return None
+    print(mesh_compare.format_report(report))
+    print(f"【基准比对】{'通过' if report['ok'] else '不通过'}：{os.path.basename(path)}")
+    return report['ok']
+
 # -------------------------- 主程序 --------------------------
 if __name__ == "__main__":
     print("="*60)
@@ -247,17 +294,29 @@ if __name__ == "__main__":
     if TECHDRAW_AVAILABLE and GUI_AVAILABLE:
         test_techdraw_workbench(doc)
     else:
-        print("【跳过 TechDraw】当前为无界面模式或模块不可用")
+        test_three_view_drawing(doc)
     test_mesh_workbench(doc)
     
     # 保存文档（带时间戳）
-    doc.saveAs(build_out("api_test_result", "FCStd"))
+    result_path = build_out("api_test_result", "FCStd")
+    doc.saveAs(result_path)
+    OUTPUTS.track(result_path)
     
     print("\n" + "="*60)
     print("测试完成！结果位置：")
-    print(f"- FreeCAD文档：{build_out('api_test_result', 'FCStd')}")
+    print(f"- FreeCAD文档：{result_path}")
     if TECHDRAW_AVAILABLE and GUI_AVAILABLE:
         print(f"- 导出文件：STEP/PDF/STL 保存在同一文件夹")
     else:
-        print(f"- 导出文件：STEP/STL 保存在同一文件夹（PDF 在无界面模式下跳过）")
+        print(f"- 导出文件：STEP/PDF/STL 保存在同一文件夹（PDF 三视图由 hidden_line 生成）")
+    # 去重在 close() 中进行：此前的输出（基准比对、上面列出的路径）都还是完整文件
+    OUTPUTS.close()
+    stats = OUTPUTS.stats()
+    print(f"- 输出统计：{stats['files_tracked'] + stats['files_written']} 个文件，"
+          f"{stats['bytes_tracked'] + stats['bytes_written']} 字节")
+    if OUTPUTS.dedup:
+        print(f"- 去重：{stats['files_deduplicated']} 个重复文件（{stats['bytes_deduplicated']} 字节）共用已有内容；"
+              f"保留策略删除 {stats['gc_files_removed']} 个旧文件，释放 {stats['gc_bytes_freed']} 字节")
+        if OUTPUTS.dedup.get('mode') == 'manifest' and stats['files_deduplicated']:
+            print("  manifest 模式：重复文件只记录在输出目录的 .store 索引中，可用 output_store 的 materialize() 取回")
     print("="*60)
@@ -3,34 +3,41 @@
 """
 Headless-friendly runner for FreeCAD tests (no GUI):
 - Imports GUI-console script from FreecadGUIPys/freecadtest.py
-- Skips TechDraw when GUI not available
+- Without a GUI, draws the three views with hidden_line instead of TechDraw
+- FC_BENCH=1 runs the per-step benchmark suite instead (api_bench.py)
 - Uses the same timestamped, type-sorted outputs as freecadtest.py
 """
 import os
 import sys
 
+# Resolve repo root and add FreecadGUIPys to import path
+REPO_ROOT = os.path.dirname(os.path.abspath(os.path.join(__file__, os.pardir)))
+GUI_DIR = os.path.join(REPO_ROOT, 'FreecadGUIPys')
+for _p in (REPO_ROOT, GUI_DIR):
+    if _p not in sys.path:
+        sys.path.insert(0, _p)
+
+# FC_IMPORT_REPORT=1 时在退出前打印各模块导入耗时
+import lazy_modules  # type: ignore
+lazy_modules.start_from_env()
+
 import FreeCAD
 import Part
-import Sketcher
-import Mesh
 
-# Try import TechDraw (may be unavailable in headless)
-try:
-    import TechDraw  # noqa: F401
-    TECHDRAW_AVAILABLE = True
-except Exception:
-    TECHDRAW_AVAILABLE = False
+# Import the GUI-console script as a module; its workbench modules (TechDraw,
+# Sketcher, Mesh, MeshPart) are imported on first use only
+import freecadtest as fc  # type: ignore
 
+Mesh = fc.Mesh
+MeshPart = fc.MeshPart
+TECHDRAW_AVAILABLE = fc.TECHDRAW_AVAILABLE
 GUI_AVAILABLE = getattr(FreeCAD, 'GuiUp', False)
 
-# Resolve repo root and add FreecadGUIPys to import path
-REPO_ROOT = os.path.dirname(os.path.abspath(os.path.join(__file__, os.pardir)))
-GUI_DIR = os.path.join(REPO_ROOT, 'FreecadGUIPys')
-if GUI_DIR not in sys.path:
-    sys.path.insert(0, GUI_DIR)
-
-# Import the GUI-console script as a module
-import freecadtest as fc  # type: ignore
+# 基准测试模式：FC_BENCH=1 时按步骤重复计时（墙钟/CPU/峰值内存），结果可写 JSON 并与基线比较，
+# 不执行下面的演示流程。参数见仓库根目录 api_bench.py（FC_BENCH_RUNS/FC_BENCH_OUT/FC_BENCH_BASELINE 等）
+if os.environ.get('FC_BENCH'):
+    import api_bench
+    sys.exit(api_bench.run_from_env())
 
 print('=' * 60)
 print('FreeCAD Python API 核心功能测试（无界面模式）...')
@@ -71,12 +78,15 @@ if TECHDRAW_AVAILABLE and GUI_AVAILABLE:
     except Exception as e:
         print(f'【跳过 TechDraw】原因: {e}')
 else:
-    print('【跳过 TechDraw】当前为无界面模式或模块不可用')
+    # 无界面：用 hidden_line 生成三视图 PDF 代替 TechDraw
+    try:
+        fc.test_three_view_drawing(doc)
+    except Exception as e:
+        print(f'【跳过三视图】原因: {e}')
 
 # Mesh（尝试使用 MeshPart 生成 STL；失败则跳过）
 print("\n【5. Mesh工作台测试】(headless override)")
 try:
-    import MeshPart  # type: ignore
     mesh_data = MeshPart.meshFromShape(Shape=cube.Shape, LinearDeflection=0.5, AngularDeflection=0.5)
     mesh_obj = doc.addObject("Mesh::Feature", "CubeMesh")
     mesh_obj.Mesh = mesh_data
@@ -87,9 +97,12 @@ try:
 except Exception as e:
     print(f"【跳过 Mesh】原因: {e}")
 
-doc.saveAs(fc.build_out('api_test_result', 'FCStd'))
+result_path = fc.build_out('api_test_result', 'FCStd')
+doc.saveAs(result_path)
+fc.OUTPUTS.track(result_path)
 print('\n' + '=' * 60)
 print('测试完成！结果位置：')
-print(f"- FreeCAD文档：{fc.build_out('api_test_result', 'FCStd')}")
-print('- 导出文件：STEP/STL 保存在同一文件夹（PDF在无界面模式下可能跳过）')
+print(f"- FreeCAD文档：{result_path}")
+print('- 导出文件：STEP/PDF/STL 保存在同一文件夹（PDF 三视图由 hidden_line 生成）')
 print('=' * 60)
+fc.OUTPUTS.close()  # 去重/保留策略在所有输出使用完之后执行
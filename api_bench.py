@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+Per-step benchmark suite for the headless FreeCAD API test
+(scripts/freecadtest_headless.py, FreecadNoGUIPys/freecadtest_headless.py).
+
+Each run repeats the steps of the headless test in a fresh document and
+records, per step, wall time, CPU time and the process peak RSS:
+
+  new_document      FreeCAD.newDocument
+  build_part        Part::Box + Part::Cylinder + Part::MultiFuse
+  recompute         doc.recompute()
+  part_export       Part.export([fuse], .step)
+  sketch            Sketcher circle + line, recompute
+  mesh_from_shape   MeshPart.meshFromShape(cube.Shape, 0.5, 0.5)
+  mesh_export       Mesh::Feature + Mesh.export(.stl)
+  save_as           doc.saveAs(.FCStd)
+  close_document    FreeCAD.closeDocument
+
+Run inside FreeCADCmd (settings via environment variables, since FreeCAD may
+intercept command line options):
+  FC_BENCH=1 FC_BENCH_RUNS=10 FC_BENCH_OUT=bench.json freecadcmd scripts/freecadtest_headless.py
+  FC_BENCH=1 FC_BENCH_BASELINE=bench_0.21.json freecadcmd FreecadNoGUIPys/freecadtest_headless.py
+  freecadcmd api_bench.py          # same suite without the headless script around it
+
+  FC_BENCH_RUNS       measured runs (default 5)
+  FC_BENCH_WARMUP     warmup runs, not recorded (default 1)
+  FC_BENCH_STEPS      comma separated subset of the steps above
+  FC_BENCH_DIR        folder for the exported files (default: a temporary folder, removed afterwards)
+  FC_BENCH_OUT        write the results as JSON
+  FC_BENCH_BASELINE   compare against an earlier JSON result; exit code 1 on regressions
+  FC_BENCH_THRESHOLD  allowed slowdown of the median, as a fraction (default 0.10)
+
+Comparing two result files needs no FreeCAD:
+  python api_bench.py compare bench_0.21.json bench_1.0.json [--threshold 0.1]
+"""
+from __future__ import annotations
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+STEPS = ('new_document', 'build_part', 'recompute', 'part_export', 'sketch',
+         'mesh_from_shape', 'mesh_export', 'save_as', 'close_document')
+RESULT_FORMAT = 1
+DEFAULT_RUNS = 5
+DEFAULT_WARMUP = 1
+DEFAULT_THRESHOLD = 0.10
+# differences below this are timer noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.002
+MIN_REGRESSION_RSS_MB = 16.0
+
+
+class SkipStep(Exception):
+    """Raised by a step whose workbench is not available in this FreeCAD build."""
+
+
+# -------------------------- measurements --------------------------
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unknown)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        psapi = ctypes.WinDLL('psapi')
+        kernel32 = ctypes.WinDLL('kernel32')
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / (1024.0 * 1024.0)
+    except Exception:
+        pass
+    return None
+
+
+def measure(fn, *args):
+    """Run fn(*args) and return (result, {'wall', 'cpu', 'rss_mb'})."""
+    w0, c0 = time.perf_counter(), time.process_time()
+    result = fn(*args)
+    wall, cpu = time.perf_counter() - w0, time.process_time() - c0
+    return result, {'wall': wall, 'cpu': cpu, 'rss_mb': peak_rss_mb()}
+
+
+# -------------------------- steps --------------------------
+def _new_document(ctx):
+    import FreeCAD
+    ctx['doc'] = FreeCAD.newDocument('API_Bench_%d' % ctx['run'])
+
+
+def _build_part(ctx):
+    import FreeCAD
+    doc = ctx['doc']
+    cube = doc.addObject('Part::Box', 'Cube')
+    cube.Length, cube.Width, cube.Height = 10, 8, 5
+    cyl = doc.addObject('Part::Cylinder', 'Cylinder')
+    cyl.Radius, cyl.Height = 3, 12
+    cyl.Placement.Base = FreeCAD.Vector(15, 0, 0)
+    fuse = doc.addObject('Part::MultiFuse', 'FusedObject')
+    fuse.Shapes = [cube, cyl]
+    ctx['cube'], ctx['fuse'] = cube, fuse
+
+
+def _recompute(ctx):
+    ctx['doc'].recompute()
+
+
+def _part_export(ctx):
+    import Part
+    Part.export([ctx['fuse']], os.path.join(ctx['dir'], 'part_export_%d.step' % ctx['run']))
+
+
+def _sketch(ctx):
+    try:
+        import Sketcher  # noqa: F401
+    except ImportError as e:
+        raise SkipStep(e)
+    import FreeCAD
+    import Part
+    sketch = ctx['doc'].addObject('Sketcher::SketchObject', 'TestSketch')
+    sketch.addGeometry(Part.Circle(FreeCAD.Vector(0, 0, 0), FreeCAD.Vector(0, 0, 1), 5))
+    sketch.addGeometry(Part.LineSegment(FreeCAD.Vector(0, 5, 0), FreeCAD.Vector(10, 5, 0)))
+    ctx['doc'].recompute()
+
+
+def _mesh_from_shape(ctx):
+    try:
+        import MeshPart
+    except ImportError as e:
+        raise SkipStep(e)
+    ctx['mesh'] = MeshPart.meshFromShape(Shape=ctx['cube'].Shape, LinearDeflection=0.5, AngularDeflection=0.5)
+
+
+def _mesh_export(ctx):
+    if ctx.get('mesh') is None:
+        raise SkipStep('no mesh (mesh_from_shape skipped)')
+    import Mesh
+    mesh_obj = ctx['doc'].addObject('Mesh::Feature', 'CubeMesh')
+    mesh_obj.Mesh = ctx['mesh']
+    Mesh.export([mesh_obj], os.path.join(ctx['dir'], 'mesh_export_%d.stl' % ctx['run']))
+
+
+def _save_as(ctx):
+    ctx['doc'].saveAs(os.path.join(ctx['dir'], 'api_bench_%d.FCStd' % ctx['run']))
+
+
+def _close_document(ctx):
+    import FreeCAD
+    FreeCAD.closeDocument(ctx.pop('doc').Name)
+
+
+_STEP_FUNCS = {
+    'new_document': _new_document, 'build_part': _build_part, 'recompute': _recompute,
+    'part_export': _part_export, 'sketch': _sketch, 'mesh_from_shape': _mesh_from_shape,
+    'mesh_export': _mesh_export, 'save_as': _save_as, 'close_document': _close_document,
+}
+# steps the selected ones cannot run without
+_REQUIRES = {
+    'build_part': ('new_document',), 'recompute': ('build_part',), 'part_export': ('recompute',),
+    'sketch': ('new_document',), 'mesh_from_shape': ('recompute',), 'mesh_export': ('mesh_from_shape',),
+    'save_as': ('new_document',),
+}
+
+
+def resolve_steps(names=None):
+    """Selected steps plus their prerequisites, in suite order; close_document always runs."""
+    wanted = set(names or STEPS)
+    unknown = wanted - set(STEPS)
+    if unknown:
+        raise ValueError('unknown step(s): %s (choose from %s)' % (', '.join(sorted(unknown)), ', '.join(STEPS)))
+    todo = list(wanted)
+    while todo:
+        for dep in _REQUIRES.get(todo.pop(), ()):
+            if dep not in wanted:
+                wanted.add(dep)
+                todo.append(dep)
+    wanted.add('close_document')
+    return [s for s in STEPS if s in wanted]
+
+
+# -------------------------- suite --------------------------
+def _summary(values):
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    return {'min': min(values), 'median': statistics.median(values), 'mean': statistics.fmean(values),
+            'max': max(values), 'stdev': statistics.stdev(values) if len(values) > 1 else 0.0}
+
+
+def environment():
+    info = {'python': platform.python_version(), 'platform': platform.platform(), 'machine': platform.machine()}
+    try:
+        import FreeCAD
+        info['freecad'] = '.'.join(str(v) for v in FreeCAD.Version()[:3])
+    except Exception:
+        info['freecad'] = None
+    return info
+
+
+def run_suite(runs=DEFAULT_RUNS, warmup=DEFAULT_WARMUP, steps=None, out_dir=None, log=print):
+    """Run the steps warmup+runs times; return the JSON-ready result dict."""
+    order = resolve_steps(steps)
+    samples = {name: [] for name in order}
+    skipped = {}
+    tmp = None
+    if out_dir is None:
+        out_dir = tmp = tempfile.mkdtemp(prefix='fc_api_bench_')
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        for i in range(warmup + runs):
+            ctx = {'run': i, 'dir': out_dir}
+            recorded = i >= warmup
+            for name in order:
+                try:
+                    _, sample = measure(_STEP_FUNCS[name], ctx)
+                except SkipStep as e:
+                    skipped[name] = str(e)
+                    continue
+                if recorded:
+                    samples[name].append(sample)
+            if 'doc' in ctx:
+                _close_document(ctx)
+            if log:
+                log('run %d/%d' % (i - warmup + 1, runs) if recorded else 'warmup %d/%d' % (i + 1, warmup))
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+    result = {'format': RESULT_FORMAT, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'environment': environment(), 'runs': runs, 'warmup': warmup, 'steps': {}}
+    for name in order:
+        got = samples[name]
+        if not got:
+            result['steps'][name] = {'skipped': skipped.get(name, 'not run')}
+            continue
+        result['steps'][name] = {
+            'wall': _summary([s['wall'] for s in got]),
+            'cpu': _summary([s['cpu'] for s in got]),
+            'peak_rss_mb': max((s['rss_mb'] for s in got if s['rss_mb'] is not None), default=None),
+            'samples': [s['wall'] for s in got],
+        }
+    return result
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Steps whose median wall/CPU time or peak RSS grew by more than threshold (list of dicts)."""
+    regressions = []
+    for name, cur in current.get('steps', {}).items():
+        base = baseline.get('steps', {}).get(name)
+        if not base or 'skipped' in base or 'skipped' in cur:
+            continue
+        for metric in ('wall', 'cpu'):
+            b, c = (base.get(metric) or {}).get('median'), (cur.get(metric) or {}).get('median')
+            if b is None or c is None:
+                continue
+            if c > b * (1.0 + threshold) and c - b > MIN_REGRESSION_SECONDS:
+                regressions.append({'step': name, 'metric': metric, 'baseline': b, 'current': c,
+                                    'ratio': c / b if b else float('inf')})
+        b, c = base.get('peak_rss_mb'), cur.get('peak_rss_mb')
+        if b and c and c > b * (1.0 + threshold) and c - b > MIN_REGRESSION_RSS_MB:
+            regressions.append({'step': name, 'metric': 'peak_rss_mb', 'baseline': b, 'current': c, 'ratio': c / b})
+    return regressions
+
+
+def format_table(result, baseline=None):
+    lines = ['%-16s %10s %10s %10s %10s %9s' % ('step', 'median ms', 'min ms', 'stdev ms', 'cpu ms', 'rss MB')]
+    for name, st in result['steps'].items():
+        if 'skipped' in st:
+            lines.append('%-16s skipped: %s' % (name, st['skipped']))
+            continue
+        wall, cpu = st['wall'], st['cpu']
+        row = '%-16s %10.2f %10.2f %10.2f %10.2f %9s' % (
+            name, wall['median'] * 1e3, wall['min'] * 1e3, wall['stdev'] * 1e3, cpu['median'] * 1e3,
+            '%.1f' % st['peak_rss_mb'] if st['peak_rss_mb'] is not None else '-')
+        base = (baseline or {}).get('steps', {}).get(name)
+        if base and 'wall' in base and base['wall']['median']:
+            row += '  %+6.1f%%' % ((wall['median'] / base['wall']['median'] - 1.0) * 100.0)
+        lines.append(row)
+    return '\n'.join(lines)
+
+
+def format_regressions(regressions):
+    if not regressions:
+        return 'No regressions.'
+    out = ['Regressions:']
+    for r in regressions:
+        unit, scale = ('MB', 1.0) if r['metric'] == 'peak_rss_mb' else ('ms', 1e3)
+        out.append('  %-16s %-11s %.2f -> %.2f %s (x%.2f)' % (
+            r['step'], r['metric'], r['baseline'] * scale, r['current'] * scale, unit, r['ratio']))
+    return '\n'.join(out)
+
+
+def load_result(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_result(result, path):
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+
+
+def run_from_env(log=print):
+    """Suite configured by the FC_BENCH_* environment variables; returns the exit code."""
+    env = os.environ.get
+    steps = [s.strip() for s in (env('FC_BENCH_STEPS') or '').split(',') if s.strip()] or None
+    threshold = float(env('FC_BENCH_THRESHOLD') or DEFAULT_THRESHOLD)
+    result = run_suite(runs=int(env('FC_BENCH_RUNS') or DEFAULT_RUNS),
+                       warmup=int(env('FC_BENCH_WARMUP') or DEFAULT_WARMUP),
+                       steps=steps, out_dir=env('FC_BENCH_DIR') or None, log=log)
+    baseline = load_result(env('FC_BENCH_BASELINE')) if env('FC_BENCH_BASELINE') else None
+    log(format_table(result, baseline))
+    regressions = None
+    if baseline is not None:
+        regressions = result['regressions'] = compare(baseline, result, threshold)
+        log(format_regressions(regressions))
+    if env('FC_BENCH_OUT'):
+        write_result(result, env('FC_BENCH_OUT'))
+        log('Results written to %s' % env('FC_BENCH_OUT'))
+    return 1 if regressions else 0
+
+
+def main(argv):
+    if len(argv) > 1 and argv[1] == 'compare':
+        args = argv[2:]
+        threshold = DEFAULT_THRESHOLD
+        if '--threshold' in args:
+            i = args.index('--threshold')
+            threshold = float(args[i + 1])
+            del args[i:i + 2]
+        if len(args) != 2:
+            print(__doc__)
+            return 2
+        baseline, current = load_result(args[0]), load_result(args[1])
+        print(format_table(current, baseline))
+        regressions = compare(baseline, current, threshold)
+        print(format_regressions(regressions))
+        return 1 if regressions else 0
+    return run_from_env()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
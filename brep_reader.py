@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming reader for OCCT text BREP files ("CASCADE Topology V1", the *.brp
+members of an .FCStd archive), without FreeCAD or OCCT.
+
+Plain Python:
+  brep = read_brep(r'FreeCadTest\\FCStd\\123_extracted\\Body.Shape.brp')
+  brep.vertices()        # (N,3) global vertex coordinates, one per TopoDS_Vertex
+  brep.edge_endpoints()  # (E,2,3) first/last vertex of every edge
+  brep.bbox()            # exact vertex bounding box {'XMin': ..., 'ZMax': ...}
+
+  with open_fcstd('123.FCStd') as fc, fc.open_text(fc.shape_member('Body')) as f:
+      brep = read_brep(f)
+
+Command line:
+  python brep_reader.py FreeCadTest/FCStd/123_extracted/Body.Shape.brp
+  python brep_reader.py FreeCadTest/FCStd/123.FCStd [--object Body] [--vertices] [--json]
+
+What is read:
+- Locations: every entry becomes a 4x4 matrix; composite entries ("2 i p j q ... 0")
+  are resolved as Lj^q * Li^p, like TopTools_LocationSet.
+- Curves / Surfaces: analytic, Bezier, B-spline, trimmed and offset records are
+  parsed into (type name, parameter array, basis) tuples; a table with an unknown
+  record type is left as None (the topology does not depend on it).
+- TShapes: kind, vertex points, edge 3D-curve references and the located
+  sub-shape references. Curve2ds, polygons and triangulations are skipped.
+
+Global coordinates are obtained by composing the locations from the root
+reference down to each vertex; a vertex reached twice with the same total
+location is the same TopoDS_Vertex and is reported once.
+"""
+from __future__ import annotations
+import io
+import json
+import os
+import sys
+
+import numpy as np
+
+CURVE_TYPES = {1: 'line', 2: 'circle', 3: 'ellipse', 4: 'parabola', 5: 'hyperbola',
+               6: 'bezier', 7: 'bspline', 8: 'trimmed', 9: 'offset'}
+SURFACE_TYPES = {1: 'plane', 2: 'cylinder', 3: 'cone', 4: 'sphere', 5: 'torus', 6: 'extrusion',
+                 7: 'revolution', 8: 'bezier', 9: 'bspline', 10: 'trimmed', 11: 'offset'}
+# number of floats of the fixed-size records
+_CURVE_SIZES = {1: 6, 2: 13, 3: 14, 4: 13, 5: 14}
+_SURFACE_SIZES = {1: 12, 2: 13, 3: 14, 4: 13, 5: 14}
+ORIENTATIONS = {'+': 'forward', '-': 'reversed', 'i': 'internal', 'e': 'external'}
+_IDENTITY = np.eye(4)
+
+
+class BrepError(ValueError):
+    pass
+
+
+# -------------------------- geometry tables --------------------------
+class _Tokens:
+    def __init__(self, tokens):
+        self._t = tokens
+        self.i = 0
+
+    def floats(self, n):
+        out = np.array(self._t[self.i:self.i + n], dtype=np.float64)
+        if len(out) != n:
+            raise BrepError('unexpected end of geometry table')
+        self.i += n
+        return out
+
+    def int(self):
+        return int(self.floats(1)[0])
+
+    def more(self):
+        return self.i < len(self._t)
+
+
+def _read_curve(tok):
+    kind = tok.int()
+    if kind in _CURVE_SIZES:
+        return CURVE_TYPES[kind], tok.floats(_CURVE_SIZES[kind]), None
+    if kind == 6:
+        rational, degree = tok.int(), tok.int()
+        return 'bezier', tok.floats((degree + 1) * (3 + rational)), None
+    if kind == 7:
+        rational, _periodic, _degree, poles, knots = (tok.int() for _ in range(5))
+        return 'bspline', np.concatenate([tok.floats(poles * (3 + rational)), tok.floats(knots * 2)]), None
+    if kind == 8:
+        return 'trimmed', tok.floats(2), _read_curve(tok)
+    if kind == 9:
+        return 'offset', tok.floats(4), _read_curve(tok)
+    raise BrepError(f'unknown curve type {kind}')
+
+
+def _read_surface(tok):
+    kind = tok.int()
+    if kind in _SURFACE_SIZES:
+        return SURFACE_TYPES[kind], tok.floats(_SURFACE_SIZES[kind]), None
+    if kind == 6:
+        return 'extrusion', tok.floats(3), _read_curve(tok)
+    if kind == 7:
+        return 'revolution', tok.floats(6), _read_curve(tok)
+    if kind == 8:
+        urational, vrational, udeg, vdeg = (tok.int() for _ in range(4))
+        weights = 1 if (urational or vrational) else 0
+        return 'bezier', tok.floats((udeg + 1) * (vdeg + 1) * (3 + weights)), None
+    if kind == 9:
+        urational, vrational, _up, _vp, _udeg, _vdeg, nup, nvp, nuk, nvk = (tok.int() for _ in range(10))
+        weights = 1 if (urational or vrational) else 0
+        return 'bspline', np.concatenate([tok.floats(nup * nvp * (3 + weights)),
+                                          tok.floats(nuk * 2), tok.floats(nvk * 2)]), None
+    if kind == 10:
+        return 'trimmed', tok.floats(4), _read_surface(tok)
+    if kind == 11:
+        return 'offset', tok.floats(1), _read_surface(tok)
+    raise BrepError(f'unknown surface type {kind}')
+
+
+def _read_table(tokens, count, reader):
+    tok = _Tokens(tokens)
+    try:
+        table = [reader(tok) for _ in range(count)]
+    except (BrepError, ValueError):
+        return None
+    return table
+
+
+# -------------------------- topology --------------------------
+class TShape:
+    """One record of the TShapes section."""
+    __slots__ = ('kind', 'point', 'curve', 'flags', 'children')
+
+    def __init__(self, kind, point, curve, flags, children):
+        self.kind = kind
+        self.point = point        # Ve: local coordinates
+        self.curve = curve        # Ed: (curve index, location index, first, last) or None
+        self.flags = flags
+        self.children = children  # [(orientation char, tshape index, location index)], 0-based tshape
+
+
+class Brep:
+    """Parsed BREP: locations (L,4,4), curves, surfaces, tshapes and the root reference."""
+
+    def __init__(self, locations, curves, surfaces, tshapes, root):
+        self.locations = locations
+        self.curves = curves
+        self.surfaces = surfaces
+        self.tshapes = tshapes
+        self.root = root          # (orientation char, tshape index, location index) or None
+        self._occurrences = {}
+
+    def counts(self):
+        out = {}
+        for ts in self.tshapes:
+            out[ts.kind] = out.get(ts.kind, 0) + 1
+        return out
+
+    def _matrix(self, loc):
+        return self.locations[loc - 1] if loc else _IDENTITY
+
+    def _occurrences_of(self, index, kind):
+        """(tshape indices (k,), matrices (k,4,4)) of all kind sub-shapes of a tshape, in its frame."""
+        key = (index, kind)
+        found = self._occurrences.get(key)
+        if found is not None:
+            return found
+        ts = self.tshapes[index]
+        if ts.kind == kind:
+            found = (np.array([index]), _IDENTITY[None].copy())
+        else:
+            idx, mats = [], []
+            for _ori, child, loc in ts.children:
+                ci, cm = self._occurrences_of(child, kind)
+                if len(ci):
+                    idx.append(ci)
+                    mats.append(cm if not loc else np.matmul(self._matrix(loc), cm))
+            if idx:
+                found = _unique_occurrences(np.concatenate(idx), np.concatenate(mats))
+            else:
+                found = (np.zeros(0, dtype=np.int64), np.zeros((0, 4, 4)))
+        self._occurrences[key] = found
+        return found
+
+    def _root_occurrences(self, kind):
+        if self.root is None:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, 4, 4))
+        _ori, index, loc = self.root
+        idx, mats = self._occurrences_of(index, kind)
+        if loc and len(idx):
+            idx, mats = _unique_occurrences(idx, np.matmul(self._matrix(loc), mats))
+        return idx, mats
+
+    def vertices(self):
+        """(N,3) global coordinates of the distinct vertices, in first-reached order."""
+        idx, mats = self._root_occurrences('Ve')
+        if not len(idx):
+            return np.zeros((0, 3))
+        pts = np.array([self.tshapes[i].point for i in idx])
+        return _apply(mats, pts)
+
+    def edge_endpoints(self):
+        """(E,2,3) first and last vertex of every distinct edge (degenerate edges included).
+
+        The first vertex is the FORWARD reference of the edge, the last the REVERSED one
+        (the same point for closed edges); edges without vertices are skipped.
+        """
+        idx, mats = self._root_occurrences('Ed')
+        rows, keep = [], []
+        for k, i in enumerate(idx):
+            ends = self._edge_local_ends(i)
+            if ends is not None:
+                rows.append(ends)
+                keep.append(k)
+        if not rows:
+            return np.zeros((0, 2, 3))
+        ends = np.array(rows)
+        m = mats[keep]
+        return np.stack([_apply(m, ends[:, 0]), _apply(m, ends[:, 1])], axis=1)
+
+    def _edge_local_ends(self, index):
+        first = last = None
+        for ori, child, loc in self.tshapes[index].children:
+            ts = self.tshapes[child]
+            if ts.kind != 'Ve':
+                continue
+            p = _apply(self._matrix(loc)[None], np.array([ts.point]))[0]
+            if ori == '+' and first is None:
+                first = p
+            elif ori == '-' and last is None:
+                last = p
+        if first is None and last is None:
+            return None
+        return (first if first is not None else last), (last if last is not None else first)
+
+    def bbox(self):
+        """Exact bounding box of the vertices, or None when the shape has none."""
+        pts = self.vertices()
+        if not len(pts):
+            return None
+        lo, hi = pts.min(axis=0), pts.max(axis=0)
+        return {'XMin': float(lo[0]), 'XMax': float(hi[0]), 'YMin': float(lo[1]), 'YMax': float(hi[1]),
+                'ZMin': float(lo[2]), 'ZMax': float(hi[2])}
+
+
+def _apply(mats, pts):
+    """Transform points (k,3) by matrices (k,4,4)."""
+    return np.einsum('kij,kj->ki', mats[:, :3, :3], pts) + mats[:, :3, 3]
+
+
+def _unique_occurrences(idx, mats):
+    """Drop repeated (tshape, location) pairs, keeping first-reached order."""
+    if len(idx) < 2:
+        return idx, mats
+    key = np.concatenate([idx[:, None].astype(np.float64), np.round(mats[:, :3, :].reshape(len(idx), 12), 9)],
+                         axis=1)
+    _, first = np.unique(key, axis=0, return_index=True)
+    first.sort()
+    return idx[first], mats[first]
+
+
+# -------------------------- reader --------------------------
+def _lines(source):
+    for raw in source:
+        if isinstance(raw, bytes):
+            raw = raw.decode('latin-1')
+        yield raw.strip()
+
+
+def _is_header(line):
+    parts = line.split()
+    return len(parts) == 2 and parts[0][:1].isalpha() and parts[1].isdigit()
+
+
+def _read_locations(lines, count):
+    raw = []
+    for _ in range(count):
+        head = next(lines).split()
+        if head[0] == '1':
+            m = np.eye(4)
+            m[:3] = [[float(v) for v in next(lines).split()] for _ in range(3)]
+            raw.append(m)
+        elif head[0] == '2':
+            items = [int(v) for v in head[1:]]
+            while not items or items[-1] != 0:
+                items.extend(int(v) for v in next(lines).split())
+            raw.append(items[:-1])
+        else:
+            raise BrepError(f'unknown location type {head[0]}')
+    resolved = np.zeros((count, 4, 4))
+    for n, entry in enumerate(raw):
+        if isinstance(entry, np.ndarray):
+            resolved[n] = entry
+            continue
+        m = np.eye(4)
+        for k in range(0, len(entry), 2):
+            datum, power = resolved[entry[k] - 1], entry[k + 1]
+            factor = np.linalg.matrix_power(datum if power >= 0 else np.linalg.inv(datum), abs(power))
+            m = factor @ m
+        resolved[n] = m
+    return resolved
+
+
+def _read_tshapes(lines, count):
+    tshapes = []
+    for _ in range(count):
+        kind = next(lines)
+        geom = []
+        for ln in lines:
+            if not ln:
+                break
+            geom.append(ln)
+        flags = next(lines)
+        tokens = []
+        while not tokens or tokens[-1] != '*':
+            tokens.extend(next(lines).split())
+        refs = tokens[:-1]
+        children = [(refs[k][0], count - int(refs[k][1:]), int(refs[k + 1])) for k in range(0, len(refs), 2)]
+        point = curve = None
+        if kind == 'Ve':
+            point = [float(v) for v in geom[1].split()[:3]]
+        elif kind == 'Ed':
+            for ln in geom[1:]:
+                parts = ln.split()
+                if parts[0] == '1' and len(parts) >= 5:
+                    curve = (int(parts[1]), int(parts[2]), float(parts[3]), float(parts[4]))
+                    break
+        tshapes.append(TShape(kind, point, curve, flags, children))
+    return tshapes
+
+
+def read_brep(source) -> Brep:
+    """Parse a text BREP from a path, bytes or a (text or binary) line iterable."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'r', encoding='latin-1') as f:
+            return read_brep(f)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    lines = _lines(source)
+    header = next((ln for ln in lines if ln), None)
+    if header is None:
+        return Brep(np.zeros((0, 4, 4)), [], [], [], None)
+    if not header.startswith('CASCADE Topology'):
+        raise BrepError(f'not a text BREP: {header[:40]!r}')
+    locations = np.zeros((0, 4, 4))
+    curves, surfaces, tshapes = [], [], []
+    line = next(lines, None)
+    while line is not None:
+        if not _is_header(line):
+            line = next(lines, None)
+            continue
+        name, count = line.split()[0], int(line.split()[1])
+        if name == 'Locations':
+            locations = _read_locations(lines, count)
+        elif name == 'TShapes':
+            tshapes = _read_tshapes(lines, count)
+            break
+        elif name in ('Curves', 'Surfaces'):
+            tokens, line = [], next(lines, None)
+            while line is not None and not _is_header(line):
+                tokens.extend(line.split())
+                line = next(lines, None)
+            table = _read_table(tokens, count, _read_curve if name == 'Curves' else _read_surface)
+            if name == 'Curves':
+                curves = table
+            else:
+                surfaces = table
+            continue
+        line = next(lines, None)  # skipped sections are consumed by the header scan
+    root = None
+    for ln in lines:
+        if ln:
+            ref, loc = ln.split()[:2]
+            root = (ref[0], len(tshapes) - int(ref[1:]), int(loc))
+            break
+    return Brep(locations, curves, surfaces, tshapes, root)
+
+
+# -------------------------- command line --------------------------
+def _summary(name, brep, with_vertices):
+    out = {'name': name, 'counts': brep.counts(), 'bbox': brep.bbox(),
+           'vertices': len(brep.vertices()), 'edges': len(brep.edge_endpoints())}
+    if with_vertices:
+        out['points'] = np.round(brep.vertices(), 9).tolist()
+    return out
+
+
+def main(argv):
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description='Read vertices/bbox from OCCT text BREP files')
+    parser.add_argument('path', help='*.brp file, or .FCStd archive / extracted folder')
+    parser.add_argument('--object', action='append', help='Object name inside an archive (repeatable)')
+    parser.add_argument('--vertices', action='store_true', help='Include vertex coordinates')
+    parser.add_argument('--json', action='store_true', help='Print JSON')
+    args = parser.parse_args(argv[1:])
+
+    t0 = time.perf_counter()
+    results = []
+    if args.path.lower().endswith('.brp'):
+        results.append(_summary(os.path.basename(args.path), read_brep(args.path), args.vertices))
+    else:
+        from fcstd_reader import open_fcstd
+        with open_fcstd(args.path) as fc:
+            members = [fc.shape_member(o) for o in args.object] if args.object else fc.shape_members()
+            for member in members:
+                if not member:
+                    continue
+                with fc.open_text(member) as f:
+                    results.append(_summary(member, read_brep(f), args.vertices))
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+    for r in results:
+        counts = ' '.join(f'{k}={v}' for k, v in r['counts'].items())
+        print(f"{r['name']}: {counts or 'empty'}; {r['vertices']} vertices, {r['edges']} edges")
+        bb = r['bbox']
+        if bb:
+            print(f"  BB: X[{bb['XMin']:.6g}, {bb['XMax']:.6g}] Y[{bb['YMin']:.6g}, {bb['YMax']:.6g}] "
+                  f"Z[{bb['ZMin']:.6g}, {bb['ZMax']:.6g}]")
+        for p in r.get('points', []):
+            print(f'  {p[0]:.6f} {p[1]:.6f} {p[2]:.6f}')
+    print(f'{len(results)} shape(s) in {elapsed * 1000:.2f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
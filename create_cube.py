@@ -10,13 +10,37 @@ Notes:
 - This script must run inside FreeCAD's Python (GUI or FreeCADCmd). Normal Python won't have FreeCAD modules.
 - All dimensions are in millimeters.
 - Arguments are optional; defaults are L=W=H=10mm. If no --fcstd provided, a timestamped .FCStd is saved in script folder.
+
+Batch mode (many parts in one FreeCADCmd process):
+  FreeCADCmd.exe d:\\FreeCad\\create_cube.py --jobs d:\\FreeCad\\jobs.csv --manifest d:\\FreeCad\\jobs.manifest.jsonl
+- The job file is CSV (header row) or JSONL (one object per line) with any of the columns
+  length, width, height, pos, rot, holeRadius, holeAxis, name, fcstd, stl.
+  Missing columns fall back to the command-line/env values.
+- All jobs share one document that is cleared between jobs instead of creating a new one.
+- One JSON line per job is appended to the manifest (status, outputs, per-step timings).
+
+Geometry cache (--cacheDir <dir> / env FC_CACHE_DIR, size limit --cacheMaxMB / FC_CACHE_MAX_MB):
+- Outputs are stored under a hash of the normalized parameters and the FreeCAD version;
+  an identical request is served by hard link/copy without rebuilding (see geometry_cache.py).
+
+Golden check (--goldenDir <dir> / env FC_GOLDEN_DIR):
+- The written STL is compared with the file of the same name (timestamp stripped) in the
+  folder: surface deviation, bounding box, volume and area against the tolerances of
+  mesh_compare.py. The exit code is 1 when the comparison fails.
+
+Tracing (env FC_TRACE=1, or FC_TRACE=<file>.json for a Chrome trace as well):
+- Argument parsing, document creation, every recompute, booleans, save and each export
+  format run in nested spans (see tracing.py); a per-span summary table is printed on exit.
 """
 from __future__ import annotations
+import csv
+import json
 import os
 import sys
 import time
 
-# FreeCAD environment imports (available when running within FreeCAD/FreeCADCmd)
+# FreeCAD environment imports (available when running within FreeCAD/FreeCADCmd).
+# The module stays importable from plain Python (job parsing, schedulers); main() refuses to run there.
 try:
     import FreeCAD as App  # type: ignore
     import Part  # type: ignore
@@ -29,10 +53,10 @@ try:
         import MeshPart  # type: ignore
     except Exception:  # pragma: no cover
         MeshPart = None  # type: ignore
+    _IMPORT_ERROR = None
 except Exception as e:
-    sys.stderr.write("This script must be executed by FreeCAD or FreeCADCmd.\n")
-    sys.stderr.write(str(e) + "\n")
-    sys.exit(2)
+    App = Part = Mesh = MeshPart = None  # type: ignore
+    _IMPORT_ERROR = e
 
 
 def _parse_args(argv):
@@ -48,6 +72,11 @@ def _parse_args(argv):
     --rot    <rx,ry,rz> rotation in degrees about X,Y,Z (e.g. 0,0,0)
     --holeRadius <mm>  through-hole radius along Z at cube center
     --holeAxis <X|Y|Z> axis for through-hole (default Z)
+    --jobs   <job file .csv/.jsonl> batch mode
+    --manifest <output .jsonl> per-job result manifest (batch mode)
+    --cacheDir <dir>   geometry cache folder (disabled if omitted)
+    --cacheMaxMB <MB>  geometry cache size limit (default 1024)
+    --goldenDir <dir>  compare the STL with the reference of the same name in dir
     """
     # defaults
     cfg = {
@@ -61,6 +90,11 @@ def _parse_args(argv):
         "rot": None,          # "rx,ry,rz" degrees
         "holeRadius": 0.0,
         "holeAxis": "Z",
+        "jobs": None,
+        "manifest": None,
+        "cacheDir": None,
+        "cacheMaxMB": 1024.0,
+        "goldenDir": None,
     }
     it = iter(range(1, len(argv)))
     i = 1
@@ -75,19 +109,20 @@ def _parse_args(argv):
                 raise SystemExit(f"{a} expects a number (mm)")
             i += 2
             continue
-        if a in ("--fcstd", "--stl", "--name", "--pos", "--rot", "--holeAxis"):
+        if a in ("--fcstd", "--stl", "--name", "--pos", "--rot", "--holeAxis", "--jobs", "--manifest",
+                 "--cacheDir", "--goldenDir"):
             if i + 1 >= len(argv):
                 raise SystemExit(f"Missing value after {a}")
             cfg[a.lstrip("-")] = argv[i + 1]
             i += 2
             continue
-        if a in ("--holeRadius",):
+        if a in ("--holeRadius", "--cacheMaxMB"):
             if i + 1 >= len(argv):
                 raise SystemExit(f"Missing value after {a}")
             try:
                 cfg[a.lstrip("-")] = float(argv[i + 1])
             except ValueError:
-                raise SystemExit(f"{a} expects a number (mm)")
+                raise SystemExit(f"{a} expects a number")
             i += 2
             continue
         # ignore unknown tokens (allows FreeCAD to pass internal args)
@@ -95,60 +130,84 @@ def _parse_args(argv):
     return cfg
 
 
-def create_cube(length=10.0, width=10.0, height=10.0, name="MyCube"):
+def create_cube(length=10.0, width=10.0, height=10.0, name="MyCube", doc=None):
     """Create a new FreeCAD document and add a Part::Box.
+    If doc is given, the box is added to it instead of the active document.
 
     Returns (doc, cube_obj)
     """
-    App.Console.PrintMessage("[create_cube] start\n")
-    doc = App.ActiveDocument
-    if doc is None:
-        App.Console.PrintMessage("[create_cube] new document\n")
-        doc = App.newDocument("CubeDoc")
-    else:
-        App.Console.PrintMessage(f"[create_cube] reuse document: {doc.Name}\n")
-    cube = doc.addObject("Part::Box", name)
-    cube.Length = float(length)
-    cube.Width = float(width)
-    cube.Height = float(height)
-    App.Console.PrintMessage(f"[create_cube] set size L={float(cube.Length)} mm, W={float(cube.Width)} mm, H={float(cube.Height)} mm\n")
-    doc.recompute()
-    App.Console.PrintMessage("[create_cube] recompute done\n")
+    with tracing.span("create_cube", name=name):
+        if doc is None:
+            doc = App.ActiveDocument
+        if doc is None:
+            with tracing.span("new_document"):
+                doc = App.newDocument("CubeDoc")
+        else:
+            tracing.log(f"[create_cube] reuse document: {doc.Name}\n", document=doc.Name)
+        cube = doc.addObject("Part::Box", name)
+        cube.Length = float(length)
+        cube.Width = float(width)
+        cube.Height = float(height)
+        tracing.log(f"[create_cube] set size L={float(cube.Length)} mm, W={float(cube.Width)} mm, H={float(cube.Height)} mm\n")
+        _recompute(doc, "create_cube")
     return doc, cube
 
 
+def _recompute(doc, step):
+    """doc.recompute() inside a "recompute" span; step names the caller."""
+    with tracing.span("recompute", step=step) as sp:
+        count = doc.recompute()
+        if sp:
+            sp.set(objects=len(doc.Objects), recomputed=count)
+    return count
+
+
+# Tessellation used by export_stl (also part of the geometry cache key)
+STL_LINEAR_DEFLECTION = 0.1
+STL_ANGULAR_DEFLECTION = 0.523599
+
+
 def save_fcstd(doc, out_path: str):
-    folder = os.path.dirname(out_path)
-    if folder and not os.path.isdir(folder):
-        os.makedirs(folder, exist_ok=True)
+    """Save doc as out_path through export_pipeline (a failed save leaves an existing file untouched)."""
     # Normalize path for FreeCAD (forward slashes help on Windows)
     norm_path = out_path.replace("\\", "/")
-    App.Console.PrintMessage(f"[save_fcstd] saving to: {norm_path}\n")
-    doc.saveAs(norm_path)
-    App.Console.PrintMessage("[save_fcstd] save done\n")
+    with tracing.span("save_fcstd", path=norm_path) as sp:
+        _local_module("export_pipeline").export(None, {"fcstd": norm_path}, doc=doc, raise_on_error=True)
+        if sp:
+            sp.set(objects=len(doc.Objects), bytes=os.path.getsize(norm_path))
     return norm_path
 
 
 def export_stl(objs, out_path: str):
+    """Write all objects merged into one binary STL (stl_io, tessellations cached); Mesh.export as fallback."""
     folder = os.path.dirname(out_path)
     if folder and not os.path.isdir(folder):
         os.makedirs(folder, exist_ok=True)
-    if 'Mesh' in globals() and Mesh is not None:
-        try:
-            Mesh.export(list(objs), out_path)
-            return out_path
-        except Exception:
-            pass
-    # Fallback: mesh via MeshPart if available
-    if 'MeshPart' in globals() and MeshPart is not None:
+    with tracing.span("export_stl", path=out_path) as sp:
         try:
-            for obj in objs:
-                mesh = MeshPart.meshFromShape(Shape=obj.Shape, LinearDeflection=0.1, AngularDeflection=0.523599, Relative=False)
-                mesh.write(out_path)
-            return out_path
-        except Exception:
-            pass
-    raise RuntimeError("No Mesh export available in this FreeCAD environment")
+            stl_io = _local_module("stl_io")
+            cache = _local_module("tessellation_cache").default_cache()
+            written = stl_io.export_objects(list(objs), out_path, linear_deflection=STL_LINEAR_DEFLECTION,
+                                            angular_deflection=STL_ANGULAR_DEFLECTION, cache=cache)
+            if sp:
+                sp.set(writer="stl_io", bytes=os.path.getsize(out_path))
+            return written
+        except Exception as e:
+            # Mesh.export tessellates differently from the deflection in the geometry cache key: say so
+            stl_error = e
+            tracing.log(f"[export_stl] stl_io failed ({type(e).__name__}: {e}), falling back to Mesh.export\n",
+                        error=str(e))
+            if sp:
+                sp.set(error=f"stl_io: {e}")
+        if 'Mesh' in globals() and Mesh is not None:
+            try:
+                Mesh.export(list(objs), out_path)
+                if sp:
+                    sp.set(writer="Mesh", bytes=os.path.getsize(out_path))
+                return out_path
+            except Exception as e:
+                raise RuntimeError(f"STL export failed: stl_io: {stl_error}; Mesh.export: {e}") from stl_error
+        raise RuntimeError(f"No Mesh export available in this FreeCAD environment (stl_io: {stl_error})") from stl_error
 
 def _gui_show_and_fit(doc, target):
     try:
@@ -158,11 +217,12 @@ def _gui_show_and_fit(doc, target):
     try:
         # Hide other shape-bearing objects to declutter
         candidates = [o for o in doc.Objects if hasattr(o, 'Shape') and getattr(o,'Shape',None) is not None and not o.Shape.isNull()]
-        for o in candidates:
-            try:
-                o.ViewObject.Visibility = (o == target)
-            except Exception:
-                pass
+        # One batched pass with redraw suspended instead of a redraw per object
+        view_batch = _local_module("view_batch")
+        with tracing.span("gui_show", objects=len(candidates)):
+            with view_batch.ViewBatch() as batch:
+                batch.show_only(candidates, target)
+        tracing.log(f"[view] {batch.summary()}\n", **batch.stats)
         try:
             Gui.Selection.clearSelection()
             Gui.Selection.addSelection(target)
@@ -178,15 +238,78 @@ def _gui_show_and_fit(doc, target):
         pass
 
 
-def main(argv):
-    # marker to confirm script actually runs
-    try:
-        open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cube_ran.txt'), 'w').write('ran')
-    except Exception:
-        pass
-    App.Console.PrintMessage("[main] parsing args\n")
-    cfg = _parse_args(argv)
-    # Allow overriding via environment variables (safer than CLI args which FreeCAD may intercept)
+def _parse_vec3(s):
+    """Parse "x,y,z" (or a 3-item list from a JSONL job) into three floats."""
+    if isinstance(s, (list, tuple)):
+        parts = list(s)
+    else:
+        parts = [p.strip() for p in str(s).split(',')]
+    if len(parts) != 3:
+        raise ValueError
+    return [float(parts[0]), float(parts[1]), float(parts[2])]
+
+
+def canonical_params(cfg):
+    """Normalized parameters that fully determine the built part (geometry cache key).
+
+    Mirrors build_part: invalid pos/rot fall back to zero, the hole axis only matters
+    when a hole is made, and the STL tessellation only when an STL is requested.
+    """
+    def _num(v):
+        return round(float(v), 9) + 0.0  # + 0.0 folds -0.0 into 0.0
+
+    def _vec(s):
+        try:
+            return [_num(v) for v in _parse_vec3(s)] if s else [0.0, 0.0, 0.0]
+        except Exception:
+            return [0.0, 0.0, 0.0]
+
+    hole_r = max(0.0, _num(cfg.get("holeRadius") or 0.0))
+    params = {
+        "length": _num(cfg["length"]),
+        "width": _num(cfg["width"]),
+        "height": _num(cfg["height"]),
+        "pos": _vec(cfg.get("pos")),
+        "rot": _vec(cfg.get("rot")),
+        "holeRadius": hole_r,
+        "holeAxis": (cfg.get("holeAxis") or "Z").upper() if hole_r > 0.0 else None,
+        "name": cfg.get("name") or "MyCube",
+    }
+    if cfg.get("stl"):
+        params["stlDeflection"] = [STL_LINEAR_DEFLECTION, STL_ANGULAR_DEFLECTION]
+    return params
+
+
+def freecad_version():
+    """Version string of the running FreeCAD (part of the geometry cache key)."""
+    if App is None:
+        return os.environ.get("FC_VERSION") or "unknown"
+    return " ".join(str(v) for v in App.Version()[:4])
+
+
+def _local_module(name):
+    """Import a helper module that lives next to this script (FreeCAD may not put it on sys.path)."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    return __import__(name)
+
+
+# Spans around each step; off (no-op) unless FC_TRACE is set, see tracing.py
+tracing = _local_module("tracing")
+
+
+def open_cache(cfg):
+    """GeometryCache for cfg["cacheDir"], or None when caching is disabled."""
+    if not cfg.get("cacheDir"):
+        return None
+    geometry_cache = _local_module("geometry_cache")
+    return geometry_cache.GeometryCache(cfg["cacheDir"],
+                                        max_bytes=int(float(cfg.get("cacheMaxMB") or 1024.0) * (1 << 20)))
+
+
+def _apply_env(cfg):
+    """Allow overriding via environment variables (safer than CLI args which FreeCAD may intercept)."""
     env_map = {
         "length": os.environ.get("FC_LENGTH"),
         "width": os.environ.get("FC_WIDTH"),
@@ -198,26 +321,53 @@ def main(argv):
         "rot": os.environ.get("FC_ROT"),
         "holeRadius": os.environ.get("FC_HOLE_RADIUS"),
         "holeAxis": os.environ.get("FC_HOLE_AXIS"),
+        "jobs": os.environ.get("FC_JOBS"),
+        "manifest": os.environ.get("FC_MANIFEST"),
+        "cacheDir": os.environ.get("FC_CACHE_DIR"),
+        "cacheMaxMB": os.environ.get("FC_CACHE_MAX_MB"),
+        "goldenDir": os.environ.get("FC_GOLDEN_DIR"),
     }
     for k, v in env_map.items():
         if v is None or v == "":
             continue
-        if k in ("length", "width", "height", "holeRadius"):
+        if k in ("length", "width", "height", "holeRadius", "cacheMaxMB"):
             try:
                 cfg[k] = float(v)
             except Exception:
                 App.Console.PrintError(f"[main] invalid env for {k}: {v}\n")
         else:
             cfg[k] = v
-    App.Console.PrintMessage(f"[main] args: {cfg}\n")
-    doc, cube = create_cube(cfg["length"], cfg["width"], cfg["height"], cfg["name"])
+    return cfg
+
+
+def _placement(pos, rot):
+    """Placement moving by pos (mm) and rotating about X, then Y, then Z by rot (deg)."""
+    rx, ry, rz = rot
+    r = App.Rotation(App.Vector(1,0,0), rx)
+    r = App.Rotation(App.Vector(0,1,0), ry).multiply(r)
+    r = App.Rotation(App.Vector(0,0,1), rz).multiply(r)
+    return App.Placement(App.Vector(*pos), r)
+
+
+def _hole_layout(L, W, H, axis):
+    """(height, placement) of a cylinder passing through the center of an L x W x H box along axis."""
+    margin = 2.0
+    if axis == 'X':
+        # rotate cylinder to align with X axis: rotate +90deg about Y
+        return L + margin, App.Placement(App.Vector(-margin/2.0, W/2.0, H/2.0), App.Rotation(App.Vector(0,1,0), 90))
+    if axis == 'Y':
+        # align with Y axis: rotate -90deg about X
+        return W + margin, App.Placement(App.Vector(L/2.0, -margin/2.0, H/2.0), App.Rotation(App.Vector(1,0,0), -90))
+    return H + margin, App.Placement(App.Vector(L/2.0, W/2.0, -margin/2.0), App.Rotation())  # default Z axis
+
 
-    # Placement (position and rotation)
-    def _parse_vec3(s):
-        parts = [p.strip() for p in s.split(',')]
-        if len(parts) != 3:
-            raise ValueError
-        return [float(parts[0]), float(parts[1]), float(parts[2])]
+@tracing.traced("build_part")
+def build_part(cfg, doc=None):
+    """Build the box, its placement and the optional through-hole (through the placed box's center).
+
+    Returns (doc, cube_obj, result_obj); result_obj is the Part::Cut when a hole is made.
+    """
+    doc, cube = create_cube(cfg["length"], cfg["width"], cfg["height"], cfg["name"], doc=doc)
 
     # default placement
     pos = [0.0, 0.0, 0.0]
@@ -234,63 +384,385 @@ def main(argv):
             App.Console.PrintError(f"[main] invalid rot: {cfg['rot']} expected rx,ry,rz\n")
 
     if any(abs(v) > 1e-12 for v in pos) or any(abs(v) > 1e-12 for v in rot):
-        App.Console.PrintMessage(f"[placement] pos={pos}, rot={rot}\n")
-        v = App.Vector(*pos)
-        rx, ry, rz = rot
-        # Compose rotations about X, then Y, then Z
-        r = App.Rotation(App.Vector(1,0,0), rx)
-        r = App.Rotation(App.Vector(0,1,0), ry).multiply(r)
-        r = App.Rotation(App.Vector(0,0,1), rz).multiply(r)
-        cube.Placement = App.Placement(v, r)
-        doc.recompute()
+        tracing.log(f"[placement] pos={pos}, rot={rot}\n")
+        cube.Placement = _placement(pos, rot)
+        _recompute(doc, "placement")
 
     # Optional through-hole at cube center along specified axis
     result_obj = cube
     hole_r = float(cfg.get("holeRadius") or 0.0)
     hole_axis = (cfg.get("holeAxis") or "Z").upper()
     if hole_r > 0.0:
-        App.Console.PrintMessage(f"[hole] radius={hole_r} mm axis={hole_axis}\n")
-        cyl = doc.addObject("Part::Cylinder", "Hole")
-        cyl.Radius = hole_r
-        # Determine hole axis and sizing
-        L = float(cube.Length)
-        W = float(cube.Width)
-        H = float(cube.Height)
-        margin = 2.0
-        if hole_axis == 'X':
-            cyl.Height = L + margin
-            # rotate cylinder to align with X axis: rotate +90deg about Y
-            rot_cyl = App.Rotation(App.Vector(0,1,0), 90)
-            base = App.Vector(-margin/2.0, W/2.0, H/2.0)
-        elif hole_axis == 'Y':
-            cyl.Height = W + margin
-            # align with Y axis: rotate -90deg about X
-            rot_cyl = App.Rotation(App.Vector(1,0,0), -90)
-            base = App.Vector(L/2.0, -margin/2.0, H/2.0)
-        else:
-            cyl.Height = H + margin
-            rot_cyl = App.Rotation()  # default Z axis
-            base = App.Vector(L/2.0, W/2.0, -margin/2.0)
-        cyl.Placement = App.Placement(base, rot_cyl)
-
-        cut = doc.addObject("Part::Cut", "Body")
-        cut.Base = result_obj
-        cut.Tool = cyl
-        doc.recompute()
+        tracing.log(f"[hole] radius={hole_r} mm axis={hole_axis}\n", radius=hole_r, axis=hole_axis)
+        with tracing.span("boolean", op="cut", radius=hole_r, axis=hole_axis):
+            cyl = doc.addObject("Part::Cylinder", "Hole")
+            cyl.Radius = hole_r
+            cyl.Height, layout = _hole_layout(float(cube.Length), float(cube.Width), float(cube.Height), hole_axis)
+            # the hole moves with the box, so it goes through the placed box's center (as in CubeSession)
+            cyl.Placement = cube.Placement.multiply(layout)
+
+            cut = doc.addObject("Part::Cut", "Body")
+            cut.Base = result_obj
+            cut.Tool = cyl
+            _recompute(doc, "boolean")
         result_obj = cut
+    return doc, cube, result_obj
+
+
+def reset_document(doc):
+    """Remove every object so the document can be reused for the next job."""
+    # remove dependents first (reverse creation order) so no link points at a removed object
+    for obj in reversed(list(doc.Objects)):
+        try:
+            doc.removeObject(obj.Name)
+        except Exception:
+            pass
+
+
+# -------------------------- live session --------------------------
+_SESSION_KEYS = ("length", "width", "height", "pos", "rot", "holeRadius", "holeAxis", "name")
+
+
+class CubeSession:
+    """Keep one part open and apply parameter changes incrementally.
+
+    The placement is applied to the finished part (the box itself, or the Part::Cut when there
+    is a hole), which gives the same geometry as build_part (where the hole moves with the
+    placed box), while a placement-only change just moves the result without recomputing
+    anything:
+
+        session = CubeSession()
+        session.update({"length": 20, "holeRadius": 3})   # builds box, hole and cut
+        session.update({"pos": "5,0,0"})                   # re-places the cut only
+        session.update({"holeRadius": 4})                  # recomputes hole and cut
+        export_stl([session.result], "part.stl")
+
+    Each update recomputes the touched features once, in dependency order, and returns
+    {"changed", "touched", "replaced", "timings", "result"}; timings are seconds per feature.
+    """
+
+    def __init__(self, doc=None, doc_name="CubeSession"):
+        self.doc = doc if doc is not None else App.newDocument(doc_name)
+        self.cube = self.hole = self.cut = None
+        self.params = None
+        self.cfg = _parse_args([])
+        self.cfg["stl"] = None
+
+    @property
+    def result(self):
+        return self.cut if self.cut is not None else self.cube
+
+    def update(self, changes=None):
+        """Merge changes into the current parameters and bring the document up to date."""
+        t0 = time.perf_counter()
+        cfg = dict(self.cfg)
+        cfg.update({k: v for k, v in (changes or {}).items() if k in _SESSION_KEYS})
+        new = canonical_params(cfg)
+        old = self.params or {}
+        changed = [k for k in _SESSION_KEYS if old.get(k) != new.get(k)]
+        dirty, replaced = [], []
+
+        def touch(obj):
+            if obj not in dirty:
+                dirty.append(obj)
+
+        if self.cube is None:
+            self.cube = self.doc.addObject("Part::Box", new["name"])
+        if {"length", "width", "height"} & set(changed):
+            self.cube.Length, self.cube.Width, self.cube.Height = new["length"], new["width"], new["height"]
+            touch(self.cube)
+        if "name" in changed:
+            self.cube.Label = new["name"]
+
+        # hole: created, resized or removed; its layout follows the box size
+        if new["holeRadius"] > 0.0:
+            if self.hole is None:
+                self.hole = self.doc.addObject("Part::Cylinder", "Hole")
+                self.cut = self.doc.addObject("Part::Cut", "Body")
+                self.cut.Base = self.cube
+                self.cut.Tool = self.hole
+                changed_hole = True
+            else:
+                changed_hole = bool({"length", "width", "height", "holeRadius", "holeAxis"} & set(changed))
+            if changed_hole:
+                self.hole.Radius = new["holeRadius"]
+                self.hole.Height, self.hole.Placement = _hole_layout(
+                    new["length"], new["width"], new["height"], new["holeAxis"])
+                touch(self.hole)
+            if self.cube in dirty or self.hole in dirty:
+                touch(self.cut)
+        elif self.hole is not None:
+            for obj in (self.cut, self.hole):
+                self.doc.removeObject(obj.Name)
+            self.cut = self.hole = None
+
+        # placement lives on the result only; moving a shape needs no recompute
+        placement = _placement(new["pos"], new["rot"])
+        identity = App.Placement()
+        for obj in (self.cube, self.cut):
+            if obj is None:
+                continue
+            wanted = placement if obj is self.result else identity
+            if obj.Placement != wanted:
+                obj.Placement = wanted
+                if obj not in dirty:
+                    obj.purgeTouched()
+                    replaced.append(obj.Name)
+
+        # one recompute pass over the touched features, dependencies first
+        timings = {}
+        for obj in dirty:
+            t = time.perf_counter()
+            with tracing.span("recompute", step="session", object=obj.Name):
+                obj.recompute()
+            timings[obj.Name] = round(time.perf_counter() - t, 6)
+        self.cfg, self.params = cfg, new
+        timings["total"] = round(time.perf_counter() - t0, 6)
+        report = {
+            "changed": changed,
+            "touched": [o.Name for o in dirty],
+            "replaced": replaced,
+            "timings": timings,
+            "result": self.result.Name,
+        }
+        tracing.log(f"[session] {report}\n", changed=",".join(changed), seconds=timings["total"])
+        return report
+
+    def close(self):
+        App.closeDocument(self.doc.Name)
+
+
+# -------------------------- batch mode --------------------------
+_JOB_NUMBERS = ("length", "width", "height", "holeRadius")
+JOB_KEYS = ("length", "width", "height", "pos", "rot", "holeRadius", "holeAxis", "name", "fcstd", "stl")
+
+
+def load_jobs(path):
+    """Read jobs from a CSV (with header) or JSONL file; returns a list of dicts."""
+    jobs = []
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                jobs.append({k.strip(): v for k, v in row.items() if k})
+    else:
+        with open(path, encoding="utf-8-sig") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    jobs.append(json.loads(line))
+    return jobs
+
+
+_RUN_TIMESTAMP = None
+
+
+def _run_timestamp():
+    """Timestamp of this batch run, taken when the first job needs it."""
+    global _RUN_TIMESTAMP
+    if _RUN_TIMESTAMP is None:
+        _RUN_TIMESTAMP = time.strftime("%Y%m%d-%H%M%S")
+    return _RUN_TIMESTAMP
+
+
+def _job_path(path, index):
+    """Per-job variant of a base output path: out/part.stl -> out/part-0003.stl."""
+    root, ext = os.path.splitext(path)
+    return f"{root}-{index:04d}{ext}"
+
+
+def job_config(base, job, index):
+    """Merge one job row over the base (CLI/env) settings.
+
+    Output paths the row does not set are derived per job: from the base --fcstd/--stl plus
+    the job index, or cube-<run timestamp>-<index>.FCStd next to this script.
+    """
+    cfg = dict(base)
+    for k in JOB_KEYS:
+        v = job.get(k)
+        if v is None or v == "":
+            if k in ("fcstd", "stl") and cfg.get(k):
+                cfg[k] = _job_path(cfg[k], index)  # a shared base path would be overwritten by every job
+            continue
+        cfg[k] = float(v) if k in _JOB_NUMBERS else v
+    if not cfg.get("fcstd"):
+        # one timestamp per run; the job index keeps names unique within the batch
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        cfg["fcstd"] = os.path.join(script_dir, f"cube-{_run_timestamp()}-{index:04d}.FCStd")
+    return cfg
+
+
+@tracing.traced("run_job")
+def run_job(cfg, doc=None, cache=None):
+    """Build one part and write its outputs.
+
+    With a GeometryCache, an identical earlier build is served from the cache instead;
+    cube_obj/result_obj are then None and record["cache"] is "hit".
+    Returns (record, doc, cube_obj, result_obj); record holds the output paths and step timings.
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    if cache is not None:
+        params = canonical_params(cfg)
+        version = freecad_version()
+        with tracing.span("cache_lookup"):
+            hit = cache.fetch(params, version, cfg["fcstd"], cfg["stl"])
+        if hit:
+            tracing.current().set(cache="hit")
+            timings["total"] = time.perf_counter() - t0
+            record = {
+                "object": None,
+                "fcstd": cfg["fcstd"].replace("\\", "/") if cfg["fcstd"] else None,
+                "stl": cfg["stl"],
+                "cache": "hit",
+                "timings": {k: round(v, 6) for k, v in timings.items()},
+            }
+            return record, doc, None, None
+    doc, cube, result_obj = build_part(cfg, doc=doc)
+    timings["build"] = time.perf_counter() - t0
+
+    # FCStd is saved on this thread while STL is written from a shape snapshot in parallel
+    with tracing.span("load_helpers"):  # first job only: imports export_pipeline, stl_io, NumPy
+        exporter = _local_module("export_pipeline")
+        try:
+            tess_cache = _local_module("tessellation_cache").default_cache()
+        except Exception:
+            tess_cache = None  # no NumPy: the pipeline falls back to Mesh.export
+    manifest = exporter.export(result_obj, {"fcstd": cfg["fcstd"], "stl": cfg["stl"]}, doc=doc,
+                               linear_deflection=STL_LINEAR_DEFLECTION, angular_deflection=STL_ANGULAR_DEFLECTION,
+                               tessellation_cache=tess_cache, log=tracing.log)
+    formats = manifest["formats"]
+    for fmt, step in (("fcstd", "save_fcstd"), ("stl", "export_stl")):
+        if fmt in formats:
+            timings[step] = formats[fmt]["seconds"]
+    timings["export"] = manifest["total_seconds"]
+    if not manifest["ok"]:
+        errors = "; ".join(f"{fmt}: {r['error']}" for fmt, r in formats.items() if r["status"] == "error")
+        raise exporter.ExportError(f"export failed ({errors})", manifest)
+    fcstd_path = formats["fcstd"]["path"] if "fcstd" in formats else None
+    stl_path = formats["stl"]["path"] if "stl" in formats else None
+    record = {
+        "object": result_obj.Name,
+        "fcstd": fcstd_path,
+        "stl": stl_path,
+        "bytes": {fmt: r["bytes"] for fmt, r in formats.items()},
+    }
+    if cache is not None:
+        t = time.perf_counter()
+        with tracing.span("cache_store"):
+            cache.store(params, version, fcstd_path, stl_path)
+        timings["cache_store"] = time.perf_counter() - t
+        record["cache"] = "miss"
+    timings["total"] = time.perf_counter() - t0
+    record["timings"] = {k: round(v, 6) for k, v in timings.items()}
+    span = tracing.current()
+    if span:
+        span.set(object=result_obj.Name, cache=record.get("cache"),
+                 **{f"{fmt}_bytes": n for fmt, n in record["bytes"].items()})
+    return record, doc, cube, result_obj
+
+
+def run_batch(base_cfg):
+    """Run every job of base_cfg["jobs"] in this interpreter, sharing one document."""
+    jobs = load_jobs(base_cfg["jobs"])
+    manifest_path = base_cfg.get("manifest") or os.path.splitext(base_cfg["jobs"])[0] + ".manifest.jsonl"
+    folder = os.path.dirname(manifest_path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder, exist_ok=True)
+    tracing.log(f"[batch] {len(jobs)} job(s) from {base_cfg['jobs']}\n", jobs=len(jobs))
+    with tracing.span("new_document"):
+        doc = App.newDocument("CubeDoc")
+    cache = open_cache(base_cfg)
+    failed = 0
+    t_batch = time.perf_counter()
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+        for i, job in enumerate(jobs, start=1):
+            entry = {"index": i, "params": job}
+            t0 = time.perf_counter()
+            with tracing.span("job", index=i) as sp:
+                try:
+                    cfg = job_config(base_cfg, job, i)
+                    entry["params"] = {k: cfg[k] for k in JOB_KEYS if k not in ("fcstd", "stl")}
+                    record, doc, _cube, _result = run_job(cfg, doc=doc, cache=cache)
+                    entry.update(record)
+                    entry["status"] = "ok"
+                except Exception as e:
+                    failed += 1
+                    entry["status"] = "error"
+                    entry["error"] = str(e)
+                    entry["timings"] = {"total": round(time.perf_counter() - t0, 6)}
+                    App.Console.PrintError(f"[batch] job {i} failed: {e}\n")
+                finally:
+                    with tracing.span("reset_document"):
+                        reset_document(doc)
+                sp.set(status=entry["status"])
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+    App.closeDocument(doc.Name)
+    tracing.log(f"[batch] done: {len(jobs) - failed} ok, {failed} failed, "
+                f"{time.perf_counter() - t_batch:.3f} s; manifest: {manifest_path}\n", failed=failed)
+    if cache is not None:
+        tracing.log(f"[batch] cache: {cache.stats()}\n")
+        cache.close()
+    return 1 if failed else 0
+
+
+@tracing.traced("golden_check")
+def check_golden(cfg, stl_path):
+    """Compare stl_path with its reference in cfg["goldenDir"]; 1 if it fails, else 0."""
+    if not cfg.get("goldenDir") or not stl_path:
+        return 0
+    mesh_compare = _local_module("mesh_compare")
+    report = mesh_compare.check_golden(stl_path, cfg["goldenDir"], log=tracing.log)
+    if report is None:
+        tracing.log(f"[golden] no reference for {os.path.basename(stl_path)} in {cfg['goldenDir']}\n")
+        return 0
+    tracing.current().set(ok=report["ok"])
+    return 0 if report["ok"] else 1
+
+
+def base_config(argv=()):
+    """Defaults overridden by command-line flags and FC_* environment variables."""
+    return _apply_env(_parse_args(list(argv)))
+
+
+@tracing.traced("main")
+def main(argv):
+    if App is None:
+        sys.stderr.write("This script must be executed by FreeCAD or FreeCADCmd.\n")
+        sys.stderr.write(str(_IMPORT_ERROR) + "\n")
+        return 2
+    # marker to confirm script actually runs
+    try:
+        open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cube_ran.txt'), 'w').write('ran')
+    except Exception:
+        pass
+    with tracing.span("parse_args", argc=len(argv)):
+        cfg = base_config(argv)
+    tracing.log(f"[main] args: {cfg}\n")
+    if cfg.get("jobs"):
+        return run_batch(cfg)
 
     # Decide output paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if not cfg["fcstd"]:
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         cfg["fcstd"] = os.path.join(script_dir, f"cube-{timestamp}.FCStd")
-    fcstd_path = save_fcstd(doc, cfg["fcstd"]) if cfg["fcstd"] else None
-    if fcstd_path and not os.path.exists(fcstd_path.replace("/", "\\")):
-        App.Console.PrintError(f"[main] save failed or path not found: {fcstd_path}\n")
+    cache = open_cache(cfg)
+    try:
+        record, doc, cube, result_obj = run_job(cfg, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    fcstd_path = record["fcstd"]
+    stl_path = record["stl"]
 
-    stl_path = None
-    if cfg["stl"]:
-        stl_path = export_stl([result_obj], cfg["stl"])  # may raise
+    if result_obj is None:
+        App.Console.PrintMessage("Served from geometry cache:\n")
+        if fcstd_path:
+            App.Console.PrintMessage(f"  Saved  : {fcstd_path}\n")
+        if stl_path:
+            App.Console.PrintMessage(f"  STL    : {stl_path}\n")
+        return check_golden(cfg, stl_path)
 
     # Log summary
     App.Console.PrintMessage("Created cube:\n")
@@ -302,8 +774,10 @@ def main(argv):
         App.Console.PrintMessage(f"  STL    : {stl_path}\n")
     # If running in GUI, show final result and fit view now (after save so file has geometry either way)
     _gui_show_and_fit(doc, result_obj)
-    return 0
+    return check_golden(cfg, stl_path)
 
 
-if __name__ == "__main__" or ("FreeCAD" in sys.modules):
+# FreeCAD may exec this file under another __name__; only a plain import (e.g. by cube_farm) skips main()
+if __name__ == "__main__" or (__name__ != "create_cube" and "FreeCAD" in sys.modules):
+    tracing.start_from_env()  # FC_TRACE=1 / FC_TRACE=<file>.json
     sys.exit(main(sys.argv))
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+Run create_cube jobs on a pool of long-lived FreeCADCmd worker processes.
+
+Each worker imports FreeCAD/Part/Mesh (via create_cube) once and then builds
+parts from jobs sent over its stdin, so the FreeCAD start-up cost is paid once
+per worker instead of once per part. The scheduler itself is plain Python.
+
+Usage:
+  python cube_farm.py --jobs d:\\FreeCad\\jobs.csv --workers 4 --timeout 120 --retries 1
+      [--manifest d:\\FreeCad\\jobs.manifest.jsonl] [--freecadcmd <path>] [--log-dir <dir>]
+
+- The job file has the same format as create_cube.py --jobs (CSV or JSONL).
+- --timeout is per job; a job that exceeds it gets its worker killed and replaced.
+- A worker that crashes only loses the job it was running; that job is retried
+  up to --retries times on a fresh worker. Jobs that raise inside FreeCAD are
+  reported as errors and not retried (the same input would fail again).
+- FreeCADCmd is located via --freecadcmd, env FREECADCMD, or the usual install paths.
+  Any Python that can import FreeCAD works as well.
+- With --cacheDir (env FC_CACHE_DIR) jobs already in the geometry cache are served
+  by the scheduler without starting any worker; new results are added to it.
+"""
+from __future__ import annotations
+import json
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Prefix of protocol lines on the worker's stdout; FreeCAD console output is ignored.
+MARKER = '@@cube_farm@@ '
+WORKER_ENV = 'FC_FARM_WORKER'
+
+FREECADCMD_CANDIDATES = (
+    r'C:\Users\admin\scoop\apps\freecad\current\bin\freecadcmd.exe',
+    r'C:\Users\admin\scoop\shims\freecadcmd.exe',
+    r'C:\Program Files\FreeCAD 1.0\bin\FreeCADCmd.exe',
+    r'C:\Program Files\FreeCAD 0.21\bin\FreeCADCmd.exe',
+)
+
+
+def find_freecadcmd(explicit=None):
+    """Resolve the FreeCADCmd executable; returns None if nothing is found."""
+    for p in (explicit, os.environ.get('FREECADCMD')) + FREECADCMD_CANDIDATES:
+        if p and os.path.isfile(p):
+            return p
+    for name in ('freecadcmd', 'FreeCADCmd'):
+        found = shutil.which(name)
+        if found:
+            return found
+    return None
+
+
+# -------------------------- worker side (inside FreeCAD) --------------------------
+def _emit(obj):
+    out = sys.__stdout__
+    out.write(MARKER + json.dumps(obj, ensure_ascii=False) + '\n')
+    out.flush()
+
+
+def worker_main():
+    """Worker loop: one JSON job per stdin line, one protocol line per result."""
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    t0 = time.perf_counter()
+    import create_cube as cc
+    if cc.App is None:
+        _emit({'event': 'fatal', 'error': str(cc._IMPORT_ERROR)})
+        return 2
+    cc.tracing.start_from_env()  # FC_TRACE=trace-{pid}.json gives one trace file per worker
+    base = cc.base_config()
+    base['jobs'] = None
+    doc = cc.App.newDocument('FarmDoc')
+    version = cc.freecad_version()
+    _emit({'event': 'ready', 'pid': os.getpid(), 'freecad': version,
+           'startup': round(time.perf_counter() - t0, 6)})
+    for line in sys.__stdin__:
+        line = line.strip()
+        if not line:
+            continue
+        msg = json.loads(line)
+        if msg.get('op') == 'stop':
+            break
+        job_id = msg['id']
+        t = time.perf_counter()
+        with cc.tracing.span('job', id=job_id):
+            try:
+                cfg = cc.job_config(base, msg['params'], job_id)
+                record, doc, _cube, _result = cc.run_job(cfg, doc=doc)
+                out = {'event': 'result', 'id': job_id, 'status': 'ok', 'freecad': version}
+                out.update(record)
+            except Exception as e:
+                out = {'event': 'result', 'id': job_id, 'status': 'error', 'error': str(e),
+                       'timings': {'total': round(time.perf_counter() - t, 6)}}
+            finally:
+                cc.reset_document(doc)
+        _emit(out)
+    cc.App.closeDocument(doc.Name)
+    return 0
+
+
+# -------------------------- scheduler side (plain Python) --------------------------
+class WorkerError(RuntimeError):
+    pass
+
+
+class _Worker:
+    """One FreeCADCmd process plus a reader thread that collects its protocol lines."""
+
+    def __init__(self, cmd, slot, startup_timeout, log_dir=None):
+        self.slot = slot
+        env = dict(os.environ)
+        env[WORKER_ENV] = '1'
+        env.pop('FC_JOBS', None)
+        self._log = None
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            self._log = open(os.path.join(log_dir, f'worker-{slot}.log'), 'a', encoding='utf-8')
+        try:
+            self.proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=self._log or subprocess.DEVNULL, env=env, cwd=HERE,
+                text=True, encoding='utf-8', errors='replace', bufsize=1)
+        except OSError:
+            self._close_log()
+            raise
+        self.messages = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+        t0 = time.perf_counter()
+        try:
+            msg = self._next(startup_timeout)
+        except TimeoutError:
+            self.kill()
+            raise WorkerError(f'worker {slot} did not start within {startup_timeout:.0f} s') from None
+        if not msg or msg.get('event') != 'ready':
+            self.kill()
+            raise WorkerError(f"worker {slot} failed to start: {msg.get('error') if msg else 'exited'}")
+        self.pid = msg.get('pid')
+        self.startup = time.perf_counter() - t0
+
+    def _read(self):
+        for line in self.proc.stdout:
+            if line.startswith(MARKER):
+                self.messages.put(json.loads(line[len(MARKER):]))
+            elif self._log:
+                try:
+                    self._log.write(line)
+                except (AttributeError, ValueError):
+                    pass  # log closed by kill() while the process was still writing
+        self.messages.put(None)  # EOF: the process is gone
+
+    def _next(self, timeout):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError
+
+    def run(self, job_id, params, timeout):
+        """Send one job and wait for its result; None means the worker died."""
+        self.proc.stdin.write(json.dumps({'id': job_id, 'params': params}) + '\n')
+        self.proc.stdin.flush()
+        deadline = time.monotonic() + timeout
+        while True:
+            msg = self._next(max(0.0, deadline - time.monotonic()))
+            if msg is None or (msg.get('event') == 'result' and msg.get('id') == job_id):
+                return msg
+
+    def stop(self, grace=10.0):
+        try:
+            self.proc.stdin.write(json.dumps({'op': 'stop'}) + '\n')
+            self.proc.stdin.close()
+            self.proc.wait(timeout=grace)
+        except Exception:
+            self.kill()
+        self._close_log()
+
+    def kill(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=5)
+        except Exception:
+            pass
+        self._close_log()
+
+    def _close_log(self):
+        if self._log:
+            self._log.close()
+            self._log = None
+
+
+class CubeFarm:
+    """Schedule jobs over N warm workers with per-job timeout, retry and crash isolation."""
+
+    def __init__(self, workers=2, freecadcmd=None, timeout=120.0, retries=1,
+                 startup_timeout=180.0, log_dir=None):
+        exe = find_freecadcmd(freecadcmd)
+        if exe is None:
+            raise WorkerError('FreeCADCmd not found; pass --freecadcmd or set FREECADCMD')
+        self.cmd = [exe, os.path.join(HERE, 'cube_farm.py')]
+        self.workers = max(1, int(workers))
+        self.timeout = float(timeout)
+        self.retries = max(0, int(retries))
+        self.startup_timeout = float(startup_timeout)
+        self.log_dir = log_dir
+        self.stats = {'spawned': 0, 'startup_s': 0.0, 'timeouts': 0, 'crashes': 0, 'retries': 0}
+        self._lock = threading.Lock()
+
+    def _spawn(self, slot):
+        w = _Worker(self.cmd, slot, self.startup_timeout, self.log_dir)
+        with self._lock:
+            self.stats['spawned'] += 1
+            self.stats['startup_s'] += w.startup
+        return w
+
+    def run(self, jobs, on_result=None):
+        """Run all jobs (list of parameter dicts); returns results ordered by job id (1-based)."""
+        total = len(jobs)
+        if total == 0:
+            return []
+        pending = queue.Queue()
+        for i, params in enumerate(jobs, start=1):
+            pending.put((i, params, 1))
+        results = {}
+        done = threading.Event()
+
+        def finish(rec):
+            with self._lock:
+                results[rec['id']] = rec
+                if on_result:
+                    on_result(rec)
+                if len(results) == total:
+                    done.set()
+
+        def loop(slot):
+            worker = None
+            while not done.is_set():
+                try:
+                    job_id, params, attempt = pending.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                t0 = time.perf_counter()
+                failure = None
+                try:
+                    if worker is None:
+                        worker = self._spawn(slot)
+                    msg = worker.run(job_id, params, self.timeout)
+                    if msg is None:
+                        failure = 'crashed'
+                except TimeoutError:
+                    failure = 'timeout'
+                except (OSError, ValueError, WorkerError) as e:
+                    failure = f'worker error: {e}'
+                if failure is None:
+                    msg.pop('event', None)
+                    msg.update(params=params, attempts=attempt, worker=slot, pid=worker.pid)
+                    finish(msg)
+                    continue
+                with self._lock:
+                    key = {'timeout': 'timeouts', 'crashed': 'crashes'}.get(failure)
+                    if key:
+                        self.stats[key] += 1
+                if worker is not None:
+                    worker.kill()
+                    worker = None
+                if attempt <= self.retries:
+                    with self._lock:
+                        self.stats['retries'] += 1
+                    pending.put((job_id, params, attempt + 1))
+                else:
+                    finish({'id': job_id, 'status': failure, 'params': params, 'attempts': attempt,
+                            'worker': slot, 'timings': {'total': round(time.perf_counter() - t0, 6)}})
+            if worker is not None:
+                worker.stop()
+
+        threads = [threading.Thread(target=loop, args=(slot,), daemon=True)
+                   for slot in range(min(self.workers, total))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return [results[i] for i in range(1, total + 1)]
+
+
+def _parse(argv):
+    cfg = {'jobs': os.environ.get('FC_JOBS'), 'manifest': os.environ.get('FC_MANIFEST'),
+           'workers': os.cpu_count() or 2, 'timeout': 120.0, 'retries': 1,
+           'freecadcmd': None, 'log-dir': None,
+           'cacheDir': os.environ.get('FC_CACHE_DIR'), 'cacheMaxMB': os.environ.get('FC_CACHE_MAX_MB') or 1024.0}
+    i = 1
+    while i < len(argv):
+        a = argv[i]
+        key = a.lstrip('-')
+        if key in cfg and i + 1 < len(argv):
+            v = argv[i + 1]
+            if key == 'workers' or key == 'retries':
+                v = int(v)
+            elif key in ('timeout', 'cacheMaxMB'):
+                v = float(v)
+            cfg[key] = v
+            i += 2
+            continue
+        i += 1
+    if not cfg['jobs']:
+        raise SystemExit('Provide --jobs <file.csv|file.jsonl> or set FC_JOBS env')
+    return cfg
+
+
+def main(argv):
+    cfg = _parse(argv)
+    sys.path.insert(0, HERE)
+    import create_cube as cc
+    jobs = cc.load_jobs(cfg['jobs'])
+    manifest_path = cfg['manifest'] or os.path.splitext(cfg['jobs'])[0] + '.manifest.jsonl'
+    farm = CubeFarm(workers=cfg['workers'], freecadcmd=cfg['freecadcmd'], timeout=cfg['timeout'],
+                    retries=cfg['retries'], log_dir=cfg['log-dir'])
+    # resolve defaults (output names) here so cached and built jobs agree on their paths
+    base = cc.base_config()
+    base['jobs'] = None
+    resolved = [cc.job_config(base, params, i) for i, params in enumerate(jobs, start=1)]
+    cache = version = version_key = None
+    if cfg['cacheDir']:
+        from geometry_cache import GeometryCache, executable_fingerprint
+        cache = GeometryCache(cfg['cacheDir'], max_bytes=int(float(cfg['cacheMaxMB']) * (1 << 20)))
+        # the FreeCAD version is only known once a worker reports it; remember it per executable
+        version_key = 'freecad:' + executable_fingerprint(farm.cmd[0])
+        version = cache.get_meta(version_key)
+    print(f"[cube_farm] {len(jobs)} job(s), {min(farm.workers, len(jobs))} worker(s): {farm.cmd[0]}")
+    t0 = time.perf_counter()
+    results = []
+    with open(manifest_path, 'w', encoding='utf-8') as manifest:
+        def _write(rec):
+            manifest.write(json.dumps(rec, ensure_ascii=False) + '\n')
+            manifest.flush()
+
+        todo = []
+        for i, job_cfg in enumerate(resolved, start=1):
+            params = {k: job_cfg[k] for k in cc.JOB_KEYS}
+            t = time.perf_counter()
+            if version and cache.fetch(cc.canonical_params(job_cfg), version, job_cfg['fcstd'], job_cfg['stl']):
+                rec = {'id': i, 'status': 'ok', 'cache': 'hit', 'fcstd': job_cfg['fcstd'], 'stl': job_cfg['stl'],
+                       'freecad': version, 'params': params,
+                       'timings': {'total': round(time.perf_counter() - t, 6)}}
+                results.append(rec)
+                _write(rec)
+            else:
+                todo.append((i, job_cfg, params))
+
+        def _built(rec):
+            i, job_cfg, _params = todo[rec['id'] - 1]
+            rec['id'] = i
+            if cache is not None and rec.get('status') == 'ok':
+                cache.store(cc.canonical_params(job_cfg), rec['freecad'], rec.get('fcstd'), rec.get('stl'))
+                cache.set_meta(version_key, rec['freecad'])
+                rec['cache'] = 'miss'
+            _write(rec)
+
+        results += farm.run([params for _i, _cfg, params in todo], on_result=_built)
+    wall = time.perf_counter() - t0
+    ok = sum(1 for r in results if r.get('status') == 'ok')
+    st = farm.stats
+    print(f"[cube_farm] done: {ok} ok, {len(results) - ok} failed in {wall:.3f} s "
+          f"({len(results) / wall if wall > 0 else 0.0:.2f} jobs/s)")
+    print(f"[cube_farm] workers spawned={st['spawned']} startup={st['startup_s']:.3f} s "
+          f"timeouts={st['timeouts']} crashes={st['crashes']} retries={st['retries']}")
+    if cache is not None:
+        print(f"[cube_farm] cache: {cache.stats()}")
+        cache.close()
+    print(f"[cube_farm] manifest: {manifest_path}")
+    return 0 if ok == len(results) else 1
+
+if os.environ.get(WORKER_ENV) and __name__ != 'cube_farm':
+    sys.exit(worker_main())
+elif __name__ == '__main__':
+    sys.exit(main(sys.argv))
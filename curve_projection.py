@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Batch projection of curves (engraving paths, trim lines, ...) onto one target shape.
+
+Each wire is projected along a direction with target.makeParallelProjection;
+the results come back as one compound plus per-curve timings:
+
+  import curve_projection
+  result = curve_projection.project(wires, sphere.Shape, direction=(0, 0, -1))
+  Part.show(result.compound)
+  result.items[0]     # {'index': 0, 'ok': True, 'cached': False, 'seconds': 0.012, 'edges': 2}
+  print(result.summary())
+
+Work is spread over a process pool (mode='process', the default). The target
+shape is sent to each worker once, as BREP text, when the worker starts;
+tasks carry only the wire BREP and are submitted in chunks. Worker processes
+need a Python interpreter that can import Part (FreeCAD built as a Python
+module); under FreeCADCmd, or when the workers cannot import Part, project()
+falls back to a thread pool, and mode='serial' projects one after another.
+
+Results are cached by (wire hash, target hash, direction): SHA-256 of the BREP
+texts and the rounded direction. The default cache keeps projected wires in
+memory for the session; set FC_PROJ_CACHE to a folder to also keep them on
+disk (.brep) between processes. Repeating a batch with a few changed curves
+only projects the changed ones.
+"""
+from __future__ import annotations
+import concurrent.futures as cf
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+
+import process_pool
+
+PROJ_CACHE_ENV = 'FC_PROJ_CACHE'
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_DIRECTION = (0.0, 0.0, -1.0)
+
+
+def _direction(direction):
+    if hasattr(direction, 'x'):
+        return (float(direction.x), float(direction.y), float(direction.z))
+    d = tuple(float(c) for c in direction)
+    if len(d) != 3:
+        raise ValueError(f'direction must have 3 components, got {direction!r}')
+    return d
+
+
+def projection_key(wire_key: str, target_key: str, direction) -> str:
+    """Cache key of one projection; wire_key/target_key are SHA-256 digests of the BREP texts."""
+    d = ','.join('%.9g' % c for c in _direction(direction))
+    return hashlib.sha256(f'{wire_key}|{target_key}|{d}'.encode('ascii')).hexdigest()
+
+
+class ProjectionCache:
+    """In-memory LRU of projected shapes (as BREP text), optionally backed by .brep files in root."""
+
+    def __init__(self, root=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.root = root
+        self.max_entries = max(1, int(max_entries))
+        if root:
+            os.makedirs(root, exist_ok=True)
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.root, key[:2], key + '.brep')
+
+    def get(self, key):
+        """Cached BREP text for key, or None."""
+        with self._lock:
+            found = self._entries.get(key)
+            if found is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return found
+        if self.root:
+            try:
+                with open(self._file(key), encoding='utf-8') as f:
+                    found = f.read()
+            except OSError:
+                found = None
+            if found is not None:
+                self._remember(key, found)
+                with self._lock:
+                    self.hits += 1
+                return found
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, brep: str):
+        self._remember(key, brep)
+        if self.root:
+            path = self._file(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(brep)
+                os.replace(tmp, path)
+            except OSError:
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+
+    def _remember(self, key, brep):
+        with self._lock:
+            self._entries[key] = brep
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+_DEFAULT = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> ProjectionCache:
+    """Process-wide cache (disk-backed when FC_PROJ_CACHE is set)."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = ProjectionCache(os.environ.get(PROJ_CACHE_ENV) or None)
+        return _DEFAULT
+
+
+# -------------------------- projection --------------------------
+def _project_shape(target, wire, direction):
+    import FreeCAD  # type: ignore
+    return target.makeParallelProjection(wire, FreeCAD.Vector(*direction))
+
+
+_worker_target = None
+
+
+def _init_worker(target_brep):
+    """Process-pool initializer: rebuild the target once per worker."""
+    global _worker_target
+    import Part  # type: ignore
+    _worker_target = Part.Shape()
+    _worker_target.importBrepFromString(target_brep)
+
+
+def _project_chunk(tasks, direction):
+    """Process-pool entry point: [(index, wire BREP)] -> [(index, result BREP, seconds, error)]."""
+    import Part  # type: ignore
+    out = []
+    for index, wire_brep in tasks:
+        t0 = time.perf_counter()
+        try:
+            wire = Part.Shape()
+            wire.importBrepFromString(wire_brep)
+            shape = _project_shape(_worker_target, wire, direction)
+            out.append((index, shape.exportBrepToString(), time.perf_counter() - t0, None))
+        except Exception as e:
+            out.append((index, None, time.perf_counter() - t0, f'{type(e).__name__}: {e}'))
+    return out
+
+
+def _shape_from_brep(brep):
+    import Part  # type: ignore
+    shape = Part.Shape()
+    shape.importBrepFromString(brep)
+    return shape
+
+
+def _edge_count(shape):
+    try:
+        return len(shape.Edges)
+    except Exception:
+        return 0
+
+
+class ProjectionResult:
+    """Projected shapes in input order, their compound and per-curve records."""
+
+    def __init__(self, shapes, items, mode, seconds, cache_stats):
+        self.shapes = shapes  # None where a projection failed
+        self.items = items
+        self.mode = mode
+        self.seconds = seconds
+        self.cache_stats = cache_stats
+        self._compound = None
+
+    @property
+    def compound(self):
+        """Part.Compound of every successful projection (built on first use)."""
+        if self._compound is None:
+            import Part  # type: ignore
+            self._compound = Part.makeCompound([s for s in self.shapes if s is not None])
+        return self._compound
+
+    @property
+    def ok(self) -> bool:
+        return all(item['ok'] for item in self.items)
+
+    @property
+    def failed(self):
+        return [item for item in self.items if not item['ok']]
+
+    def summary(self) -> str:
+        done = sum(1 for i in self.items if i['ok'])
+        cached = sum(1 for i in self.items if i['cached'])
+        work = sum(i['seconds'] for i in self.items if not i['cached'])
+        return ('%d/%d curves projected (%d from cache, %d failed) in %.3f s, %s mode, %.3f s of projection work'
+                % (done, len(self.items), cached, len(self.items) - done, self.seconds, self.mode, work))
+
+
+def project(wires, target, direction=DEFAULT_DIRECTION, mode='process', workers=None, cache=None,
+            chunk_size=None, log=None) -> ProjectionResult:
+    """Project every wire (Part.Wire/Edge/Shape) onto target along direction.
+
+    cache defaults to default_cache(); pass cache=False to disable caching. Failed curves
+    keep their error in items[i]['error'] and are left out of the compound.
+    """
+    if mode not in ('process', 'thread', 'serial'):
+        raise ValueError(f"mode must be 'process', 'thread' or 'serial', not {mode!r}")
+    t_start = time.perf_counter()
+    direction = _direction(direction)
+    if cache is None:
+        cache = default_cache()
+    wires = list(wires)
+    target_brep = target.exportBrepToString()
+    target_key = hashlib.sha256(target_brep.encode('utf-8')).hexdigest()
+    shapes = [None] * len(wires)
+    items = [None] * len(wires)
+    pending = []  # (index, wire BREP, cache key)
+    for i, wire in enumerate(wires):
+        t0 = time.perf_counter()
+        brep = wire.exportBrepToString()
+        key = projection_key(hashlib.sha256(brep.encode('utf-8')).hexdigest(), target_key, direction)
+        found = cache.get(key) if cache else None
+        if found is not None:
+            shapes[i] = _shape_from_brep(found)
+            items[i] = {'index': i, 'ok': True, 'cached': True, 'seconds': time.perf_counter() - t0,
+                        'edges': _edge_count(shapes[i])}
+        else:
+            pending.append((i, brep, key))
+
+    def finish(index, result_brep, seconds, error, shape=None):
+        key = keys[index]
+        if error is None:
+            try:
+                shape = shape if shape is not None else _shape_from_brep(result_brep)
+                if cache:
+                    cache.put(key, result_brep if result_brep is not None else shape.exportBrepToString())
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+        item = {'index': index, 'ok': error is None, 'cached': False, 'seconds': seconds}
+        if error is None:
+            shapes[index] = shape
+            item['edges'] = _edge_count(shape)
+        else:
+            item['error'] = error
+        items[index] = item
+        if log:
+            log(f"[curve_projection] curve {index}: {'ok' if error is None else error} ({seconds * 1e3:.1f} ms)\n")
+
+    keys = {i: key for i, _brep, key in pending}
+
+    def run_local(index):
+        t0 = time.perf_counter()
+        try:
+            shape = _project_shape(target, wires[index], direction)
+            finish(index, None, time.perf_counter() - t0, None, shape)
+        except Exception as e:
+            finish(index, None, time.perf_counter() - t0, f'{type(e).__name__}: {e}')
+
+    if mode == 'process' and not process_pool.usable():
+        mode = 'thread'
+    if len(pending) <= 1 and mode != 'serial':
+        mode = 'serial'
+    if mode == 'serial':
+        for i, _brep, _key in pending:
+            run_local(i)
+    elif mode == 'process':
+        workers = workers or min(len(pending), os.cpu_count() or 1)
+        size = chunk_size or max(1, len(pending) // (workers * 4))
+        chunks = [[(i, brep) for i, brep, _key in pending[s:s + size]] for s in range(0, len(pending), size)]
+        try:
+            with process_pool.executor(workers, initializer=_init_worker, initargs=(target_brep,)) as pool:
+                futures = [pool.submit(_project_chunk, chunk, direction) for chunk in chunks]
+                for future in cf.as_completed(futures):
+                    for index, result_brep, seconds, error in future.result():
+                        finish(index, result_brep, seconds, error)
+        except (BrokenProcessPool, ImportError, OSError):
+            # no FreeCAD in the worker processes: project the rest here
+            mode = 'thread'
+        if mode == 'thread':
+            remaining = [i for i, _brep, _key in pending if items[i] is None]
+            with cf.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='projection') as pool:
+                list(pool.map(run_local, remaining))
+    else:
+        with cf.ThreadPoolExecutor(max_workers=workers or min(len(pending), os.cpu_count() or 1),
+                                   thread_name_prefix='projection') as pool:
+            list(pool.map(run_local, [i for i, _brep, _key in pending]))
+    stats = cache.stats() if cache else {}
+    return ProjectionResult(shapes, items, mode, time.perf_counter() - t_start, stats)
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Dependency graph of a FreeCAD document and final-body detection, shared by
+the ShowBodyFit, SaveExportFit and ToggleBaseVisibility macros.
+
+A "final" object is a shape-bearing object that no other shape-bearing
+object consumes through one of the link properties the macros always
+checked (Base/Tool/First/Second, Objects/Shapes/Group/Links). Other OutList
+edges (a sketch's AttachmentSupport, datum attachments, expression
+references) do not consume their target, so a sketch attached to a face of
+the final body leaves that body final. The graph is built once per document
+(O(V+E)).
+
+  import doc_graph
+  g = doc_graph.graph(App.ActiveDocument)     # cached per document
+  g.final_body()      # last final object, else the candidate with the largest bbox
+  g.finals            # every final object, in document order
+  g.candidates        # every object with a non-null Shape
+
+Graphs are cached per document and dropped by a document observer when an
+object is created or deleted or a link/shape property changes; visibility,
+label and other view-only changes keep the cache. invalidate() drops it by
+hand. stats() returns builds, cache hits and invalidations.
+"""
+from __future__ import annotations
+import threading
+
+# link properties through which an object consumes another
+_LINK_ATTRS = ('Base', 'Tool', 'First', 'Second')
+_LIST_ATTRS = ('Objects', 'Shapes', 'Group', 'Links')
+# property changes that cannot alter the graph or the candidates' shapes
+_IGNORED_PROPS = frozenset(('Visibility', 'Label', 'Label2',
+                            'ShapeColor', 'LineColor', 'PointColor', 'Transparency', 'DisplayMode'))
+
+_lock = threading.RLock()
+_graphs = {}
+_stats = {'builds': 0, 'hits': 0, 'invalidations': 0}
+_observer = None
+
+
+def _has_shape(obj):
+    try:
+        shape = obj.Shape
+    except Exception:
+        return False
+    try:
+        return shape is not None and not shape.isNull()
+    except Exception:
+        return False
+
+
+def _is_2d(obj):
+    """Sketches and other Part2DObjects: final, but never preferred as the final body."""
+    try:
+        return bool(obj.isDerivedFrom('Part::Part2DObject'))
+    except Exception:
+        return False
+
+
+def _consumed(obj):
+    refs = []
+    for attr in _LINK_ATTRS:
+        ref = getattr(obj, attr, None)
+        if ref is not None and hasattr(ref, 'Name'):
+            refs.append(ref)
+    for attr in _LIST_ATTRS:
+        try:
+            items = getattr(obj, attr, None) or []
+            refs.extend(it for it in items if it is not None and hasattr(it, 'Name'))
+        except Exception:
+            pass
+    return refs
+
+
+class DocGraph:
+    """Consumer relations between the objects of one document (built once)."""
+
+    def __init__(self, doc):
+        self.doc_name = getattr(doc, 'Name', None)
+        objects = list(doc.Objects)
+        self.objects = objects
+        self.candidates = [o for o in objects if _has_shape(o)]
+        # name -> names of the shape-bearing objects consuming it
+        consumers = {}
+        for o in objects:
+            # only shape-bearing consumers make an object intermediate (a TechDraw view of the
+            # final body or a spreadsheet does not)
+            if not hasattr(o, 'Shape'):
+                continue
+            for dep in _consumed(o):
+                name = getattr(dep, 'Name', None)
+                if name is not None and name != o.Name:
+                    consumers.setdefault(name, []).append(o.Name)
+        self.consumers = consumers
+        self.finals = [o for o in self.candidates if o.Name not in consumers]
+        self._diag = {}
+
+    def is_final(self, obj) -> bool:
+        return obj.Name not in self.consumers and _has_shape(obj)
+
+    def diagonal(self, obj) -> float:
+        """Bounding-box diagonal of obj's shape (cached with the graph)."""
+        found = self._diag.get(obj.Name)
+        if found is None:
+            try:
+                found = float(obj.Shape.BoundBox.DiagonalLength)
+            except Exception:
+                found = 0.0
+            self._diag[obj.Name] = found
+        return found
+
+    def final_body(self):
+        """The last final object (sketches only when nothing else is final); without finals the
+        candidate with the largest bounding box; or None."""
+        if self.finals:
+            solids = [o for o in self.finals if not _is_2d(o)]
+            return (solids or self.finals)[-1]
+        if self.candidates:
+            return max(self.candidates, key=self.diagonal)
+        return None
+
+    def intermediates(self):
+        """Objects that are not final (what ToggleBaseVisibility toggles)."""
+        finals = {o.Name for o in (self.finals or self.candidates)}
+        return [o for o in self.objects if o.Name not in finals]
+
+
+# -------------------------- cache + observer --------------------------
+class _Observer:
+    """Document observer that drops cached graphs when the structure of a document changes."""
+
+    def slotCreatedObject(self, obj):
+        invalidate(getattr(obj, 'Document', None))
+
+    def slotDeletedObject(self, obj):
+        invalidate(getattr(obj, 'Document', None))
+
+    def slotChangedObject(self, obj, prop):
+        if prop in _IGNORED_PROPS:
+            return
+        invalidate(getattr(obj, 'Document', None))
+
+    def slotDeletedDocument(self, doc):
+        invalidate(doc)
+
+
+def _ensure_observer():
+    global _observer
+    if _observer is not None:
+        return
+    try:
+        import FreeCAD as App  # type: ignore
+        obs = _Observer()
+        App.addDocumentObserver(obs)
+        _observer = obs
+    except Exception:
+        _observer = False  # no observer support: callers must invalidate() themselves
+
+
+def invalidate(doc=None):
+    """Drop the cached graph of doc (or of every document)."""
+    with _lock:
+        if doc is None:
+            dropped = len(_graphs)
+            _graphs.clear()
+        else:
+            dropped = 1 if _graphs.pop(getattr(doc, 'Name', None), None) is not None else 0
+        _stats['invalidations'] += dropped
+
+
+def graph(doc) -> DocGraph:
+    """Cached DocGraph of doc (rebuilt after an invalidating change)."""
+    _ensure_observer()
+    name = getattr(doc, 'Name', None)
+    with _lock:
+        found = _graphs.get(name)
+        if found is not None and _observer:
+            _stats['hits'] += 1
+            return found
+    built = DocGraph(doc)
+    with _lock:
+        _graphs[name] = built
+        _stats['builds'] += 1
+    return built
+
+
+def final_body(doc):
+    return graph(doc).final_body()
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_stats, cached=len(_graphs))
@@ -0,0 +1,534 @@
+# -*- coding: utf-8 -*-
+"""
+Rule-based edge selection and bulk fillet/chamfer.
+
+FilletEdges / ChamferEdges work on hand-picked edges of one object. This
+module selects edges by rule across many bodies and creates one Part::Fillet
+(or Part::Chamfer) per body, followed by a single recompute:
+
+  import edge_rules
+  rule = edge_rules.parse('length<5; parallel=z')        # or build it in Python:
+  rule = edge_rules.length_below(5) & edge_rules.parallel_to((0, 0, 1), tol_deg=1)
+  result = edge_rules.bulk(doc, rule, kind='fillet', size=0.5)   # bodies: the document's final bodies
+  print(result['summary'])
+
+Rules: length_below(x), length_between(a, b), parallel_to(direction, tol_deg),
+inside_box(xmin, ymin, zmin, xmax, ymax, zmax), combined with & and |.
+parse() reads the same as text: "length<5", "length=2..8", "parallel=z" (or
+"parallel=1,0,0"), "angle=2" (tolerance for parallel), "box=x0,y0,z0,x1,y1,z1";
+clauses separated by ';' are AND-ed.
+
+Selection does not test every edge. EdgeIndex(shape) is built once per shape
+(cached by Shape.hashCode(), so a recompute that changes the shape rebuilds
+it) and holds the edge lengths sorted for bisection, straight edges grouped by
+direction, and the edge midpoints in a uniform grid; each rule reads only the
+part of the index it needs. & looks up its most selective rule (estimated
+from the index) and tests only those edges against the other rules.
+
+Headless (FreeCADCmd), configured through the environment because FreeCADCmd
+intercepts command line arguments:
+
+  FC_EDGE_FILE=part.FCStd FC_EDGE_RULES="length<5" FC_EDGE_KIND=chamfer FC_EDGE_SIZE=0.5 \\
+      FreeCADCmd edge_rules.py
+  # FC_EDGE_OUT=<path> (default: <file>_<kind>.FCStd), FC_EDGE_OBJECTS=Name1,Name2 (default: final bodies)
+"""
+from __future__ import annotations
+import bisect
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+KINDS = {'fillet': 'Part::Fillet', 'chamfer': 'Part::Chamfer'}
+AXES = {'x': (1.0, 0.0, 0.0), 'y': (0.0, 1.0, 0.0), 'z': (0.0, 0.0, 1.0)}
+DEFAULT_TOL_DEG = 1.0
+_DIR_DIGITS = 3  # direction buckets: unit vectors rounded to 3 decimals
+
+_lock = threading.Lock()
+_indexes = OrderedDict()
+_MAX_INDEXES = 64
+_stats = {'builds': 0, 'hits': 0}
+
+
+def _vec(p):
+    return (float(p.x), float(p.y), float(p.z)) if hasattr(p, 'x') else tuple(float(c) for c in p)
+
+
+def _unit(v):
+    n = math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+    if n <= 1e-12:
+        return None
+    v = (v[0] / n, v[1] / n, v[2] / n)
+    # canonical sign: a direction and its reverse are the same line direction
+    for c in v:
+        if abs(c) > 1e-9:
+            return v if c > 0 else (-v[0], -v[1], -v[2])
+    return v
+
+
+def _is_line(edge):
+    try:
+        return type(edge.Curve).__name__ in ('Line', 'LineSegment')
+    except Exception:
+        return False
+
+
+# -------------------------- index --------------------------
+class EdgeIndex:
+    """Per-shape edge data (1-based edge numbers as in 'Edge<n>') with length, direction and grid lookups."""
+
+    def __init__(self, shape):
+        t0 = time.perf_counter()
+        edges = list(shape.Edges)
+        self.count = len(edges)
+        self.lengths = []
+        self.midpoints = []
+        self.bounds = []  # (xmin, ymin, zmin, xmax, ymax, zmax)
+        self.directions = {}  # rounded unit direction -> [edge numbers] (straight edges only)
+        self.edge_directions = {}  # edge number -> exact unit direction
+        for i, e in enumerate(edges, 1):
+            self.lengths.append(float(e.Length))
+            try:
+                mid = _vec(e.valueAt(0.5 * (e.FirstParameter + e.LastParameter)))
+            except Exception:
+                mid = _vec(e.CenterOfMass)
+            self.midpoints.append(mid)
+            bb = e.BoundBox
+            self.bounds.append((bb.XMin, bb.YMin, bb.ZMin, bb.XMax, bb.YMax, bb.ZMax))
+            if _is_line(e):
+                d = _unit(tuple(b - a for a, b in zip(_vec(e.Vertexes[0].Point), _vec(e.Vertexes[-1].Point))))
+                if d is not None:
+                    self.edge_directions[i] = d
+                    key = tuple(round(c, _DIR_DIGITS) + 0.0 for c in d)
+                    self.directions.setdefault(key, []).append(i)
+        order = sorted(range(self.count), key=self.lengths.__getitem__)
+        self._by_length = [i + 1 for i in order]
+        self._sorted_lengths = [self.lengths[i] for i in order]
+        self._build_grid()
+        self.build_seconds = time.perf_counter() - t0
+
+    def _build_grid(self):
+        self.grid = {}
+        if not self.count:
+            self.origin, self.cell = (0.0, 0.0, 0.0), 1.0
+            return
+        lo = tuple(min(m[k] for m in self.midpoints) for k in range(3))
+        hi = tuple(max(m[k] for m in self.midpoints) for k in range(3))
+        extent = max(hi[k] - lo[k] for k in range(3))
+        # about n^(1/3) cells along the largest extent: roughly one midpoint per occupied cell
+        self.cell = max(extent / max(1.0, round(self.count ** (1.0 / 3.0))), 1e-6)
+        self.origin = lo
+        for i, m in enumerate(self.midpoints, 1):
+            self.grid.setdefault(self._cell_of(m), []).append(i)
+
+    def _cell_of(self, p):
+        return tuple(int(math.floor((p[k] - self.origin[k]) / self.cell)) for k in range(3))
+
+    # ---- queries (each returns a set of edge numbers) ----
+    def by_length(self, lo=None, hi=None, inclusive=False):
+        """Edges with lo <= length < hi (hi inclusive when inclusive=True)."""
+        a = 0 if lo is None else bisect.bisect_left(self._sorted_lengths, lo)
+        if hi is None:
+            b = self.count
+        else:
+            b = (bisect.bisect_right if inclusive else bisect.bisect_left)(self._sorted_lengths, hi)
+        return set(self._by_length[a:b])
+
+    def parallel(self, direction, tol_deg=DEFAULT_TOL_DEG):
+        """Straight edges within tol_deg of direction (either sense)."""
+        d = _unit(_vec(direction))
+        if d is None:
+            return set()
+        cos_tol = math.cos(math.radians(tol_deg))
+        out = set()
+        # bucket keys are rounded, so allow for the rounding error on top of the tolerance
+        slack = 0.5 * 10 ** -_DIR_DIGITS * math.sqrt(3)
+        for key, numbers in self.directions.items():
+            if abs(key[0] * d[0] + key[1] * d[1] + key[2] * d[2]) + slack >= cos_tol:
+                out.update(n for n in numbers if self._parallel_exact(n, d, cos_tol))
+        return out
+
+    def _parallel_exact(self, n, d, cos_tol):
+        u = self.edge_directions.get(n)
+        return u is not None and abs(u[0] * d[0] + u[1] * d[1] + u[2] * d[2]) >= cos_tol
+
+    def count_length(self, lo=None, hi=None, inclusive=False):
+        a = 0 if lo is None else bisect.bisect_left(self._sorted_lengths, lo)
+        if hi is None:
+            return self.count - a
+        return (bisect.bisect_right if inclusive else bisect.bisect_left)(self._sorted_lengths, hi) - a
+
+    def inside(self, n, box, eps=1e-7):
+        b = self.bounds[n - 1]
+        return all(box[k] - eps <= b[k] and b[k + 3] <= box[k + 3] + eps for k in range(3))
+
+    def in_box(self, box):
+        """Edges whose bounding box lies inside box = (xmin, ymin, zmin, xmax, ymax, zmax)."""
+        if not self.count:
+            return set()
+        c0 = self._cell_of(box[:3])
+        c1 = self._cell_of(box[3:])
+        span = 1
+        for k in range(3):
+            span *= max(0, c1[k] - c0[k] + 1)
+        if span <= len(self.grid):
+            cells = ((i, j, k) for i in range(c0[0], c1[0] + 1)
+                     for j in range(c0[1], c1[1] + 1) for k in range(c0[2], c1[2] + 1))
+        else:
+            cells = (c for c in self.grid if all(c0[k] <= c[k] <= c1[k] for k in range(3)))
+        out = set()
+        for cell in cells:
+            out.update(n for n in self.grid.get(cell, ()) if self.inside(n, box))
+        return out
+
+    def count_box(self, box):
+        """Rough number of edges in box (uniform density over the midpoint extent)."""
+        if not self.count:
+            return 0
+        fraction = 1.0
+        for k in range(3):
+            lo, hi = self.origin[k], self.origin[k] + self.cell * (1 + max(c[k] for c in self.grid))
+            overlap = max(0.0, min(hi, box[k + 3]) - max(lo, box[k]))
+            fraction *= min(1.0, overlap / (hi - lo)) if hi > lo else 1.0
+        return int(self.count * fraction) + 1
+
+
+def _shape_key(obj, shape):
+    try:
+        return (getattr(getattr(obj, 'Document', None), 'Name', None), obj.Name, shape.hashCode())
+    except Exception:
+        return None
+
+
+def index(obj) -> EdgeIndex:
+    """EdgeIndex of obj.Shape, cached until the shape changes."""
+    shape = obj.Shape
+    key = _shape_key(obj, shape)
+    if key is not None:
+        with _lock:
+            found = _indexes.get(key)
+            if found is not None:
+                _indexes.move_to_end(key)
+                _stats['hits'] += 1
+                return found
+    built = EdgeIndex(shape)
+    with _lock:
+        _stats['builds'] += 1
+        if key is not None:
+            _indexes[key] = built
+            while len(_indexes) > _MAX_INDEXES:
+                _indexes.popitem(last=False)
+    return built
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_stats, cached=len(_indexes))
+
+
+# -------------------------- rules --------------------------
+class Rule:
+    """Edge predicate evaluated against an EdgeIndex; combine with & and |."""
+
+    def select(self, idx: EdgeIndex) -> set:
+        """Edge numbers matching the rule, looked up in the index."""
+        raise NotImplementedError
+
+    def estimate(self, idx: EdgeIndex) -> int:
+        """Expected size of select(idx), cheap to compute; & looks up the smallest and filters the rest."""
+        return idx.count
+
+    def filter(self, idx: EdgeIndex, numbers) -> set:
+        """The members of numbers matching the rule (tested one by one)."""
+        return set(numbers) & self.select(idx)
+
+    def __and__(self, other):
+        return _All([self, other])
+
+    def __or__(self, other):
+        return _Any([self, other])
+
+
+class _All(Rule):
+    def __init__(self, rules):
+        self.rules = []
+        for r in rules:
+            self.rules.extend(r.rules if isinstance(r, _All) else [r])
+
+    def estimate(self, idx):
+        return min(r.estimate(idx) for r in self.rules)
+
+    def select(self, idx):
+        # look up the most selective rule, then test only its edges against the others
+        rules = sorted(self.rules, key=lambda r: r.estimate(idx))
+        return self.filter(idx, rules[0].select(idx), rules[1:])
+
+    def filter(self, idx, numbers, rules=None):
+        out = set(numbers)
+        for r in (self.rules if rules is None else rules):
+            if not out:
+                break
+            out = r.filter(idx, out)
+        return out
+
+    def __repr__(self):
+        return ' & '.join(map(repr, self.rules))
+
+
+class _Any(Rule):
+    def __init__(self, rules):
+        self.rules = rules
+
+    def estimate(self, idx):
+        return min(idx.count, sum(r.estimate(idx) for r in self.rules))
+
+    def filter(self, idx, numbers):
+        out = set()
+        rest = set(numbers)
+        for r in self.rules:
+            found = r.filter(idx, rest)
+            out |= found
+            rest -= found
+        return out
+
+    def select(self, idx):
+        out = set()
+        for r in self.rules:
+            out |= r.select(idx)
+        return out
+
+    def __repr__(self):
+        return '(' + ' | '.join(map(repr, self.rules)) + ')'
+
+
+class length_between(Rule):
+    """lo <= length <= hi (either bound may be None)."""
+
+    def __init__(self, lo=None, hi=None):
+        self.lo, self.hi = lo, hi
+
+    def select(self, idx):
+        return idx.by_length(self.lo, self.hi, inclusive=True)
+
+    def estimate(self, idx):
+        return idx.count_length(self.lo, self.hi, inclusive=True)
+
+    def filter(self, idx, numbers):
+        lo = -math.inf if self.lo is None else self.lo
+        hi = math.inf if self.hi is None else self.hi
+        return {n for n in numbers if lo <= idx.lengths[n - 1] <= hi}
+
+    def __repr__(self):
+        return f'length={self.lo}..{self.hi}'
+
+
+class length_below(Rule):
+    """length < limit."""
+
+    def __init__(self, limit):
+        self.limit = float(limit)
+
+    def select(self, idx):
+        return idx.by_length(None, self.limit)
+
+    def estimate(self, idx):
+        return idx.count_length(None, self.limit)
+
+    def filter(self, idx, numbers):
+        return {n for n in numbers if idx.lengths[n - 1] < self.limit}
+
+    def __repr__(self):
+        return f'length<{self.limit}'
+
+
+class parallel_to(Rule):
+    """Straight edges parallel to direction within tol_deg."""
+
+    def __init__(self, direction, tol_deg=DEFAULT_TOL_DEG):
+        self.direction = AXES[direction.lower()] if isinstance(direction, str) else _vec(direction)
+        self.tol_deg = float(tol_deg)
+
+    def select(self, idx):
+        return idx.parallel(self.direction, self.tol_deg)
+
+    def estimate(self, idx):
+        return len(idx.edge_directions)
+
+    def filter(self, idx, numbers):
+        d = _unit(self.direction)
+        cos_tol = math.cos(math.radians(self.tol_deg))
+        return {n for n in numbers if d is not None and idx._parallel_exact(n, d, cos_tol)}
+
+    def __repr__(self):
+        return f'parallel={self.direction} angle={self.tol_deg}'
+
+
+class inside_box(Rule):
+    """Edges lying entirely inside the axis-aligned box."""
+
+    def __init__(self, xmin, ymin, zmin, xmax, ymax, zmax):
+        self.box = tuple(float(v) for v in (xmin, ymin, zmin, xmax, ymax, zmax))
+
+    def select(self, idx):
+        return idx.in_box(self.box)
+
+    def estimate(self, idx):
+        return idx.count_box(self.box)
+
+    def filter(self, idx, numbers):
+        return {n for n in numbers if idx.inside(n, self.box)}
+
+    def __repr__(self):
+        return 'box=' + ','.join('%g' % v for v in self.box)
+
+
+def _floats(text, n):
+    values = [float(v) for v in text.replace(' ', '').split(',') if v]
+    if len(values) != n:
+        raise ValueError(f'expected {n} comma-separated numbers, got {text!r}')
+    return values
+
+
+def parse(text: str) -> Rule:
+    """Rule from 'length<5; parallel=z; angle=2; box=0,0,0,10,10,10' (clauses AND-ed)."""
+    rules = []
+    tol = DEFAULT_TOL_DEG
+    parallels = []
+    for clause in text.replace('\n', ';').split(';'):
+        clause = clause.strip()
+        if not clause:
+            continue
+        if clause.startswith('length<'):
+            rules.append(length_below(float(clause[len('length<'):])))
+        elif clause.startswith('length='):
+            lo, _, hi = clause[len('length='):].partition('..')
+            rules.append(length_between(float(lo) if lo else None, float(hi) if hi else None))
+        elif clause.startswith('parallel='):
+            value = clause[len('parallel='):].strip().lower()
+            parallels.append(value if value in AXES else _floats(value, 3))
+        elif clause.startswith('angle='):
+            tol = float(clause[len('angle='):])
+        elif clause.startswith('box='):
+            rules.append(inside_box(*_floats(clause[len('box='):], 6)))
+        else:
+            raise ValueError(f'unknown edge rule {clause!r} (use length<, length=, parallel=, angle=, box=)')
+    rules.extend(parallel_to(d, tol) for d in parallels)
+    if not rules:
+        raise ValueError('no edge rule given')
+    return rules[0] if len(rules) == 1 else _All(rules)
+
+
+# -------------------------- features --------------------------
+def make_feature(doc, base, edges, kind='fillet', size=1.0, name=None):
+    """Part::Fillet / Part::Chamfer on base for edge numbers (or 'Edge<n>' names); no recompute."""
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {', '.join(KINDS)}, not {kind!r}")
+    numbers = sorted({int(e[4:]) if isinstance(e, str) else int(e) for e in edges})
+    feature = doc.addObject(KINDS[kind], name or kind.capitalize())
+    feature.Base = base
+    # PropertyFilletEdges: (edge number, radius/size at start, radius/size at end)
+    feature.Edges = [(n, float(size), float(size)) for n in numbers]
+    return feature
+
+
+def _final_bodies(doc):
+    try:
+        import doc_graph
+        return list(doc_graph.graph(doc).finals)
+    except ImportError:
+        return [o for o in doc.Objects if hasattr(o, 'Shape') and not o.Shape.isNull()]
+
+
+def bulk(doc, rule, kind='fillet', size=1.0, objects=None, recompute=True, hide_base=True, log=None):
+    """One fillet/chamfer feature per body for the edges rule selects; a single recompute.
+
+    objects defaults to the document's final bodies (doc_graph). Returns a dict with
+    'features' [(body name, feature name, edge count)], 'skipped', timings and 'summary'.
+    """
+    if isinstance(rule, str):
+        rule = parse(rule)
+    t0 = time.perf_counter()
+    bodies = list(objects) if objects is not None else _final_bodies(doc)
+    t_index = t_select = 0.0
+    created, skipped = [], []
+    for body in bodies:
+        t = time.perf_counter()
+        try:
+            idx = index(body)
+        except Exception as e:
+            skipped.append((getattr(body, 'Name', '?'), str(e)))
+            continue
+        t_index += time.perf_counter() - t
+        t = time.perf_counter()
+        edges = rule.select(idx)
+        t_select += time.perf_counter() - t
+        if not edges:
+            skipped.append((body.Name, 'no matching edges'))
+            continue
+        feature = make_feature(doc, body, edges, kind, size)
+        created.append((body, feature, len(edges)))
+    t = time.perf_counter()
+    if created and recompute:
+        doc.recompute()
+    t_recompute = time.perf_counter() - t
+    if created and hide_base:
+        try:
+            import view_batch
+            with view_batch.ViewBatch() as batch:
+                for body, feature, _n in created:
+                    batch.set(body, 'Visibility', False)
+                    batch.set(feature, 'Visibility', True)
+        except ImportError:
+            pass
+    result = {
+        'kind': kind, 'size': float(size), 'rule': repr(rule),
+        'features': [(b.Name, f.Name, n) for b, f, n in created],
+        'skipped': skipped,
+        'edges': sum(n for _b, _f, n in created),
+        'index_ms': t_index * 1e3, 'select_ms': t_select * 1e3, 'recompute_ms': t_recompute * 1e3,
+        'total_ms': (time.perf_counter() - t0) * 1e3,
+    }
+    result['summary'] = ('%d %s feature(s), %d edges on %d bodies (%d skipped); index %.1f ms, select %.1f ms, '
+                         'recompute %.1f ms' % (len(created), kind, result['edges'], len(bodies), len(skipped),
+                                                result['index_ms'], result['select_ms'], result['recompute_ms']))
+    if log:
+        log(f"[edge_rules] {result['summary']}\n")
+    return result
+
+
+# -------------------------- headless entry --------------------------
+def run_from_env():
+    import FreeCAD as App  # type: ignore
+    path = os.environ.get('FC_EDGE_FILE')
+    rules = os.environ.get('FC_EDGE_RULES')
+    if not path or not rules:
+        App.Console.PrintError('[edge_rules] set FC_EDGE_FILE and FC_EDGE_RULES\n')
+        return 2
+    kind = os.environ.get('FC_EDGE_KIND', 'fillet').lower()
+    size = float(os.environ.get('FC_EDGE_SIZE', '1.0'))
+    out = os.environ.get('FC_EDGE_OUT') or f'{os.path.splitext(path)[0]}_{kind}.FCStd'
+    doc = App.openDocument(path)
+    objects = None
+    names = os.environ.get('FC_EDGE_OBJECTS')
+    if names:
+        objects = [doc.getObject(n.strip()) for n in names.split(',') if n.strip()]
+        missing = [n for n, o in zip(names.split(','), objects) if o is None]
+        if missing:
+            App.Console.PrintError(f"[edge_rules] no such object(s): {', '.join(missing)}\n")
+            return 2
+    result = bulk(doc, rules, kind=kind, size=size, objects=objects, hide_base=False,
+                  log=App.Console.PrintMessage)
+    for body, name, count in result['features']:
+        App.Console.PrintMessage(f'[edge_rules]   {body} -> {name}: {count} edges\n')
+    for body, reason in result['skipped']:
+        App.Console.PrintMessage(f'[edge_rules]   {body}: skipped ({reason})\n')
+    doc.saveAs(out.replace('\\', '/'))
+    App.Console.PrintMessage(f'[edge_rules] saved {out}\n')
+    return 0 if result['features'] else 1
+
+
+# FreeCADCmd runs scripts under another __name__; a plain import (e.g. from a macro) does not run this
+if __name__ == '__main__' or (__name__ != 'edge_rules' and 'FreeCAD' in sys.modules):
+    sys.exit(run_from_env())
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+Lazy, cached access to the topological naming data of .FCStd files: the
+*.Shape.Map.txt element maps and StringHasher.Table.txt (FreeCAD 1.0+).
+
+An element map tells which mapped (history) name each element of a shape
+carries, e.g. Pad Edge4 -> '#c:1;:U;XTR;:H5d:7,E': the upper edge of an
+extrusion (XTR) of something produced by object id 0x5d (Sketch). '#c'
+references an entry of the document's string hasher table.
+
+Plain Python (FreeCAD not required):
+  with DocumentMaps('123.FCStd') as maps:
+      maps.history('Pad', 'Edge4')
+      # {'element': 'Edge4', 'mapped': ['#c:1;:U;XTR;:H5d:7,E'], 'text': [...],
+      #  'features': ['Sketch'], 'ops': ['sketch', 'extrude']}
+      maps.element('Pad', '#c:1;:U;XTR;:H5d:7,E')   # -> 'Edge4'
+
+Command line:
+  python element_map.py FreeCadTest/FCStd/123.FCStd Pad Edge4 Face1
+  python element_map.py FreeCadTest/FCStd/123.FCStd Body            # every element of Body
+
+Nothing is read until the first lookup. Parsed maps and tables are kept in a
+process-wide LRU keyed by (archive path, member, archive size/mtime), so
+querying many documents repeatedly re-reads nothing that has not changed;
+all names are interned, so the many repeated postfixes are stored once.
+
+The hasher table is decoded structurally (ids, flags, referenced ids and
+plain text); entries composed from other entries are rendered by joining
+their parts, which is enough to see the tags and operations of a history.
+"""
+from __future__ import annotations
+import os
+import re
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from fcstd_reader import DOCUMENT_XML, STRING_HASHER_TABLE, open_fcstd
+
+MAP_SUFFIX = '.Map.txt'
+DEFAULT_CACHE_ENTRIES = 512
+
+# StringID flags (App/StringHasher.h)
+FLAG_BINARY = 1 << 0
+FLAG_HASHED = 1 << 1
+FLAG_INDEXED = 1 << 2
+FLAG_PREFIX_ID = 1 << 3
+FLAG_PREFIX_ID_INDEX = 1 << 4
+FLAG_PERSISTENT = 1 << 5
+FLAG_POSTFIXED = 1 << 6
+FLAG_MARKED = 1 << 7
+
+# Operation codes found in mapped names (TopoShapeOpCode.h)
+OP_CODES = {
+    'XTR': 'extrude', 'FAC': 'makeFace', 'SKT': 'sketch', 'FLT': 'fillet', 'CHF': 'chamfer',
+    'CUT': 'cut', 'FUS': 'fuse', 'CMN': 'common', 'SEC': 'section', 'RFI': 'refine',
+    'XFM': 'transform', 'RVL': 'revolve', 'LFT': 'loft', 'SWP': 'sweep', 'PSM': 'prism',
+    'OFS': 'offset', 'MIR': 'mirror', 'CPY': 'copy', 'SLD': 'solid', 'SHL': 'shell',
+    'WIR': 'wire', 'CMP': 'compound',
+}
+_TAG_RE = re.compile(r':H(-?[0-9a-fA-F]+)')
+_OP_RE = re.compile(r';([A-Z]{3})(?=[;:,]|$)')
+_ELEMENT_RE = re.compile(r'^([A-Za-z]+)(\d+)$')
+_intern = sys.intern
+
+
+# -------------------------- string hasher table --------------------------
+class StringTable:
+    """Entries of StringHasher.Table.txt: id -> (flags, referenced ids, text or None)."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self._text = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def text(self, sid: int, index: int = 0) -> str:
+        """Readable text of string id sid (referenced ids expanded), with an optional index."""
+        key = (sid, index)
+        found = self._text.get(key)
+        if found is None:
+            found = _intern(self._render(sid, index, set()))
+            self._text[key] = found
+        return found
+
+    def _render(self, sid, index, seen):
+        entry = self.entries.get(sid)
+        if entry is None or sid in seen:
+            return f'#{sid:x}' + (f':{index:x}' if index else '')
+        seen = seen | {sid}
+        flags, sids, data = entry
+        # with FLAG_PREFIX_ID the first referenced id is the postfix of this string,
+        # the rest (or the stored text) is the prefix; an index goes right after the prefix
+        postfix = ''
+        if flags & FLAG_PREFIX_ID and sids:
+            postfix, sids = self._render(sids[0], 0, seen), sids[1:]
+        if data is not None or not sids:
+            body = (data or '') + (str(index) if index else '')
+        else:
+            body = ''.join(self._render(s, index if i == 0 else 0, seen) for i, s in enumerate(sids))
+        return body + postfix
+
+    def expand(self, name: str) -> str:
+        """Replace every '#<id>[:<index>]' reference in a mapped name by its text."""
+        return re.sub(r'#([0-9a-fA-F]+)(?::([0-9a-fA-F]+))?',
+                      lambda m: self.text(int(m.group(1), 16), int(m.group(2) or '0', 16)), name)
+
+
+def parse_string_table(stream) -> StringTable:
+    """Parse StringHasher.Table.txt (ids are stored relative to the previous id, referenced ids
+    relative to their own entry)."""
+    entries = {}
+    lines = _lines(stream)
+    head = next(lines, '')
+    if not head.startswith('StringTableStart'):
+        return StringTable(entries)
+    last = 0
+    prev_refs = ()
+    for line in lines:
+        if not line or line.startswith('StringTableEnd'):
+            continue
+        code, _, data = line.partition(' ')
+        fields = code.split('.')
+        sid = last - int(fields[0], 16)
+        last = sid
+        flags = int(fields[1], 16) if len(fields) > 1 else 0
+        # a relative id of 0 repeats the same slot of the previous entry
+        refs = tuple(sid - int(f, 16) if int(f, 16) or i >= len(prev_refs) else prev_refs[i]
+                     for i, f in enumerate(fields[2:]))
+        prev_refs = refs
+        text = None
+        if _:
+            text = data
+            if not flags & FLAG_PREFIX_ID:
+                # plain strings are written as "<postfix length>:<text>"
+                size, colon, rest = data.partition(':')
+                if colon and re.fullmatch(r'[0-9a-fA-F]+', size):
+                    text = rest
+            text = _intern(text)
+        entries[sid] = (flags, refs, text)
+    return StringTable(entries)
+
+
+# -------------------------- element maps --------------------------
+class ElementMap:
+    """Element name -> mapped names of one shape, plus the lazily built reverse index."""
+
+    def __init__(self, names):
+        self.names = names  # {'Edge': [(), ('#5;:G;XTR;:H5d:7,E',), ...]} (index 0 unused)
+        self._reverse = None
+
+    def elements(self):
+        for kind, rows in self.names.items():
+            for i, mapped in enumerate(rows):
+                if mapped:
+                    yield f'{kind}{i}', mapped
+
+    def mapped_names(self, element: str) -> tuple:
+        m = _ELEMENT_RE.match(element)
+        if not m:
+            return ()
+        rows = self.names.get(m.group(1), ())
+        i = int(m.group(2))
+        return rows[i] if i < len(rows) else ()
+
+    def element(self, mapped: str):
+        """Element name ('Edge5') carrying the given mapped name, or None."""
+        if self._reverse is None:
+            self._reverse = {name: element for element, names in self.elements() for name in names}
+        return self._reverse.get(mapped)
+
+
+def _lines(stream):
+    for raw in stream:
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8', 'replace')
+        yield raw.strip()
+
+
+def _name_token(token, postfixes):
+    data, *rest = token[1:].split('.')
+    postfix = postfixes[int(rest[0], 16) - 1] if rest and int(rest[0], 16) > 0 else ''
+    return _intern(data + postfix)
+
+
+def parse_element_map(stream) -> ElementMap:
+    """Parse a *.Map.txt member; child maps are resolved into the top-level (last) map."""
+    lines = (ln for ln in _lines(stream) if ln)
+    head = next(lines, '')
+    if not head.startswith('BeginElementMap'):
+        return ElementMap({})
+    count = int(next(lines).split()[-1])
+    postfixes = [_intern(next(lines)) for _ in range(count)]
+    map_count = int(next(lines).split()[-1])
+    maps = {}
+    for _ in range(map_count):
+        header = next(lines).split()
+        index, type_count = int(header[1]), int(header[3])
+        names = {}
+        for _t in range(type_count):
+            kind = _intern(next(lines))
+            children = [next(lines).split() for _c in range(int(next(lines).split()[-1]))]
+            rows = [next(lines) for _n in range(int(next(lines).split()[-1]))]
+            table = [tuple(_name_token(tok, postfixes) for tok in row.split()[:-1]) for row in rows]
+            for child in children:
+                start, offset, n, _tag, map_index = (int(v, 16) for v in child[:5])
+                postfix = child[5] if len(child) > 6 else ''
+                source = maps.get(map_index, {}).get(kind, [])
+                for i in range(n):
+                    parent, src = start + offset + i, start + i
+                    while len(table) <= parent:
+                        table.append(())
+                    if src < len(source) and source[src]:
+                        table[parent] = tuple(_intern(name + postfix) for name in source[src])
+            names[kind] = table
+        maps[index] = names
+        next(lines, None)  # EndMap
+    return ElementMap(maps[max(maps)] if maps else {})
+
+
+# -------------------------- per-member cache --------------------------
+_CACHE = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_cache_max = DEFAULT_CACHE_ENTRIES
+stats = {'hits': 0, 'loads': 0}
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def cached_member(path: str, member: str, parser, archive=None):
+    """Parse one archive member with parser, reusing an earlier result while the file is unchanged."""
+    real = os.path.realpath(path)
+    stamp_path = os.path.join(real, member) if os.path.isdir(real) else real
+    key = (real, member, _stamp(stamp_path))
+    with _CACHE_LOCK:
+        found = _CACHE.get(key)
+        if found is not None:
+            _CACHE.move_to_end(key)
+            stats['hits'] += 1
+            return found
+    if archive is not None:
+        with archive.open(member) as f:
+            value = parser(f)
+    else:
+        with open_fcstd(path) as fc, fc.open(member) as f:
+            value = parser(f)
+    with _CACHE_LOCK:
+        _CACHE[key] = value
+        stats['loads'] += 1
+        while len(_CACHE) > _cache_max:
+            _CACHE.popitem(last=False)
+    return value
+
+
+def set_cache_size(entries: int):
+    global _cache_max
+    with _CACHE_LOCK:
+        _cache_max = max(1, int(entries))
+        while len(_CACHE) > _cache_max:
+            _CACHE.popitem(last=False)
+
+
+def _object_ids(stream):
+    """{object id: name} from the <Objects> block of Document.xml (stops right after it)."""
+    ids = {}
+    for event, elem in ET.iterparse(stream, events=('end',)):
+        if elem.tag == 'Object' and elem.get('id'):
+            ids[int(elem.get('id'))] = _intern(elem.get('name'))
+        elif elem.tag == 'Objects':
+            break
+    return ids
+
+
+class DocumentMaps:
+    """Topological naming lookups for one .FCStd archive (or extracted folder)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def _member(self, member, parser):
+        if self._archive is None:
+            self._archive = open_fcstd(self.path)
+        if member not in self._archive:
+            return None
+        return cached_member(self.path, member, parser, self._archive)
+
+    # ---- lazily loaded parts ----
+    def element_map(self, obj: str, prop: str = 'Shape'):
+        return self._member(f'{obj}.{prop}{MAP_SUFFIX}', parse_element_map)
+
+    @property
+    def strings(self) -> StringTable:
+        return self._member(STRING_HASHER_TABLE, parse_string_table) or StringTable({})
+
+    @property
+    def object_ids(self) -> dict:
+        return self._member(DOCUMENT_XML, _object_ids) or {}
+
+    # ---- queries ----
+    def history(self, obj: str, element: str, prop: str = 'Shape'):
+        """Mapped names of obj's element, their expanded text, source features and operations."""
+        emap = self.element_map(obj, prop)
+        mapped = list(emap.mapped_names(element)) if emap is not None else []
+        strings = self.strings
+        text = [strings.expand(m) for m in mapped]
+        ids = self.object_ids
+        features, ops = [], []
+        for t in text:
+            for tag in _TAG_RE.findall(t):
+                name = ids.get(abs(int(tag, 16)), f'#{tag}')  # negative tags (:H-29) name the same feature
+                if name not in features:
+                    features.append(name)
+            for code in _OP_RE.findall(t):
+                op = OP_CODES.get(code, code)
+                if op not in ops:
+                    ops.append(op)
+        return {'element': element, 'mapped': mapped, 'text': text, 'features': features, 'ops': ops}
+
+    def element(self, obj: str, mapped: str, prop: str = 'Shape'):
+        """Current element name of obj carrying a mapped name, or None."""
+        emap = self.element_map(obj, prop)
+        return emap.element(mapped) if emap is not None else None
+
+    def elements(self, obj: str, prop: str = 'Shape'):
+        emap = self.element_map(obj, prop)
+        return [e for e, _names in emap.elements()] if emap is not None else []
+
+
+def main(argv):
+    if len(argv) < 3:
+        print(__doc__)
+        return 2
+    path, obj, elements = argv[1], argv[2], argv[3:]
+    with DocumentMaps(path) as maps:
+        if maps.element_map(obj) is None:
+            print(f'{obj}.Shape{MAP_SUFFIX} not found in {path}')
+            return 1
+        for element in elements or maps.elements(obj):
+            h = maps.history(obj, element)
+            print(f"{obj}.{element}: {' | '.join(h['mapped']) or '(no mapped name)'}")
+            for t in h['text']:
+                print(f'    {t}')
+            if h['features'] or h['ops']:
+                print(f"    features: {', '.join(h['features'])}; ops: {', '.join(h['ops'])}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+Export pipeline: write FCStd, STEP, BREP and STL of one recomputed object
+concurrently, with a manifest of per-format sizes and timings.
+
+The shape is snapshotted once (Shape.copy() plus its BREP text, which also
+keys the tessellation cache). Outputs that only need the snapshot (STEP,
+BREP, STL) are written by a worker pool while the calling thread saves the
+document, the one step that must stay on FreeCAD's main thread.
+
+Inside FreeCAD:
+  import export_pipeline
+  manifest = export_pipeline.export(result_obj, {'fcstd': 'part.FCStd',
+                                                 'step': 'part.step',
+                                                 'stl': 'part.stl'})
+  # {'object': 'Cut', 'ok': True, 'mode': 'thread', 'snapshot_seconds': ...,
+  #  'total_seconds': ..., 'formats': {'step': {'path': ..., 'bytes': ..., 'seconds': ...}, ...}}
+
+targets may also be a list of paths; the format follows the extension.
+mode='thread' (default) uses a thread pool; mode='process' sends the BREP
+text to worker processes, which need a Python interpreter that can import Part
+(FreeCAD built as a Python module); under FreeCADCmd, or when the workers
+cannot import Part, it falls back to threads. mode='serial' writes one after
+another.
+
+Every file except the FCStd is written under a temporary name and only
+renamed into place once every format of the job has succeeded. Each output
+that already exists (the FCStd before saving, the others just before their
+rename) is moved aside first and put back if the job fails, including when a
+rename fails halfway through the commit. A failed job therefore leaves the
+previous outputs untouched and never a mix of new and stale ones
+(keep_partial=True still moves the formats that succeeded into place). Should
+putting a previous output back fail as well, the format is reported as an
+error and its entry names the 'backup' file that still holds it.
+"""
+from __future__ import annotations
+import concurrent.futures as cf
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import process_pool
+import tracing
+
+FORMATS = ('fcstd', 'step', 'brep', 'stl')
+_EXTENSIONS = {'.fcstd': 'fcstd', '.step': 'step', '.stp': 'step', '.brep': 'brep', '.brp': 'brep', '.stl': 'stl'}
+DEFAULT_LINEAR_DEFLECTION = 0.1
+DEFAULT_ANGULAR_DEFLECTION = 0.523599
+
+
+class ExportError(RuntimeError):
+    """Raised by export(..., raise_on_error=True); .manifest holds the per-format results."""
+
+    def __init__(self, message, manifest):
+        super().__init__(message)
+        self.manifest = manifest
+
+
+def format_of(path: str) -> str:
+    fmt = _EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f'unknown export format for {path!r} (use one of {", ".join(sorted(_EXTENSIONS))})')
+    return fmt
+
+
+def normalize_targets(targets):
+    """{format: path} from a mapping or a list of paths."""
+    if isinstance(targets, dict):
+        out = {}
+        for fmt, path in targets.items():
+            if not path:
+                continue
+            fmt = fmt.lower()
+            if fmt not in FORMATS:
+                raise ValueError(f'unknown export format {fmt!r} (use one of {", ".join(FORMATS)})')
+            out[fmt] = path
+        return out
+    out = {}
+    for path in targets:
+        if path:
+            out[format_of(path)] = path
+    return out
+
+
+def _partial_path(path):
+    # keep the extension: Mesh.export picks the format from it
+    root, ext = os.path.splitext(path)
+    return f'{root}.partial-{os.getpid()}-{threading.get_ident()}{ext}'
+
+
+def _backup_path(path):
+    root, ext = os.path.splitext(path)
+    return f'{root}.backup-{os.getpid()}{ext}'
+
+
+def _ensure_folder(path):
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder, exist_ok=True)
+
+
+# -------------------------- writers --------------------------
+def _write_step(shape, path, **_):
+    shape.exportStep(path)
+
+
+def _write_brep(shape, path, brep=None, **_):
+    if brep is not None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(brep)
+    else:
+        shape.exportBrep(path)
+
+
+def _write_stl(shape, path, linear=DEFAULT_LINEAR_DEFLECTION, angular=DEFAULT_ANGULAR_DEFLECTION,
+               cache=None, key=None, **_):
+    import stl_io
+    if cache is not None:
+        v, f = cache.tessellate(shape, linear, angular, key=key)
+    else:
+        v, f = stl_io.shape_arrays(shape, linear, angular)
+    stl_io.write_stl(path, v, f)
+
+
+_WRITERS = {'step': _write_step, 'brep': _write_brep, 'stl': _write_stl}
+
+
+def _write_from_brep(fmt, brep, path, linear, angular):
+    """Process-pool entry point: rebuild the shape from BREP text and write one format."""
+    import Part  # type: ignore
+    shape = Part.Shape()
+    shape.importBrepFromString(brep)
+    t0 = time.perf_counter()
+    _WRITERS[fmt](shape, path, brep=brep, linear=linear, angular=angular)
+    return time.perf_counter() - t0
+
+
+def _stl_io_usable():
+    try:
+        import stl_io  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+# -------------------------- pipeline --------------------------
+def snapshot(obj):
+    """(shape copy, BREP text) of obj, taken once on the calling thread."""
+    shape = obj.Shape.copy()
+    try:
+        brep = shape.exportBrepToString()
+    except Exception:
+        brep = None
+    return shape, brep
+
+
+def _remove(path):
+    try:
+        if path and os.path.exists(path):
+            os.remove(path)
+    except OSError:
+        pass
+
+
+@tracing.traced('export')
+def export(obj, targets, doc=None, mode='thread', workers=None,
+           linear_deflection=DEFAULT_LINEAR_DEFLECTION, angular_deflection=DEFAULT_ANGULAR_DEFLECTION,
+           tessellation_cache=None, keep_partial=False, raise_on_error=False, log=None):
+    """Write obj (already recomputed) to every target; returns the manifest dict.
+
+    doc defaults to obj.Document and is only needed for 'fcstd'; obj may be None when only
+    'fcstd' is written. tessellation_cache is an optional tessellation_cache.TessellationCache
+    for the STL output.
+    """
+    t_start = time.perf_counter()
+    targets = normalize_targets(targets)
+    if mode not in ('thread', 'process', 'serial'):
+        raise ValueError(f"mode must be 'thread', 'process' or 'serial', not {mode!r}")
+    doc = doc if doc is not None else getattr(obj, 'Document', None)
+    manifest = {'object': getattr(obj, 'Name', None), 'mode': mode, 'formats': {}}
+    existed = {fmt: os.path.exists(path) for fmt, path in targets.items()}
+    for path in targets.values():
+        _ensure_folder(path)
+
+    t = time.perf_counter()
+    shape = brep = None
+    if set(targets) - {'fcstd'}:  # an FCStd-only export (create_cube.save_fcstd) needs no shape
+        with tracing.span('export.snapshot', object=manifest['object']):
+            shape, brep = snapshot(obj)
+    key = None
+    if brep is not None and tessellation_cache is not None:
+        import hashlib
+        key = hashlib.sha256(brep.encode('utf-8')).hexdigest()  # same key as tessellation_cache.shape_key
+    manifest['snapshot_seconds'] = round(time.perf_counter() - t, 6)
+
+    # STL without stl_io goes through Mesh.export on the document object: main thread only
+    main_thread_stl = 'stl' in targets and not _stl_io_usable()
+    pooled = [f for f in ('step', 'brep', 'stl') if f in targets and not (f == 'stl' and main_thread_stl)]
+    if mode == 'process' and brep is None:
+        mode = manifest['mode'] = 'thread'
+    results = {}
+    partials = {}  # format -> finished file still under its temporary name
+    backups = {}  # format -> previous output moved aside until the job is committed or rolled back
+
+    def record(fmt, started, error=None, seconds=None, written=None):
+        path = targets[fmt]
+        written = written or path
+        entry = {'path': path.replace('\\', '/'),
+                 'seconds': round(seconds if seconds is not None else time.perf_counter() - started, 6)}
+        if error is None and os.path.exists(written):
+            entry['status'] = 'ok'
+            entry['bytes'] = os.path.getsize(written)
+        else:
+            entry['status'] = 'error'
+            entry['error'] = str(error) if error is not None else 'output missing'
+        results[fmt] = entry
+        span = tracing.current()
+        if span and span.name == 'export.' + fmt:
+            span.set(status=entry['status'], bytes=entry.get('bytes'))
+        else:  # written by a worker process: no span of its own here
+            tracing.event('export.' + fmt, status=entry['status'], bytes=entry.get('bytes'), seconds=entry['seconds'])
+        if log:
+            log(f"[export] {fmt}: {entry['status']} {entry.get('bytes', '-')} bytes {entry['seconds']:.3f} s\n")
+
+    def run_local(fmt):
+        tmp = _partial_path(targets[fmt])
+        started = time.perf_counter()
+        with tracing.span('export.' + fmt, path=targets[fmt]):
+            try:
+                _WRITERS[fmt](shape, tmp, brep=brep, linear=linear_deflection, angular=angular_deflection,
+                              cache=tessellation_cache, key=key)
+                partials[fmt] = tmp
+                record(fmt, started, written=tmp)
+            except Exception as e:
+                _remove(tmp)
+                record(fmt, started, e)
+
+    def run_main_thread():
+        if 'fcstd' in targets:
+            started = time.perf_counter()
+            with tracing.span('export.fcstd', path=targets['fcstd']):
+                try:
+                    if doc is None:
+                        raise RuntimeError('no document to save')
+                    if existed['fcstd']:
+                        moved = _backup_path(targets['fcstd'])
+                        os.replace(targets['fcstd'], moved)
+                        backups['fcstd'] = moved
+                    doc.saveAs(targets['fcstd'].replace('\\', '/'))
+                    record('fcstd', started)
+                except Exception as e:
+                    record('fcstd', started, e)
+        if main_thread_stl:
+            tmp = _partial_path(targets['stl'])
+            started = time.perf_counter()
+            with tracing.span('export.stl', path=targets['stl'], writer='Mesh'):
+                try:
+                    import Mesh  # type: ignore
+                    Mesh.export([obj], tmp)
+                    partials['stl'] = tmp
+                    record('stl', started, written=tmp)
+                except Exception as e:
+                    _remove(tmp)
+                    record('stl', started, e)
+
+    if mode == 'serial' or len(pooled) == 0:
+        for fmt in pooled:
+            run_local(fmt)
+        run_main_thread()
+    else:
+        executor = None
+        if mode == 'process' and not process_pool.usable():
+            mode = manifest['mode'] = 'thread'
+        if mode == 'process':
+            try:
+                executor = process_pool.executor(workers or len(pooled))
+            except Exception:
+                executor = None
+                mode = manifest['mode'] = 'thread'
+        if executor is None:
+            executor = cf.ThreadPoolExecutor(max_workers=workers or len(pooled), thread_name_prefix='export')
+        with executor:
+            if mode == 'process':
+                tmps = {fmt: _partial_path(targets[fmt]) for fmt in pooled}
+                futures = {executor.submit(_write_from_brep, fmt, brep, tmps[fmt], linear_deflection,
+                                           angular_deflection): fmt for fmt in pooled}
+            else:
+                futures = {executor.submit(run_local, fmt): fmt for fmt in pooled}
+            started = time.perf_counter()
+            run_main_thread()
+            for future in cf.as_completed(futures):
+                fmt = futures[future]
+                if mode != 'process':
+                    future.result()
+                    continue
+                try:
+                    seconds = future.result()
+                    partials[fmt] = tmps[fmt]
+                    record(fmt, started, seconds=seconds, written=tmps[fmt])
+                except Exception as e:
+                    _remove(tmps[fmt])
+                    if isinstance(e, (BrokenProcessPool, ImportError)):
+                        # no FreeCAD in the worker processes: write it here instead
+                        manifest['mode'] = 'thread'
+                        run_local(fmt)
+                    else:
+                        record(fmt, started, e)
+
+    manifest['formats'] = {fmt: results[fmt] for fmt in FORMATS if fmt in results}
+    manifest['ok'] = all(r['status'] == 'ok' for r in results.values())
+    commit = manifest['ok'] or keep_partial
+
+    def restore(fmt):
+        # put the previous output back (or drop the new one); a backup that cannot be put back is kept
+        old = backups.pop(fmt, None)
+        try:
+            if old is not None:
+                os.replace(old, targets[fmt])
+            elif os.path.exists(targets[fmt]):
+                os.remove(targets[fmt])
+        except OSError as e:
+            results[fmt].update(status='error', error=f'previous output not restored: {e}')
+            results[fmt].pop('bytes', None)
+            if old is not None:
+                results[fmt]['backup'] = old.replace('\\', '/')
+            return False
+        return True
+
+    # the FCStd was saved in place (whatever its status); the other formats are moved into place
+    # one by one, each previous output aside first, so a failed rename can be rolled back
+    placed = ['fcstd'] if 'fcstd' in results else []
+    for fmt, tmp in partials.items():
+        if not commit:
+            _remove(tmp)
+            results[fmt]['status'] = 'removed'
+            continue
+        try:
+            if os.path.exists(targets[fmt]):
+                moved = _backup_path(targets[fmt])
+                os.replace(targets[fmt], moved)
+                backups[fmt] = moved
+            os.replace(tmp, targets[fmt])
+            placed.append(fmt)
+        except OSError as e:
+            _remove(tmp)
+            results[fmt].update(status='error', error=str(e))
+            results[fmt].pop('bytes', None)
+            manifest['ok'] = False
+            if fmt in backups:
+                restore(fmt)
+            if not keep_partial:
+                commit = False  # the rest is removed and what was placed is rolled back below
+    if not manifest['ok']:
+        for fmt in placed:
+            if keep_partial and results[fmt]['status'] == 'ok':
+                continue
+            if restore(fmt) and results[fmt]['status'] == 'ok':
+                results[fmt]['status'] = 'removed'
+    for old in backups.values():  # the new outputs are in place
+        _remove(old)
+    manifest['total_seconds'] = round(time.perf_counter() - t_start, 6)
+    if raise_on_error and not manifest['ok']:
+        failed = ', '.join(f"{fmt}: {r.get('error')}" for fmt, r in results.items() if r['status'] == 'error')
+        raise ExportError(f'export of {manifest["object"]} failed ({failed})', manifest)
+    return manifest
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Headless index of a FreeCAD .FCStd file: object names, TypeIds, labels,
+dependencies and (where derivable) bounding boxes, without starting FreeCAD.
+
+Usage (plain Python, FreeCAD not required):
+  python fcstd_index.py --file d:\\FreeCad\\cube.FCStd
+  python fcstd_index.py --file cube.FCStd --json          # print the raw index
+  python fcstd_index.py --file cube.FCStd --no-cache      # always re-read the archive
+
+Results are stored in a small SQLite cache keyed by the SHA-256 of the archive
+content, so inspecting an unchanged file again only costs a stat() and one
+lookup. The cache location can be set with --cache or env FC_INDEX_CACHE.
+
+Bounding boxes are the exact vertex boxes of each object's *.Shape.brp, read
+with brep_reader (locations of all sub-shapes applied).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from brep_reader import BrepError, read_brep
+from fcstd_reader import open_fcstd
+
+# Bump when the index layout or the bbox derivation changes; old rows are ignored.
+INDEX_VERSION = 2
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'fcstd_index.sqlite3')
+
+
+# -------------------------- Document.xml --------------------------
+def _read_objects(stream):
+    """Stream Document.xml and return the object table (in document order)."""
+    objects = {}
+    order = []
+    deps = {}
+    stack = []
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        if not stack:
+            continue
+        parent = stack[-1]
+        tag = elem.tag
+        if tag == 'Dep' and parent.tag == 'ObjectDeps':
+            names = deps.setdefault(parent.get('Name'), [])
+            name = elem.get('Name')
+            if name and name not in names:
+                names.append(name)
+        elif tag == 'Object' and parent.tag == 'Objects':
+            name = elem.get('name')
+            order.append(name)
+            objects[name] = {'name': name, 'type': elem.get('type'), 'label': name}
+        elif tag == 'Object' and parent.tag == 'ObjectData':
+            name = elem.get('name')
+            rec = objects.setdefault(name, {'name': name, 'type': None, 'label': name})
+            label = elem.find('Properties/Property[@name="Label"]/String')
+            if label is not None:
+                rec['label'] = label.get('value')
+        elif tag == 'Properties' or (tag == 'Property' and elem.get('name') == 'Label') \
+                or (tag == 'String' and parent.tag == 'Property'):
+            # still needed when the enclosing Object closes
+            continue
+        elem.clear()
+        parent.remove(elem)
+    table = []
+    for name in order or list(objects):
+        rec = objects[name]
+        rec['deps'] = deps.get(name, [])
+        table.append(rec)
+    return table
+
+
+# -------------------------- index + cache --------------------------
+def file_sha256(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def index_archive(path: str) -> dict:
+    """Build the object index of one archive (no caching)."""
+    with open_fcstd(path) as fc:
+        with fc.open_document() as f:
+            # program version sits on the <Document> root; read it cheaply from the head
+            head = f.read(512).decode('utf-8', 'replace')
+        program = None
+        marker = 'ProgramVersion="'
+        if marker in head:
+            program = head.split(marker, 1)[1].split('"', 1)[0]
+        with fc.open_document() as f:
+            objects = _read_objects(f)
+        for rec in objects:
+            member = fc.shape_member(rec['name'])
+            rec['shape'] = member
+            rec['bbox'] = None
+            if member:
+                with fc.open_text(member) as bf:
+                    try:
+                        rec['bbox'] = read_brep(bf).bbox()
+                    except (BrepError, ValueError, IndexError, StopIteration):
+                        rec['bbox'] = None
+    return {'version': INDEX_VERSION, 'program': program, 'objects': objects}
+
+
+class IndexCache:
+    """SQLite cache: content hash -> index JSON, plus a (path, size, mtime) -> hash shortcut."""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.environ.get('FC_INDEX_CACHE') or DEFAULT_CACHE
+        folder = os.path.dirname(self.db_path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS archives '
+                         '(hash TEXT, version INTEGER, data TEXT, PRIMARY KEY (hash, version))')
+        self._db.execute('CREATE TABLE IF NOT EXISTS paths '
+                         '(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT)')
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def content_hash(self, path: str) -> str:
+        """Hash of the archive, reusing the stored one when size and mtime are unchanged."""
+        st = os.stat(path)
+        row = self._db.execute('SELECT size, mtime_ns, hash FROM paths WHERE path=?', (path,)).fetchone()
+        if row and row[0] == st.st_size and row[1] == st.st_mtime_ns:
+            return row[2]
+        digest = file_sha256(path)
+        self._db.execute('INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)',
+                         (path, st.st_size, st.st_mtime_ns, digest))
+        self._db.commit()
+        return digest
+
+    def get(self, path: str) -> dict:
+        path = os.path.abspath(path)
+        digest = self.content_hash(path)
+        row = self._db.execute('SELECT data FROM archives WHERE hash=? AND version=?',
+                               (digest, INDEX_VERSION)).fetchone()
+        if row:
+            self.hits += 1
+            index = json.loads(row[0])
+        else:
+            self.misses += 1
+            index = index_archive(path)
+            self._db.execute('INSERT OR REPLACE INTO archives VALUES (?, ?, ?)',
+                             (digest, INDEX_VERSION, json.dumps(index)))
+            self._db.commit()
+        index['hash'] = digest
+        return index
+
+
+def print_index(path: str, index: dict):
+    """Print the index in the same layout as inspect_fcstd.py."""
+    objects = index['objects']
+    print(f"Opened: {path}")
+    print(f"Objects: {len(objects)}\n")
+    for obj in objects:
+        bb = obj.get('bbox')
+        if bb:
+            diag = ((bb['XMax'] - bb['XMin']) ** 2 + (bb['YMax'] - bb['YMin']) ** 2
+                    + (bb['ZMax'] - bb['ZMin']) ** 2) ** 0.5
+            print(f"- {obj['name']} ({obj['type']}) label='{obj['label']}'")
+            print(f"  BB: X[{bb['XMin']:.3f}, {bb['XMax']:.3f}] Y[{bb['YMin']:.3f}, {bb['YMax']:.3f}] Z[{bb['ZMin']:.3f}, {bb['ZMax']:.3f}]  Diag={diag:.3f}")
+        else:
+            note = 'no Shape' if not obj.get('shape') else 'BB not derivable'
+            print(f"- {obj['name']} ({obj['type']}) label='{obj['label']}' ({note})")
+        if obj.get('deps'):
+            print(f"  Deps: {', '.join(obj['deps'])}")
+
+
+def _parse(argv):
+    cfg = {'file': os.environ.get('FC_FILE'), 'cache': None, 'no_cache': False, 'json': False}
+    i = 1
+    while i < len(argv):
+        a = argv[i]
+        if a in ('--file', '--cache') and i + 1 < len(argv):
+            cfg[a.lstrip('-')] = argv[i + 1]
+            i += 2
+            continue
+        if a == '--no-cache':
+            cfg['no_cache'] = True
+        elif a == '--json':
+            cfg['json'] = True
+        i += 1
+    if not cfg['file']:
+        raise SystemExit('Provide --file <path> or set FC_FILE env')
+    return cfg
+
+
+def main(argv):
+    cfg = _parse(argv)
+    norm = os.path.abspath(cfg['file'])
+    if not os.path.isfile(norm):
+        print(f"File not found: {norm}")
+        return 1
+    t0 = time.perf_counter()
+    if cfg['no_cache']:
+        index = index_archive(norm)
+        source = 'fresh'
+    else:
+        with IndexCache(cfg['cache']) as cache:
+            index = cache.get(norm)
+            source = 'cache hit' if cache.hits else 'cache miss'
+    elapsed = (time.perf_counter() - t0) * 1000.0
+    if cfg['json']:
+        print(json.dumps(index, ensure_ascii=False, indent=2))
+    else:
+        print_index(norm, index)
+        print(f"\n[fcstd_index] {source}, {elapsed:.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
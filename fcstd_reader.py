@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Read FreeCAD .FCStd / .FCBak archives directly, without unzipping them to disk.
+
+An FCStd file is a plain zip archive holding Document.xml, one *.brp member per
+shape, *.Map.txt element maps, StringHasher.Table.txt and many small view
+members (ShapeAppearance*, LineColorArray*, ...). Opening the archive only reads
+the zip central directory; each member is decompressed lazily when it is opened,
+so tools that only need Document.xml never touch the remaining members.
+
+Plain Python is enough (no FreeCAD needed):
+  from fcstd_reader import open_fcstd
+  with open_fcstd('123.FCStd') as fc:
+      with fc.open_document() as f:   # binary stream, usable with ET.iterparse
+          ...
+      brep_text = fc.read_text('Pad.Shape.brp')
+
+An already-extracted folder (e.g. 123_extracted) is accepted as well, so callers
+can treat both layouts the same way.
+"""
+from __future__ import annotations
+import io
+import os
+import zipfile
+
+DOCUMENT_XML = 'Document.xml'
+GUI_DOCUMENT_XML = 'GuiDocument.xml'
+STRING_HASHER_TABLE = 'StringHasher.Table.txt'
+ARCHIVE_EXTENSIONS = ('.fcstd', '.fcbak', '.zip')
+
+
+def is_archive(path: str) -> bool:
+    """True if path looks like an FCStd-style zip archive."""
+    return os.path.isfile(path) and (
+        path.lower().endswith(ARCHIVE_EXTENSIONS) or zipfile.is_zipfile(path))
+
+
+class FCStdArchive:
+    """Lazy, read-only view of the members of one FCStd archive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'r')
+        self._infos = {i.filename: i for i in self._zip.infolist()}
+
+    # ---- context manager ----
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    # ---- member listing ----
+    def names(self):
+        return list(self._infos)
+
+    def __contains__(self, name):
+        return name in self._infos
+
+    def size(self, name: str) -> int:
+        """Uncompressed size of a member in bytes."""
+        return self._infos[name].file_size
+
+    def shape_members(self):
+        """Non-empty *.brp members (empty ones are placeholders such as InternalShape)."""
+        return [n for n, i in self._infos.items() if n.endswith('.brp') and i.file_size > 0]
+
+    def map_members(self):
+        return [n for n in self._infos if n.endswith('.Map.txt')]
+
+    # ---- member access ----
+    def open(self, name: str):
+        """Open a member as a binary stream; data is decompressed as it is read."""
+        if name not in self._infos:
+            raise KeyError(f"{name} not found in {self.path}")
+        return self._zip.open(self._infos[name], 'r')
+
+    def read_bytes(self, name: str) -> bytes:
+        with self.open(name) as f:
+            return f.read()
+
+    def read_text(self, name: str, encoding: str = 'utf-8') -> str:
+        return self.read_bytes(name).decode(encoding)
+
+    def open_text(self, name: str, encoding: str = 'utf-8'):
+        """Open a member as a text stream, e.g. for line-by-line BREP parsing."""
+        return io.TextIOWrapper(self.open(name), encoding=encoding)
+
+    def open_document(self):
+        return self.open(DOCUMENT_XML)
+
+    def shape_member(self, obj_name: str, prop: str = 'Shape') -> str | None:
+        """Member name of an object's shape (e.g. Pad -> Pad.Shape.brp), or None."""
+        name = f"{obj_name}.{prop}.brp"
+        info = self._infos.get(name)
+        return name if info is not None and info.file_size > 0 else None
+
+
+class FCStdFolder(FCStdArchive):
+    """Same interface as FCStdArchive for a folder holding an extracted archive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._zip = None
+        self._infos = {}
+        for root, _dirs, files in os.walk(path):
+            for fn in files:
+                full = os.path.join(root, fn)
+                rel = os.path.relpath(full, path).replace(os.sep, '/')
+                self._infos[rel] = zipfile.ZipInfo(rel)
+                self._infos[rel].file_size = os.path.getsize(full)
+
+    def close(self):
+        pass
+
+    def open(self, name: str):
+        if name not in self._infos:
+            raise KeyError(f"{name} not found in {self.path}")
+        return open(os.path.join(self.path, name), 'rb')
+
+
+def open_fcstd(path: str) -> FCStdArchive:
+    """Open an .FCStd/.FCBak archive, an extracted folder, or a folder's Document.xml."""
+    if os.path.isdir(path):
+        return FCStdFolder(path)
+    if os.path.basename(path) == DOCUMENT_XML:
+        return FCStdFolder(os.path.dirname(path) or '.')
+    if is_archive(path):
+        return FCStdArchive(path)
+    raise ValueError(f"Not an FCStd archive or extracted folder: {path}")
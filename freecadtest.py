@@ -28,16 +28,23 @@ if __name__ == '__main__':
     fc.test_core_operations(doc)
     fc.test_part_workbench(doc)
     fc.test_sketcher_workbench(doc)
-    try:
-        fc.test_techdraw_workbench(doc)
-    except Exception:
-        print('【跳过 TechDraw】当前为无界面模式或模块不可用')
+    if fc.TECHDRAW_AVAILABLE and fc.GUI_AVAILABLE:
+        try:
+            fc.test_techdraw_workbench(doc)
+        except Exception:
+            print('【跳过 TechDraw】当前为无界面模式或模块不可用')
+    else:
+        # 无界面：用 hidden_line 生成三视图 PDF
+        fc.test_three_view_drawing(doc)
     fc.test_mesh_workbench(doc)
 
     # 保存文档（带时间戳）
-    doc.saveAs(fc.build_out('api_test_result', 'FCStd'))
+    result_path = fc.build_out('api_test_result', 'FCStd')
+    doc.saveAs(result_path)
+    fc.OUTPUTS.track(result_path)
     print('\n' + '=' * 60)
     print('测试完成！结果位置：')
-    print(f"- FreeCAD文档：{fc.build_out('api_test_result', 'FCStd')}")
+    print(f"- FreeCAD文档：{result_path}")
     print('- 导出文件：STEP/STL/PDF（按类型分类子目录，PDF 视 GUI 可用性）')
-    print('=' * 60)
\ No newline at end of file
+    print('=' * 60)
+    fc.OUTPUTS.close()  # 去重/保留策略在所有输出使用完之后执行
\ No newline at end of file
@@ -6,11 +6,22 @@ FreeCAD投影自动化脚本：3D→2D工程投影 + 曲线→曲面投影
          2.使用命令行：freecadcmd.exe script.py
 """
 
-import FreeCAD
-import Part
+import math
 import os
 import sys
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# FC_IMPORT_REPORT=1 时在退出前打印各模块导入耗时
+import lazy_modules
+lazy_modules.start_from_env()
+# FC_TRACE=1 时在退出前打印各步骤耗时汇总（span 表）；FC_TRACE=xxx.json 同时写出 Chrome trace
+import tracing
+tracing.start_from_env()
+
+import FreeCAD
+import Part
+import export_pipeline
+
 # 检查FreeCAD版本和运行模式
 print("="*50)
 print(f"FreeCAD版本: {FreeCAD.Version()}")
@@ -30,20 +41,7 @@ CUBE_HEIGHT = 8   # 高度(mm)
 # 3. 曲线投影参数
 SPHERE_RADIUS = 12  # 目标球面半径(mm)
 PROJECT_CURVE_RADIUS = 4  # 投影圆半径(mm)
-PROJECT_DIRECTION = FreeCAD.Vector(0, 0, -1)  # 投影方向（Z轴负方向）
-
-# 4. 2D工程图参数
-DRAWING_SCALE = 1.0  # 图纸比例
-DRAWING_TEMPLATE = "Template_A4_Landscape.svg"  # A4横向模板
-
-# 2. 3D模型参数（立方体）
-CUBE_LENGTH = 15  # 长度(mm)
-CUBE_WIDTH = 10   # 宽度(mm)
-CUBE_HEIGHT = 8   # 高度(mm)
-
-# 3. 曲线投影参数
-SPHERE_RADIUS = 12  # 目标球面半径(mm)
-PROJECT_CURVE_RADIUS = 4  # 投影圆半径(mm)
+PROJECT_CURVE_COUNT = 8  # 外圈小圆个数（批量投影示例）
 PROJECT_DIRECTION = FreeCAD.Vector(0, 0, -1)  # 投影方向（Z轴负方向）
 
 # 4. 2D工程图参数
@@ -63,6 +61,7 @@ def create_output_folder():
         print(f"输出文件夹已确认：{OUTPUT_PATH}")
 
 # -------------------------- 功能1：3D模型转2D工程投影（TechDraw）--------------------------
+@tracing.traced("create_3d_cube")
 def create_3d_cube():
     """创建3D立方体模型（命令行模式的简化版本）"""
     print("\n开始创建3D立方体模型...")
@@ -76,18 +75,19 @@ def create_3d_cube():
         cube.Length = CUBE_LENGTH
         cube.Width = CUBE_WIDTH
         cube.Height = CUBE_HEIGHT
-        doc_3d.recompute()
+        with tracing.span("recompute", objects=len(doc_3d.Objects)):
+            doc_3d.recompute()
         print("3D立方体模型创建成功")
 
-        # 3. 保存文档
+        # 3-4. 保存文档并导出STEP：形体快照一次，STEP 在后台线程写出的同时保存 FCStd
         doc_path = os.path.join(OUTPUT_PATH, "Cube_Model.FCStd")
-        doc_3d.saveAs(doc_path)
-        print(f"3D模型文档已保存至：{doc_path}")
-        
-        # 4. 导出为STEP文件
         step_path = os.path.join(OUTPUT_PATH, "Cube_Model.step")
-        cube.Shape.exportStep(step_path)
-        print(f"3D模型已导出为STEP格式：{step_path}")
+        manifest = export_pipeline.export(cube, {"fcstd": doc_path, "step": step_path}, doc=doc_3d)
+        if not manifest["ok"]:
+            raise RuntimeError(f"导出失败: {manifest['formats']}")
+        formats = manifest["formats"]
+        print(f"3D模型文档已保存至：{doc_path}（{formats['fcstd']['bytes']} 字节，{formats['fcstd']['seconds']:.3f} 秒）")
+        print(f"3D模型已导出为STEP格式：{step_path}（{formats['step']['bytes']} 字节，{formats['step']['seconds']:.3f} 秒）")
 
         # 清理
         FreeCAD.closeDocument("Cube_Doc")
@@ -101,10 +101,25 @@ def create_3d_cube():
         traceback.print_exc()
         return False
 
+# -------------------------- 功能2：曲线到曲面投影（Part，批量）--------------------------
+def make_projection_curves():
+    """待投影的圆形曲线：球面上方一圈 PROJECT_CURVE_COUNT 个小圆，外加中心一个（不使用Sketcher模块）"""
+    height = FreeCAD.Vector(0, 0, SPHERE_RADIUS + 5)
+    normal = FreeCAD.Vector(0, 0, 1)
+    wires = [Part.Wire(Part.makeCircle(PROJECT_CURVE_RADIUS, height, normal))]
+    ring = SPHERE_RADIUS * 0.6
+    for i in range(PROJECT_CURVE_COUNT):
+        a = 2 * math.pi * i / PROJECT_CURVE_COUNT
+        center = height + FreeCAD.Vector(ring * math.cos(a), ring * math.sin(a), 0)
+        wires.append(Part.Wire(Part.makeCircle(PROJECT_CURVE_RADIUS / 2, center, normal)))
+    return wires
+
+@tracing.traced("create_curve_projection")
 def create_curve_projection():
-    """创建圆形曲线到球面的投影"""
+    """把一组圆形曲线批量投影到球面（curve_projection：进程池并行 + 结果缓存）"""
     print("\n开始创建曲线投影...")
     try:
+        import curve_projection
         # 1. 创建新文档
         doc_curve = FreeCAD.newDocument("Curve_Projection_Doc")
         print("曲线投影文档创建成功")
@@ -115,38 +130,36 @@ def create_curve_projection():
         doc_curve.recompute()
         print("目标球面创建成功")
 
-        # 3. 创建待投影曲线（直接创建圆形，避免使用Sketcher模块）
-        circle = Part.makeCircle(PROJECT_CURVE_RADIUS, FreeCAD.Vector(0, 0, 5), FreeCAD.Vector(0, 0, 1))
-        wire = Part.Wire(circle)
-        curve_obj = doc_curve.addObject("Part::Feature", "Project_Curve")
-        curve_obj.Shape = wire
-        doc_curve.recompute()
-        print("待投影圆形曲线创建成功")
+        # 3. 创建待投影曲线
+        wires = make_projection_curves()
+        curve_obj = doc_curve.addObject("Part::Feature", "Project_Curves")
+        curve_obj.Shape = Part.makeCompound(wires)
+        print(f"待投影圆形曲线创建成功（{len(wires)} 条）")
 
-        # 4. 执行曲线到曲面的投影
+        # 4. 批量执行曲线到曲面的投影（同一曲线/曲面/方向再次运行时直接取缓存）
         print("开始执行曲线到曲面投影...")
-        # 获取曲线和曲面的Shape对象
-        curve_shape = wire
-        surface_shape = sphere.Shape
-        # 执行投影（最短距离模式，指定方向）
-        projected_shape = Part.makeProjectionOnSurface(curve_shape, surface_shape, PROJECT_DIRECTION)
-        # 创建投影结果对象
+        with tracing.span("project_curves", curves=len(wires)) as sp:
+            result = curve_projection.project(wires, sphere.Shape, PROJECT_DIRECTION)
+            sp.set(mode=result.mode, cached=sum(1 for item in result.items if item["cached"]))
+        for item in result.items:
+            state = "缓存" if item["cached"] else ("成功" if item["ok"] else f"失败: {item['error']}")
+            print(f"  曲线{item['index']}: {state}，{item['seconds'] * 1000:.1f} 毫秒")
         proj_obj = doc_curve.addObject("Part::Feature", "Projected_Curve_Result")
-        proj_obj.Shape = projected_shape
+        proj_obj.Shape = result.compound
         doc_curve.recompute()
-        print("曲线到曲面投影执行成功")
-        
+        print(f"曲线到曲面投影执行完成：{result.summary()}")
+
         # 5. 保存文档
         doc_path = os.path.join(OUTPUT_PATH, "Curve_Projection_Doc.FCStd")
         print(f"准备保存曲线投影文档至: {doc_path}")
         doc_curve.saveAs(doc_path)
         print(f"曲线投影文档已保存至：{doc_path}")
-        
+
         # 清理
         FreeCAD.closeDocument("Curve_Projection_Doc")
         print("曲线投影文档已关闭")
 
-        return True
+        return result.ok
 
     except Exception as e:
         print(f"曲线投影创建失败: {str(e)}")
@@ -154,64 +167,33 @@ def create_curve_projection():
         traceback.print_exc()
         return False
 
-# -------------------------- 功能2：曲线到曲面投影（Part）--------------------------
-def create_curve_projection():
-    """创建圆形曲线到球面的投影"""
-    print("\n开始创建曲线投影...")
+# TechDraw 只在创建工程图时才导入（启动时只检查模块是否存在），不依赖它
+TechDraw = lazy_modules.lazy('TechDraw')
+GUI_UP = getattr(FreeCAD, "GuiUp", False)
+if TechDraw.available and GUI_UP:
+    print("TechDraw模块可用（首次使用时导入）")
+else:
+    print("提示: TechDraw 需要图形界面，2D工程图改用 hidden_line 无界面生成（三视图+虚线）")
+
+# -------------------------- 功能3：无界面三视图（hidden_line）--------------------------
+@tracing.traced("create_three_view_drawing")
+def create_three_view_drawing():
+    """无界面生成立方体三视图（主/俯/右/左视图，隐藏线为虚线），输出 PDF 和 SVG"""
+    print("\n开始生成三视图（hidden_line）...")
     try:
-        # 1. 创建新文档
-        doc_curve = FreeCAD.newDocument("Curve_Projection_Doc")
-        print("曲线投影文档创建成功")
-
-        # 2. 创建目标曲面（球体）
-        sphere = doc_curve.addObject("Part::Sphere", "Target_Sphere")
-        sphere.Radius = SPHERE_RADIUS
-        doc_curve.recompute()
-        print("目标球面创建成功")
-
-        # 3. 创建待投影曲线（在XY平面绘制圆形）
-        sketch = doc_curve.addObject("Sketcher::SketchObject", "Project_Curve")
-        sketch.Support = (doc_curve.getObject("XY_Plane"), [""])  # 绑定XY平面
-        # 绘制圆形：圆心(0,0,5)，法向量(0,0,1)（XY平面），半径PROJECT_CURVE_RADIUS
-        circle = Part.Circle(FreeCAD.Vector(0, 0, 5), FreeCAD.Vector(0, 0, 1), PROJECT_CURVE_RADIUS)
-        sketch.addGeometry(circle)
-        doc_curve.recompute()
-        print("待投影圆形曲线创建成功")
-
-        # 4. 执行曲线到曲面的投影
-        # 获取曲线和曲面的Shape对象
-        curve_shape = sketch.Shape
-        surface_shape = sphere.Shape
-        print("开始执行曲线到曲面投影...")
-        # 执行投影（最短距离模式，指定方向）
-        projected_shape = Part.makeProjectionOnSurface(curve_shape, surface_shape, PROJECT_DIRECTION)
-        # 创建投影结果对象
-        proj_obj = doc_curve.addObject("Part::Feature", "Projected_Curve_Result")
-        proj_obj.Shape = projected_shape
-        doc_curve.recompute()
-        print("曲线到曲面投影执行成功")
-        
-        # 5. 保存文档
-        doc_path = os.path.join(OUTPUT_PATH, "Curve_Projection_Doc.FCStd")
-        print(f"准备保存曲线投影文档至: {doc_path}")
-        doc_curve.saveAs(doc_path)
-        print(f"曲线投影文档已保存至：{doc_path}")
-
-        return doc_curve
-
+        import hidden_line
+        shape = Part.makeBox(CUBE_LENGTH, CUBE_WIDTH, CUBE_HEIGHT)
+        scale = "auto" if DRAWING_SCALE is None else DRAWING_SCALE
+        drawing = hidden_line.from_shape(shape, name="Cube_Model", scale=scale)
+        pdf_path = drawing.write(os.path.join(OUTPUT_PATH, "Cube_Model_3View.pdf"))
+        svg_path = drawing.write(os.path.join(OUTPUT_PATH, "Cube_Model_3View.svg"))
+        print(f"三视图已导出至：{pdf_path} / {svg_path}（{drawing.stats['seconds']:.3f} 秒）")
+        return True
     except Exception as e:
-        print(f"曲线投影创建失败: {str(e)}")
+        print(f"三视图生成失败: {str(e)}")
         import traceback
         traceback.print_exc()
-        return None
-
-# 尝试导入TechDraw模块，但不依赖它
-TechDraw = None
-try:
-    import TechDraw
-    print("TechDraw模块已导入")
-except ImportError:
-    print("警告: TechDraw模块不可用，2D工程图功能将被跳过")
+        return False
 
 # -------------------------- 主程序（执行所有功能）--------------------------
 if __name__ == "__main__":
@@ -229,8 +211,8 @@ if __name__ == "__main__":
     print("\n步骤3: 执行曲线到曲面投影")
     create_curve_projection()
     
-    # 4. 尝试TechDraw功能（如果可用）
-    if TechDraw and hasattr(TechDraw, 'newPage'):
+    # 4. 2D工程图：有界面时用 TechDraw，无界面时用 hidden_line 生成三视图
+    if TechDraw.available and GUI_UP:
         print("\n步骤4: 尝试2D工程图创建（可能在命令行模式下受限）")
         try:
             # 创建新文档
@@ -259,8 +241,10 @@ if __name__ == "__main__":
             FreeCAD.closeDocument("2D_Doc")
         except Exception as e:
             print(f"TechDraw操作失败: {str(e)}")
+            create_three_view_drawing()
     else:
-        print("\n步骤4: 跳过2D工程图创建（TechDraw模块不可用或在命令行模式下受限）")
+        print("\n步骤4: 无界面生成三视图（TechDraw 不可用或在命令行模式下受限）")
+        create_three_view_drawing()
 
     print("\n" + "="*50)
     print("脚本执行完成！")
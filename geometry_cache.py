@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed cache for create_cube outputs (.FCStd / .stl).
+
+Entries are keyed by a SHA-256 of the normalized part parameters (see
+create_cube.canonical_params: dimensions, placement, hole, mesh deflection)
+plus the FreeCAD version that produced them. A hit is served by hard-linking
+(or copying, when linking is not possible) the stored files to the requested
+output paths, so no FreeCAD process is needed at all.
+
+Plain Python (FreeCAD not required):
+  cache = GeometryCache(r'd:\\FreeCad\\.cache\\geometry', max_bytes=2 << 30)
+  if not cache.fetch(params, version, fcstd_path, stl_path):
+      ... build with FreeCAD ...
+      cache.store(params, version, fcstd_path, stl_path)
+  print(cache.stats())
+
+The index lives in SQLite next to the blobs; least recently used entries are
+evicted once the stored bytes exceed max_bytes. Hard-linked outputs share
+their data with the cache, so they must be replaced rather than edited in place
+(pass link=False to always copy).
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from output_files import link_or_copy
+
+# Bump when the stored layout, the key derivation or the produced outputs change.
+CACHE_FORMAT = 3
+DEFAULT_MAX_BYTES = 1 << 30
+_ARTIFACTS = ('fcstd', 'stl')
+_FILENAMES = {'fcstd': 'part.FCStd', 'stl': 'part.stl'}
+
+
+def cache_key(params: dict, freecad_version: str) -> str:
+    """Canonical hash of normalized parameters and the FreeCAD version."""
+    payload = json.dumps({'format': CACHE_FORMAT, 'freecad': freecad_version, 'params': params},
+                         sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class GeometryCache:
+    """LRU, size-bounded store of built parts keyed by cache_key()."""
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES, link: bool = True):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.link = link
+        os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(root, 'index.sqlite3'), check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, size INTEGER, '
+                         'last_used REAL, fcstd INTEGER, stl INTEGER, params TEXT)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, 'objects', key[:2], key)
+
+    # ---- lookups ----
+    def fetch(self, params: dict, freecad_version: str, fcstd_path: str = None, stl_path: str = None) -> bool:
+        """Serve the requested outputs from the cache; False (a miss) if any is missing."""
+        key = cache_key(params, freecad_version)
+        wanted = {a: p for a, p in (('fcstd', fcstd_path), ('stl', stl_path)) if p}
+        with self._lock:
+            row = self._db.execute('SELECT fcstd, stl FROM entries WHERE key=?', (key,)).fetchone()
+            have = dict(zip(_ARTIFACTS, row)) if row else {}
+            if not wanted or not all(have.get(a) for a in wanted):
+                self.misses += 1
+                return False
+            try:
+                for artifact, dst in wanted.items():
+                    link_or_copy(os.path.join(self._entry_dir(key), _FILENAMES[artifact]), dst, self.link)
+            except OSError:
+                # blob vanished underneath us: drop the entry and rebuild
+                self._drop(key)
+                self.misses += 1
+                return False
+            self._db.execute('UPDATE entries SET last_used=? WHERE key=?', (time.time(), key))
+            self._db.commit()
+            self.hits += 1
+            return True
+
+    def store(self, params: dict, freecad_version: str, fcstd_path: str = None, stl_path: str = None) -> str:
+        """Copy freshly built outputs into the cache; returns the entry key."""
+        key = cache_key(params, freecad_version)
+        folder = self._entry_dir(key)
+        with self._lock:
+            os.makedirs(folder, exist_ok=True)
+            row = self._db.execute('SELECT fcstd, stl FROM entries WHERE key=?', (key,)).fetchone()
+            have = dict(zip(_ARTIFACTS, row)) if row else {}
+            for artifact, src in (('fcstd', fcstd_path), ('stl', stl_path)):
+                if src and os.path.isfile(src):
+                    # always copy in: the caller may overwrite its output later
+                    link_or_copy(src, os.path.join(folder, _FILENAMES[artifact]), link=False)
+                    have[artifact] = 1
+            size = sum(os.path.getsize(os.path.join(folder, _FILENAMES[a])) for a in _ARTIFACTS if have.get(a))
+            self._db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                             (key, size, time.time(), int(bool(have.get('fcstd'))), int(bool(have.get('stl'))),
+                              json.dumps(params, sort_keys=True)))
+            self._db.commit()
+            self.stores += 1
+            self._evict()
+        return key
+
+    # ---- eviction ----
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def _drop(self, key: str):
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        self._db.execute('DELETE FROM entries WHERE key=?', (key,))
+        self._db.commit()
+
+    def _evict(self):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute('SELECT key, size FROM entries ORDER BY last_used').fetchall():
+            if total <= self.max_bytes:
+                break
+            self._drop(key)
+            total -= size
+            self.evictions += 1
+
+    # ---- misc ----
+    def get_meta(self, name: str):
+        with self._lock:
+            row = self._db.execute('SELECT value FROM meta WHERE name=?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (name, value))
+            self._db.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores,
+                'evictions': self.evictions, 'entries': entries, 'bytes': self.total_bytes(),
+                'max_bytes': self.max_bytes}
+
+
+def executable_fingerprint(path: str) -> str:
+    """Identity of a FreeCADCmd binary (path, size, mtime); changes when FreeCAD is upgraded."""
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    return f"{real}|{st.st_size}|{st.st_mtime_ns}"
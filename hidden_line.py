@@ -0,0 +1,771 @@
+# -*- coding: utf-8 -*-
+"""
+Headless three-view drawings (SVG / PDF) with hidden-line removal.
+
+TechDraw.makeProjectionGroup needs the GUI, so batch servers cannot produce
+the 2D drawings. This module projects the edges of a body orthographically
+into Front / Top / Right / Left views, classifies every piece of every edge
+as visible or hidden against the body's triangles, and lays the views out on
+an A4/A3 page with a title block (visible lines solid, hidden lines dashed):
+
+  import hidden_line
+  drawing = hidden_line.from_shape(obj.Shape, name=obj.Label)   # BREP edges + silhouettes
+  drawing.write('part.pdf')                                     # or .svg
+  drawing = hidden_line.from_stl('part.stl')                    # mesh input, no FreeCAD needed
+
+Edges: BREP edges are discretized (seam edges skipped); mesh input uses its
+boundary and crease edges (dihedral angle above crease_deg). Each view adds
+the silhouette of smooth surfaces (mesh edges whose two triangles face
+opposite ways), which is how cylinders and spheres get their outlines.
+
+Hidden lines: edges are cut into pieces no longer than the body's diagonal /
+resolution; a piece is hidden when a triangle lies in front of its midpoint
+(by more than depth_tolerance). The depth test runs against a bounding
+volume hierarchy over the triangles, built once per body and reused for all
+axis-aligned views, and is evaluated for all pieces of a view at once with
+NumPy.
+
+Layout follows first-angle projection by default (projection='third' for
+third-angle); scale='auto' picks the largest standard scale that fits.
+
+Command line (plain Python with NumPy, or FreeCADCmd for .FCStd/.step):
+  python hidden_line.py part.stl [more.stl ...] [--out-dir DIR] [--format pdf|svg]
+         [--views front,top,right,left] [--projection first|third] [--scale auto|0.5]
+         [--page A4|A3] [--workers N] [--no-hidden]
+"""
+from __future__ import annotations
+import math
+import os
+import sys
+import time
+import zlib
+from datetime import date
+
+import numpy as np
+
+# view name -> (viewing direction, screen right, screen up) in model coordinates
+VIEWS = {
+    'front': ((0.0, 1.0, 0.0), (1.0, 0.0, 0.0), (0.0, 0.0, 1.0)),
+    'top': ((0.0, 0.0, -1.0), (1.0, 0.0, 0.0), (0.0, 1.0, 0.0)),
+    'right': ((-1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0)),
+    'left': ((1.0, 0.0, 0.0), (0.0, -1.0, 0.0), (0.0, 0.0, 1.0)),
+    'rear': ((0.0, -1.0, 0.0), (-1.0, 0.0, 0.0), (0.0, 0.0, 1.0)),
+    'bottom': ((0.0, 0.0, 1.0), (1.0, 0.0, 0.0), (0.0, -1.0, 0.0)),
+}
+DEFAULT_VIEWS = ('front', 'top', 'right', 'left')
+# (column, row) of each view on the page, rows counted from the top
+LAYOUTS = {
+    'first': {'front': (1, 0), 'top': (1, 1), 'left': (2, 0), 'right': (0, 0), 'bottom': (1, -1), 'rear': (3, 0)},
+    'third': {'front': (1, 1), 'top': (1, 0), 'left': (0, 1), 'right': (2, 1), 'bottom': (1, 2), 'rear': (3, 1)},
+}
+PAGES = {'A4': (297.0, 210.0), 'A3': (420.0, 297.0)}  # landscape, mm
+STANDARD_SCALES = (50, 20, 10, 5, 2, 1, 0.5, 0.2, 0.1, 0.05, 0.02, 0.01, 0.005, 0.002, 0.001)
+MARGIN = 10.0
+GAP = 12.0
+LABEL_HEIGHT = 6.0
+TITLE_BLOCK = (120.0, 24.0)
+VISIBLE_WIDTH = 0.35
+HIDDEN_WIDTH = 0.18
+HIDDEN_DASH = (2.0, 1.0)
+
+
+# -------------------------- mesh topology --------------------------
+class Mesh:
+    """Triangles of a body plus the edge/face adjacency needed for creases and silhouettes."""
+
+    def __init__(self, vertices, facets):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3)
+        self.facets = np.ascontiguousarray(facets, dtype=np.int64).reshape(-1, 3)
+        tri = self.vertices[self.facets]
+        n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+        length = np.linalg.norm(n, axis=1)
+        keep = length > 0
+        if not keep.all():  # drop degenerate triangles
+            self.facets, tri, n, length = self.facets[keep], tri[keep], n[keep], length[keep]
+        self.triangles = tri
+        self.normals = n / length[:, None]
+        # every triangle edge once as (low vertex, high vertex), grouped to find neighbours
+        e = np.concatenate([self.facets[:, [0, 1]], self.facets[:, [1, 2]], self.facets[:, [2, 0]]])
+        face = np.tile(np.arange(len(self.facets)), 3)
+        e.sort(axis=1)
+        order = np.lexsort((e[:, 1], e[:, 0]))
+        e, face = e[order], face[order]
+        start = np.ones(len(e), dtype=bool)
+        start[1:] = (e[1:] != e[:-1]).any(axis=1)
+        first = np.flatnonzero(start)
+        counts = np.diff(np.append(first, len(e)))
+        self.edges = e[first]
+        pair = np.full((len(first), 2), -1, dtype=np.int64)
+        pair[:, 0] = face[first]
+        two = counts >= 2
+        pair[two, 1] = face[first[two] + 1]
+        self.edge_faces = pair
+        self.edge_open = counts != 2  # boundary or non-manifold
+        cos = np.ones(len(first))
+        cos[two] = np.einsum('ij,ij->i', self.normals[pair[two, 0]], self.normals[pair[two, 1]])
+        self.edge_cos = cos
+
+    @property
+    def diagonal(self) -> float:
+        if len(self.vertices) == 0:
+            return 0.0
+        return float(np.linalg.norm(self.vertices.max(axis=0) - self.vertices.min(axis=0)))
+
+    def feature_edges(self, crease_deg=30.0):
+        """(S, 2, 3) segments: boundary/non-manifold edges and creases sharper than crease_deg."""
+        sharp = self.edge_open | (self.edge_cos < math.cos(math.radians(crease_deg)))
+        return self.vertices[self.edges[sharp]]
+
+    def silhouette(self, direction, crease_deg=30.0):
+        """(S, 2, 3) segments where a smooth surface turns away from direction."""
+        smooth = ~self.edge_open & (self.edge_cos >= math.cos(math.radians(crease_deg)))
+        facing = self.normals @ np.asarray(direction, dtype=np.float64)
+        f = self.edge_faces[smooth]
+        turn = np.sign(facing[f[:, 0]]) != np.sign(facing[f[:, 1]])
+        return self.vertices[self.edges[smooth][turn]]
+
+
+# -------------------------- BVH --------------------------
+def _spread_bits(x):
+    """Interleave the low 10 bits of x with two zero bits each (for 30-bit Morton codes)."""
+    x = x.astype(np.uint64) & np.uint64(0x3FF)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x30000FF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x300F00F)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x30C30C3)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x9249249)
+    return x
+
+
+class BVH:
+    """Bounding volume hierarchy over triangles, built without a Python loop per node.
+
+    Triangles are sorted along a Morton (Z-order) curve of their centroids, cut into
+    leaves of leaf_size, and the leaves are merged pairwise level by level, so the
+    build is a handful of vectorized passes even for a few hundred thousand triangles.
+    Nodes live in flat arrays; leaves hold the slice start:end of the sorted triangles.
+    """
+
+    def __init__(self, triangles, leaf_size=16):
+        tri = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        self.triangles = tri
+        n = len(tri)
+        if n == 0:
+            self.order = np.zeros(0, dtype=np.int64)
+            self.lo = self.hi = np.zeros((0, 3))
+            self.left = self.right = self.start = self.end = np.zeros(0, dtype=np.int64)
+            self.root = -1
+            return
+        lo_t, hi_t = tri.min(axis=1), tri.max(axis=1)
+        centroid = 0.5 * (lo_t + hi_t)
+        c0 = centroid.min(axis=0)
+        extent = np.maximum(centroid.max(axis=0) - c0, 1e-300)
+        q = np.clip(((centroid - c0) / extent * 1023.0).astype(np.int64), 0, 1023)
+        codes = (_spread_bits(q[:, 0]) << np.uint64(2)) | (_spread_bits(q[:, 1]) << np.uint64(1)) | _spread_bits(q[:, 2])
+        order = np.argsort(codes, kind='stable')
+        lo_s, hi_s = lo_t[order], hi_t[order]
+        starts = np.arange(0, n, leaf_size)
+        ends = np.minimum(starts + leaf_size, n)
+        lo_lvl = np.minimum.reduceat(lo_s, starts, axis=0)
+        hi_lvl = np.maximum.reduceat(hi_s, starts, axis=0)
+        ids = np.arange(len(starts))
+        los, his = [lo_lvl], [hi_lvl]
+        lefts, rights = [np.full(len(starts), -1)], [np.full(len(starts), -1)]
+        starts_all, ends_all = [starts], [ends]
+        next_id = len(starts)
+        while len(ids) > 1:
+            pairs = len(ids) // 2
+            new_lo = np.minimum(lo_lvl[0:2 * pairs:2], lo_lvl[1:2 * pairs:2])
+            new_hi = np.maximum(hi_lvl[0:2 * pairs:2], hi_lvl[1:2 * pairs:2])
+            new_ids = np.arange(next_id, next_id + pairs)
+            los.append(new_lo)
+            his.append(new_hi)
+            lefts.append(ids[0:2 * pairs:2])
+            rights.append(ids[1:2 * pairs:2])
+            starts_all.append(np.full(pairs, -1))
+            ends_all.append(np.full(pairs, -1))
+            next_id += pairs
+            if len(ids) % 2:  # the odd node moves up a level unchanged
+                new_ids = np.append(new_ids, ids[-1])
+                new_lo = np.vstack([new_lo, lo_lvl[-1:]])
+                new_hi = np.vstack([new_hi, hi_lvl[-1:]])
+            ids, lo_lvl, hi_lvl = new_ids, new_lo, new_hi
+        self.order = order
+        self.lo = np.concatenate(los)
+        self.hi = np.concatenate(his)
+        self.left = np.concatenate(lefts).astype(np.int64)
+        self.right = np.concatenate(rights).astype(np.int64)
+        self.start = np.concatenate(starts_all).astype(np.int64)
+        self.end = np.concatenate(ends_all).astype(np.int64)
+        self.root = int(ids[0])
+
+    def __len__(self):
+        return len(self.lo)
+
+
+def _axis_frame(right, up, direction):
+    """(axes, signs) if the view frame is a signed permutation of the model axes, else None."""
+    axes, signs = [], []
+    for vec in (right, up, direction):
+        v = np.asarray(vec, dtype=np.float64)
+        k = int(np.argmax(np.abs(v)))
+        if abs(abs(v[k]) - 1.0) > 1e-12:
+            return None
+        axes.append(k)
+        signs.append(1.0 if v[k] > 0 else -1.0)
+    return axes, np.array(signs)
+
+
+class _ViewBVH:
+    """A BVH seen in view coordinates (x right, y up, z depth away from the viewer)."""
+
+    def __init__(self, bvh, frame=None, rotation=None, leaf_size=16):
+        if frame is not None:
+            # reuse the model-space tree: view boxes are the model boxes with axes permuted/flipped
+            axes, signs = frame
+            lo, hi = bvh.lo[:, axes] * signs, bvh.hi[:, axes] * signs
+            self.lo, self.hi = np.minimum(lo, hi), np.maximum(lo, hi)
+            tri = bvh.triangles[:, :, axes] * signs
+            self.tree = bvh
+        else:
+            tri = bvh.triangles @ rotation.T
+            self.tree = BVH(tri, leaf_size)
+            self.lo, self.hi = self.tree.lo, self.tree.hi
+        tri = tri[self.tree.order]
+        # per-triangle 2D barycentric setup, in tree order so leaves are contiguous slices
+        a, b, c = tri[:, 0], tri[:, 1], tri[:, 2]
+        self.a = a
+        self.v0 = b[:, :2] - a[:, :2]
+        self.v1 = c[:, :2] - a[:, :2]
+        self.dz = np.stack([b[:, 2] - a[:, 2], c[:, 2] - a[:, 2]], axis=1)
+        det = self.v0[:, 0] * self.v1[:, 1] - self.v1[:, 0] * self.v0[:, 1]
+        scale = np.maximum(np.abs(self.v0).max(axis=1), np.abs(self.v1).max(axis=1)) ** 2
+        self.edge_on = np.abs(det) <= 1e-12 * np.maximum(scale, 1e-300)
+        self.inv_det = np.where(self.edge_on, 0.0, 1.0 / np.where(self.edge_on, 1.0, det))
+
+    def occluded(self, points, tolerance):
+        """Bool per point (x, y, depth): some triangle lies in front of it by more than tolerance."""
+        hidden = np.zeros(len(points), dtype=bool)
+        if len(self.lo) == 0 or len(points) == 0:
+            return hidden
+        t = self.tree
+        px, py, pz = points[:, 0], points[:, 1], points[:, 2]
+        stack = [(t.root, np.arange(len(points)))]
+        while stack:
+            node, idx = stack.pop()
+            idx = idx[~hidden[idx]]
+            if len(idx) == 0:
+                continue
+            lo, hi = self.lo[node], self.hi[node]
+            inside = ((px[idx] >= lo[0]) & (px[idx] <= hi[0]) & (py[idx] >= lo[1]) & (py[idx] <= hi[1])
+                      & (pz[idx] - tolerance > lo[2]))
+            idx = idx[inside]
+            if len(idx) == 0:
+                continue
+            if t.left[node] >= 0:
+                stack.append((t.right[node], idx))
+                stack.append((t.left[node], idx))
+                continue
+            s, e = t.start[node], t.end[node]
+            # (points, leaf triangles) barycentric coordinates and depths
+            dx = px[idx, None] - self.a[None, s:e, 0]
+            dy = py[idx, None] - self.a[None, s:e, 1]
+            u = (dx * self.v1[None, s:e, 1] - dy * self.v1[None, s:e, 0]) * self.inv_det[None, s:e]
+            v = (dy * self.v0[None, s:e, 0] - dx * self.v0[None, s:e, 1]) * self.inv_det[None, s:e]
+            eps = -1e-9
+            inside = (u >= eps) & (v >= eps) & (u + v <= 1.0 - eps) & ~self.edge_on[None, s:e]
+            depth = self.a[None, s:e, 2] + u * self.dz[None, s:e, 0] + v * self.dz[None, s:e, 1]
+            hit = (inside & (depth < pz[idx, None] - tolerance)).any(axis=1)
+            hidden[idx[hit]] = True
+        return hidden
+
+
+# -------------------------- projection --------------------------
+class View:
+    """Visible and hidden polylines of one view, in model units (x right, y up)."""
+
+    def __init__(self, name, visible, hidden, stats):
+        self.name = name
+        self.visible = visible
+        self.hidden = hidden
+        self.stats = stats
+
+    def bounds(self):
+        pts = [p for p in self.visible + self.hidden if len(p)]
+        if not pts:
+            return (0.0, 0.0, 0.0, 0.0)
+        allp = np.concatenate(pts)
+        (x0, y0), (x1, y1) = allp.min(axis=0), allp.max(axis=0)
+        return float(x0), float(y0), float(x1), float(y1)
+
+
+def _segments(polylines):
+    segs = [np.stack([p[:-1], p[1:]], axis=1) for p in polylines if len(p) >= 2]
+    return np.concatenate(segs) if segs else np.zeros((0, 2, 3))
+
+
+def _runs(seg2, n_sub, hidden, starts):
+    """Cut 2D segments into n_sub pieces each and merge neighbouring pieces of the same class.
+
+    starts marks the segments that do not continue the previous one (new polyline).
+    Returns (visible polylines, hidden polylines) as lists of (N, 2) arrays. Within a run only
+    the segment ends and the run's own ends are kept: the pieces of one segment are collinear.
+    """
+    seg_of_piece = np.repeat(np.arange(len(seg2)), n_sub)
+    k = np.arange(len(seg_of_piece)) - np.repeat(np.cumsum(n_sub) - n_sub, n_sub)
+    nn = n_sub[seg_of_piece]
+    a, b = seg2[seg_of_piece, 0], seg2[seg_of_piece, 1]
+    p0 = a + (b - a) * (k / nn)[:, None]
+    p1 = a + (b - a) * ((k + 1) / nn)[:, None]
+    new_run = np.ones(len(p0), dtype=bool)
+    new_run[1:] = (hidden[1:] != hidden[:-1]) | ((k[1:] == 0) & starts[seg_of_piece[1:]])
+    visible_runs, hidden_runs = [], []
+    bounds = np.append(np.flatnonzero(new_run), len(p0))
+    keep = k == nn - 1
+    keep[bounds[1:] - 1] = True
+    for i in range(len(bounds) - 1):
+        s, e = bounds[i], bounds[i + 1]
+        line = np.concatenate([p0[s:s + 1], p1[s:e][keep[s:e]]])
+        (hidden_runs if hidden[s] else visible_runs).append(line)
+    return visible_runs, hidden_runs
+
+
+class Projector:
+    """Projects one body into views; the BVH and the mesh topology are shared by all views."""
+
+    def __init__(self, mesh: Mesh, edges=None, crease_deg=30.0, resolution=400, depth_tolerance=None,
+                 leaf_size=16):
+        t0 = time.perf_counter()
+        self.mesh = mesh
+        self.crease_deg = crease_deg
+        diag = mesh.diagonal or 1.0
+        self.piece = diag / float(resolution)
+        self.tolerance = depth_tolerance if depth_tolerance is not None else diag * 1e-4
+        if edges is None:
+            self.edge_segments = mesh.feature_edges(crease_deg)
+            self.edge_starts = np.ones(len(self.edge_segments), dtype=bool)
+        else:
+            self.edge_segments = _segments(edges)
+            starts = [np.r_[True, np.zeros(len(p) - 2, dtype=bool)] for p in edges if len(p) >= 2]
+            self.edge_starts = np.concatenate(starts) if starts else np.zeros(0, dtype=bool)
+        self.leaf_size = leaf_size
+        self.bvh = BVH(mesh.triangles, leaf_size)
+        self.build_seconds = time.perf_counter() - t0
+
+    def view(self, name, hidden_lines=True) -> View:
+        t0 = time.perf_counter()
+        direction, right, up = (np.asarray(v, dtype=np.float64) for v in VIEWS[name])
+        rotation = np.stack([right, up, direction])
+        frame = _axis_frame(right, up, direction)
+        tree = _ViewBVH(self.bvh, frame=frame, rotation=rotation, leaf_size=self.leaf_size)
+        sil = self.mesh.silhouette(direction, self.crease_deg)
+        seg = np.concatenate([self.edge_segments, sil]) if len(sil) else self.edge_segments
+        starts = np.concatenate([self.edge_starts, np.ones(len(sil), dtype=bool)])
+        seg = seg @ rotation.T  # (S, 2, 3) in view coordinates
+        length2 = np.linalg.norm(seg[:, 1, :2] - seg[:, 0, :2], axis=1)
+        keep = length2 > self.piece * 1e-3  # edges seen end-on project to points
+        # a dropped segment breaks its polyline
+        broken = np.r_[False, ~keep[:-1]] if len(keep) else keep
+        seg, length2, starts = seg[keep], length2[keep], (starts | broken)[keep]
+        n_sub = np.maximum(1, np.ceil(length2 / self.piece).astype(np.int64))
+        seg_of_piece = np.repeat(np.arange(len(seg)), n_sub)
+        k = np.arange(len(seg_of_piece)) - np.repeat(np.cumsum(n_sub) - n_sub, n_sub)
+        t = ((k + 0.5) / n_sub[seg_of_piece])[:, None]
+        mids = seg[seg_of_piece, 0] + (seg[seg_of_piece, 1] - seg[seg_of_piece, 0]) * t
+        if hidden_lines:
+            hidden = tree.occluded(mids, self.tolerance)
+        else:
+            hidden = np.zeros(len(mids), dtype=bool)
+        visible_runs, hidden_runs = _runs(seg[:, :, :2], n_sub, hidden, starts)
+        if not hidden_lines:
+            hidden_runs = []
+        stats = {'segments': int(len(seg)), 'silhouette': int(len(sil)), 'pieces': int(len(mids)),
+                 'hidden_pieces': int(hidden.sum()), 'seconds': time.perf_counter() - t0}
+        return View(name, visible_runs, hidden_runs, stats)
+
+
+# -------------------------- page --------------------------
+def _fmt_scale(scale):
+    if scale >= 1:
+        return '%g:1' % scale
+    return '1:%g' % round(1.0 / scale, 6)
+
+
+class Drawing:
+    """Views of one body laid out on a page; write() produces SVG or PDF."""
+
+    def __init__(self, name, views, page='A4', scale='auto', projection='first', stats=None):
+        if projection not in LAYOUTS:
+            raise ValueError(f"projection must be 'first' or 'third', not {projection!r}")
+        self.name = name
+        self.views = views
+        self.page = page
+        self.width, self.height = PAGES[page] if isinstance(page, str) else page
+        self.projection = projection
+        self.stats = stats or {}
+        self._place(scale)
+
+    def _place(self, scale):
+        layout = LAYOUTS[self.projection]
+        cells = {}
+        for v in self.views:
+            col, row = layout.get(v.name, (len(cells) + 4, 0))
+            cells[v.name] = (col, row, v.bounds())
+        cols = sorted({c for c, _r, _b in cells.values()})
+        rows = sorted({r for _c, r, _b in cells.values()})
+        col_w = {c: max(b[2] - b[0] for cc, _r, b in cells.values() if cc == c) for c in cols}
+        row_h = {r: max(b[3] - b[1] for _c, rr, b in cells.values() if rr == r) for r in rows}
+        area_w = self.width - 2 * MARGIN
+        area_h = self.height - 2 * MARGIN - TITLE_BLOCK[1]
+        fixed_w = GAP * (len(cols) - 1)
+        fixed_h = (GAP + LABEL_HEIGHT) * len(rows) - GAP
+        model_w = sum(col_w.values()) or 1.0
+        model_h = sum(row_h.values()) or 1.0
+        fit = min((area_w - fixed_w) / model_w, (area_h - fixed_h) / model_h)
+        if scale == 'auto' or scale is None:
+            scale = next((s for s in STANDARD_SCALES if s <= fit), STANDARD_SCALES[-1])
+        self.scale = float(scale)
+        total_w = self.scale * model_w + fixed_w
+        total_h = self.scale * model_h + fixed_h
+        x = MARGIN + (area_w - total_w) / 2.0
+        col_x = {}
+        for c in cols:
+            col_x[c] = x
+            x += self.scale * col_w[c] + GAP
+        y = self.height - MARGIN - (area_h - total_h) / 2.0  # page y grows upwards
+        row_y = {}
+        for r in rows:
+            row_y[r] = y  # top edge of the row
+            y -= self.scale * row_h[r] + GAP + LABEL_HEIGHT
+        self.placements = {}
+        for v in self.views:
+            col, row, (x0, y0, x1, y1) = cells[v.name]
+            # centre the view in its cell: views sharing a row or column stay aligned
+            cx = col_x[col] + self.scale * col_w[col] / 2.0
+            cy = row_y[row] - self.scale * row_h[row] / 2.0
+            ox = cx - self.scale * (x0 + x1) / 2.0
+            oy = cy - self.scale * (y0 + y1) / 2.0
+            self.placements[v.name] = (ox, oy, cx, cy - self.scale * (y1 - y0) / 2.0 - LABEL_HEIGHT + 1.5)
+
+    def _page_lines(self, view, kind):
+        ox, oy, _lx, _ly = self.placements[view.name]
+        return [p * self.scale + (ox, oy) for p in getattr(view, kind)]
+
+    def _title_lines(self):
+        tw, th = TITLE_BLOCK
+        x0, y0 = self.width - MARGIN - tw, MARGIN
+        frame = [(MARGIN, MARGIN, self.width - MARGIN, self.height - MARGIN),
+                 (x0, y0, self.width - MARGIN, y0 + th)]
+        rows = [(x0, y0 + th / 2.0, self.width - MARGIN, y0 + th / 2.0),
+                (x0 + tw / 2.0, y0, x0 + tw / 2.0, y0 + th / 2.0)]
+        texts = [(x0 + 3, y0 + th * 0.75 - 1.5, 5.0, str(self.name)),
+                 (x0 + 3, y0 + th * 0.25 - 1.5, 3.5, 'Scale %s   %s angle' % (_fmt_scale(self.scale), self.projection)),
+                 (x0 + tw / 2.0 + 3, y0 + th * 0.25 - 1.5, 3.5, date.today().isoformat())]
+        return frame, rows, texts
+
+    # ---- SVG ----
+    def to_svg(self) -> str:
+        H = self.height
+
+        def path(lines):
+            parts = []
+            for line in lines:
+                pts = ' L'.join('%.3f %.3f' % (x, H - y) for x, y in line)
+                parts.append('M' + pts)
+            return ' '.join(parts)
+
+        out = ['<?xml version="1.0" encoding="UTF-8"?>',
+               f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.width:g}mm" height="{H:g}mm" '
+               f'viewBox="0 0 {self.width:g} {H:g}">',
+               f'<title>{_xml(self.name)}</title>',
+               '<g fill="none" stroke="#000" stroke-linecap="round" stroke-linejoin="round">']
+        frame, rows, texts = self._title_lines()
+        for x0, y0, x1, y1 in frame:
+            out.append(f'<rect x="{x0:.3f}" y="{H - y1:.3f}" width="{x1 - x0:.3f}" height="{y1 - y0:.3f}" '
+                       f'stroke-width="0.5"/>')
+        for x0, y0, x1, y1 in rows:
+            out.append(f'<line x1="{x0:.3f}" y1="{H - y0:.3f}" x2="{x1:.3f}" y2="{H - y1:.3f}" stroke-width="0.25"/>')
+        for v in self.views:
+            hidden = self._page_lines(v, 'hidden')
+            if hidden:
+                out.append(f'<path class="hidden {v.name}" stroke-width="{HIDDEN_WIDTH}" '
+                           f'stroke-dasharray="{HIDDEN_DASH[0]:g},{HIDDEN_DASH[1]:g}" d="{path(hidden)}"/>')
+            visible = self._page_lines(v, 'visible')
+            if visible:
+                out.append(f'<path class="visible {v.name}" stroke-width="{VISIBLE_WIDTH}" d="{path(visible)}"/>')
+        out.append('</g>')
+        out.append('<g font-family="Helvetica, Arial, sans-serif" fill="#000">')
+        for v in self.views:
+            _ox, _oy, lx, ly = self.placements[v.name]
+            out.append(f'<text x="{lx:.3f}" y="{H - ly:.3f}" font-size="3.5" text-anchor="middle">'
+                       f'{v.name.upper()}</text>')
+        for x, y, size, text in texts:
+            out.append(f'<text x="{x:.3f}" y="{H - y:.3f}" font-size="{size:g}">{_xml(text)}</text>')
+        out.append('</g>')
+        out.append('</svg>')
+        return '\n'.join(out) + '\n'
+
+    # ---- PDF ----
+    def pdf_content(self) -> bytes:
+        """Page content stream in mm (the caller scales to points)."""
+        out = ['1 J 1 j']
+
+        def lines(polylines):
+            for line in polylines:
+                out.append('%.3f %.3f m' % tuple(line[0]))
+                out.extend('%.3f %.3f l' % (x, y) for x, y in line[1:])
+            out.append('S')
+
+        frame, rows, texts = self._title_lines()
+        out.append('0.5 w')
+        out.extend('%.3f %.3f %.3f %.3f re S' % (x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in frame)
+        out.append('0.25 w')
+        out.extend('%.3f %.3f m %.3f %.3f l S' % r for r in rows)
+        for v in self.views:
+            hidden = self._page_lines(v, 'hidden')
+            if hidden:
+                out.append('%g w [%g %g] 0 d' % (HIDDEN_WIDTH, HIDDEN_DASH[0], HIDDEN_DASH[1]))
+                lines(hidden)
+            visible = self._page_lines(v, 'visible')
+            if visible:
+                out.append('%g w [] 0 d' % VISIBLE_WIDTH)
+                lines(visible)
+        for v in self.views:
+            _ox, _oy, lx, ly = self.placements[v.name]
+            label = v.name.upper()
+            # Helvetica capitals are about 0.67 em wide: centre the label roughly
+            out.append('BT /F1 3.5 Tf %.3f %.3f Td (%s) Tj ET' % (lx - 0.33 * 3.5 * len(label), ly, _pdf_text(label)))
+        for x, y, size, text in texts:
+            out.append('BT /F1 %g Tf %.3f %.3f Td (%s) Tj ET' % (size, x, y, _pdf_text(text)))
+        return '\n'.join(out).encode('latin-1', 'replace')
+
+    def write(self, path):
+        """Write the page as .svg or .pdf (by extension); returns path."""
+        ext = os.path.splitext(path)[1].lower()
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        if ext == '.svg':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.to_svg())
+        elif ext == '.pdf':
+            write_pdf(path, [self])
+        else:
+            raise ValueError(f'unsupported drawing format {ext!r} (use .svg or .pdf)')
+        return path
+
+
+def _xml(text):
+    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _pdf_text(text):
+    return str(text).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path, drawings):
+    """One PDF with a page per drawing (vector lines, compressed content, Helvetica labels)."""
+    k = 72.0 / 25.4
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for d in drawings:
+        content = zlib.compress(b'%.6f 0 0 %.6f 0 0 cm\n' % (k, k) + d.pdf_content())
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(content) + content + b'\nendstream')
+        content_id = len(objects)
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R '
+                       b'/Resources << /Font << /F1 3 0 R >> >> >>' % (d.width * k, d.height * k, content_id))
+        kids.append(len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % i for i in kids), len(kids))
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % i + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % o for o in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+    return path
+
+
+# -------------------------- entry points --------------------------
+def render(mesh: Mesh, edges=None, name='Part', views=DEFAULT_VIEWS, hidden_lines=True, crease_deg=30.0,
+           resolution=400, depth_tolerance=None, page='A4', scale='auto', projection='first') -> Drawing:
+    """Drawing of a body given as a Mesh plus optional model edges (list of (N, 3) polylines)."""
+    t0 = time.perf_counter()
+    projector = Projector(mesh, edges, crease_deg, resolution, depth_tolerance)
+    built = [projector.view(v, hidden_lines) for v in views]
+    stats = {'triangles': int(len(mesh.triangles)), 'bvh_nodes': len(projector.bvh),
+             'build_seconds': projector.build_seconds,
+             'views': {v.name: v.stats for v in built}, 'seconds': time.perf_counter() - t0}
+    return Drawing(name, built, page=page, scale=scale, projection=projection, stats=stats)
+
+
+def shape_edges(shape, deflection):
+    """Discretized BREP edges of a Part.Shape, without the seam edges of closed faces."""
+    seams = set()
+    try:
+        if shape.Solids:
+            # edge -> faces map built once from face.Edges (ancestorsOfType rebuilds it per call);
+            # hashCode() ignores orientation, isSame() settles collisions
+            faces_of = {}
+            for fi, face in enumerate(shape.Faces):
+                for fe in face.Edges:
+                    bucket = faces_of.setdefault(fe.hashCode(), [])
+                    for edge, faces in bucket:
+                        if edge.isSame(fe):
+                            faces.add(fi)
+                            break
+                    else:
+                        bucket.append((fe, {fi}))
+            for i, e in enumerate(shape.Edges):
+                faces = next((f for edge, f in faces_of.get(e.hashCode(), ()) if edge.isSame(e)), ())
+                # a seam borders a single face (twice); ordinary solid edges border two
+                if len(faces) == 1:
+                    seams.add(i)
+    except Exception:
+        seams = set()
+    lines = []
+    for i, e in enumerate(shape.Edges):
+        if i in seams:
+            continue
+        try:
+            pts = e.discretize(Deflection=deflection)
+        except Exception:
+            pts = [v.Point for v in e.Vertexes]
+        if len(pts) >= 2:
+            lines.append(np.array([(p.x, p.y, p.z) for p in pts], dtype=np.float64))
+    return lines
+
+
+def from_shape(shape, name='Part', linear_deflection=None, angular_deflection=0.3, **kwargs) -> Drawing:
+    """Drawing of a Part.Shape (inside FreeCAD; no GUI or TechDraw needed)."""
+    bb = shape.BoundBox
+    deflection = linear_deflection or max(bb.DiagonalLength * 2e-3, 1e-3)
+    try:
+        import tessellation_cache
+        v, f = tessellation_cache.tessellate(shape, deflection, angular_deflection)
+    except ImportError:
+        import stl_io
+        v, f = stl_io.shape_arrays(shape, deflection, angular_deflection)
+    kwargs.setdefault('depth_tolerance', 1.5 * deflection + bb.DiagonalLength * 1e-6)
+    return render(Mesh(v, f), shape_edges(shape, deflection), name=name, **kwargs)
+
+
+def from_object(obj, **kwargs) -> Drawing:
+    kwargs.setdefault('name', getattr(obj, 'Label', None) or obj.Name)
+    return from_shape(obj.Shape, **kwargs)
+
+
+def from_stl(path, name=None, **kwargs) -> Drawing:
+    """Drawing of an STL file (mesh creases and silhouettes; NumPy only)."""
+    import stl_io
+    v, f = stl_io.read_stl(path).indexed(decimals=6)
+    return render(Mesh(v, f), None, name=name or os.path.splitext(os.path.basename(path))[0], **kwargs)
+
+
+def load(path, **kwargs) -> Drawing:
+    """Drawing of an .stl file, or (inside FreeCAD) a .step/.brep file or the final body of an .FCStd."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.stl':
+        return from_stl(path, **kwargs)
+    import Part  # type: ignore
+    name = kwargs.pop('name', None) or os.path.splitext(os.path.basename(path))[0]
+    if ext == '.fcstd':
+        import FreeCAD  # type: ignore
+        import doc_graph
+        doc = FreeCAD.openDocument(path)
+        try:
+            body = doc_graph.final_body(doc)
+            if body is None:
+                raise ValueError(f'{path}: no shape found')
+            return from_shape(body.Shape, name=name, **kwargs)
+        finally:
+            FreeCAD.closeDocument(doc.Name)
+    return from_shape(Part.read(path), name=name, **kwargs)
+
+
+def _render_file(path, out_path, options):
+    t0 = time.perf_counter()
+    try:
+        drawing = load(path, **options)
+        drawing.write(out_path)
+        return {'input': path, 'output': out_path, 'ok': True, 'seconds': time.perf_counter() - t0,
+                'triangles': drawing.stats.get('triangles'), 'scale': drawing.scale}
+    except Exception as e:
+        return {'input': path, 'output': out_path, 'ok': False, 'seconds': time.perf_counter() - t0,
+                'error': f'{type(e).__name__}: {e}'}
+
+
+def render_files(paths, out_dir=None, fmt='pdf', workers=None, log=None, **options):
+    """Render many files (one page each); STL files run in a process pool, others in this process."""
+    import concurrent.futures as cf
+    import process_pool
+    jobs = []
+    for p in paths:
+        folder = out_dir or os.path.dirname(os.path.abspath(p))
+        jobs.append((p, os.path.join(folder, os.path.splitext(os.path.basename(p))[0] + '.' + fmt)))
+    pooled = [j for j in jobs if j[0].lower().endswith('.stl')]
+    local = [j for j in jobs if not j[0].lower().endswith('.stl')]
+    results = []
+    t0 = time.perf_counter()
+
+    def done(rec):
+        results.append(rec)
+        if log:
+            status = 'ok' if rec['ok'] else rec['error']
+            log(f"[hidden_line] {rec['input']} -> {rec['output']}: {status} ({rec['seconds']:.2f} s)\n")
+
+    if len(pooled) > 1 and (workers or os.cpu_count() or 1) > 1 and process_pool.usable():
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            with process_pool.executor(workers) as pool:
+                futures = [pool.submit(_render_file, p, o, options) for p, o in pooled]
+                for fut in cf.as_completed(futures):
+                    done(fut.result())
+        except (BrokenProcessPool, OSError):
+            pass  # whatever the pool did not finish is rendered below
+    finished = {r['input'] for r in results}
+    for p, o in pooled:
+        if p not in finished:
+            done(_render_file(p, o, options))
+    for p, o in local:
+        done(_render_file(p, o, options))
+    elapsed = time.perf_counter() - t0
+    ok = sum(1 for r in results if r['ok'])
+    summary = {'files': len(results), 'ok': ok, 'seconds': elapsed,
+               'parts_per_hour': 3600.0 * ok / elapsed if elapsed > 0 else 0.0}
+    return results, summary
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='Three-view drawings with hidden lines (SVG/PDF), no GUI needed')
+    ap.add_argument('inputs', nargs='+', help='.stl files (or .step/.brep/.FCStd under FreeCADCmd)')
+    ap.add_argument('--out-dir', help='output folder (default: next to each input)')
+    ap.add_argument('--format', choices=('pdf', 'svg'), default='pdf')
+    ap.add_argument('--views', default=','.join(DEFAULT_VIEWS), help='comma-separated, from: ' + ', '.join(VIEWS))
+    ap.add_argument('--projection', choices=tuple(LAYOUTS), default='first')
+    ap.add_argument('--scale', default='auto', help="'auto' or a number (0.5 = 1:2)")
+    ap.add_argument('--page', choices=tuple(PAGES), default='A4')
+    ap.add_argument('--crease', type=float, default=30.0, help='mesh crease angle in degrees (STL input)')
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--no-hidden', action='store_true', help='omit hidden lines')
+    args = ap.parse_args(argv)
+    views = tuple(v.strip().lower() for v in args.views.split(',') if v.strip())
+    unknown = [v for v in views if v not in VIEWS]
+    if unknown:
+        ap.error(f"unknown view(s): {', '.join(unknown)}")
+    options = {'views': views, 'projection': args.projection, 'page': args.page, 'crease_deg': args.crease,
+               'hidden_lines': not args.no_hidden,
+               'scale': 'auto' if args.scale == 'auto' else float(args.scale)}
+    results, summary = render_files(args.inputs, args.out_dir, args.format, args.workers,
+                                    log=sys.stdout.write, **options)
+    print(f"{summary['ok']}/{summary['files']} drawings in {summary['seconds']:.2f} s "
+          f"({summary['parts_per_hour']:.0f} parts/hour)")
+    return 0 if summary['ok'] == summary['files'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,13 +4,17 @@ Inspect a FreeCAD .FCStd file and list objects with bounding boxes.
 Usage (run with FreeCADCmd):
   FreeCADCmd.exe d:\\FreeCad\\inspect_fcstd.py --file d:\\FreeCad\\cube.FCStd
 You can also set env FC_FILE to the path if not using --file.
+
+Without FreeCAD (plain python), or with --headless, the archive is indexed by
+fcstd_index.py instead: Document.xml and the BREP members are read directly and
+the result is cached by content hash, so FreeCAD is never started.
+  python d:\\FreeCad\\inspect_fcstd.py --file d:\\FreeCad\\cube.FCStd
 """
 import os, sys
 try:
     import FreeCAD as App
-except Exception as e:
-    sys.stderr.write("Run this with FreeCADCmd.\n" + str(e) + "\n")
-    sys.exit(2)
+except Exception:
+    App = None
 
 
 def _parse(argv):
@@ -32,6 +36,12 @@ def main(argv):
     if not os.path.isfile(norm):
         print(f"File not found: {norm}")
         return 1
+    if App is None or '--headless' in argv:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import fcstd_index
+        with fcstd_index.IndexCache() as cache:
+            fcstd_index.print_index(norm, cache.get(norm))
+        return 0
     doc = App.openDocument(norm)
     App.ActiveDocument = doc
     print(f"Opened: {norm}")
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred workbench imports and an import-time report for the FreeCAD scripts.
+
+Importing TechDraw, Sketcher, Mesh or MeshPart costs noticeable time on a
+cold FreeCADCmd start, even in runs that never use them. lazy() returns a
+stand-in that imports the real module on first attribute access:
+
+  import lazy_modules
+  TechDraw = lazy_modules.lazy('TechDraw')
+  TECHDRAW_AVAILABLE = TechDraw.available     # no import, only a module lookup
+  ...
+  TechDraw.newPage(...)                      # imported here, once
+
+`available` asks the import system whether the module can be found
+(importlib.util.find_spec) without executing it, and turns False once a real
+import has failed. Using a module that fails to import raises ImportError at
+the point of use, so keep the usual try/except around workbench calls.
+
+Import-time report: with FC_IMPORT_REPORT=1 in the environment, a script that
+calls lazy_modules.start_from_env() early prints, on exit, the cumulative and
+self time of every module imported after that point (like python -X
+importtime, which FreeCADCmd does not pass through). FC_IMPORT_REPORT=<file>.json
+also writes the numbers to that file. print_report() can be called directly.
+"""
+from __future__ import annotations
+import atexit
+import builtins
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+
+REPORT_ENV = 'FC_IMPORT_REPORT'
+
+_lock = threading.RLock()
+_handles = {}
+_spec_cache = {}
+
+
+def available(name: str) -> bool:
+    """True if module name is already imported or can be found, without importing it."""
+    if name in sys.modules:
+        return sys.modules[name] is not None
+    found = _spec_cache.get(name)
+    if found is None:
+        try:
+            found = importlib.util.find_spec(name) is not None
+        except (ImportError, ValueError):
+            found = False
+        _spec_cache[name] = found
+    return found
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+        self.__dict__['_error'] = None
+
+    @property
+    def available(self) -> bool:
+        if self._module is not None:
+            return True
+        if self._error is not None:
+            return False
+        return available(self._name)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        """Import the module now (once) and return it; raises ImportError if it cannot be imported."""
+        module = self._module
+        if module is not None:
+            return module
+        with _lock:
+            if self._module is None:
+                if self._error is not None:
+                    raise ImportError('module %s is not available: %s' % (self._name, self._error))
+                t0 = time.perf_counter()
+                try:
+                    # through builtins.__import__ so an installed ImportTimer sees nested imports
+                    builtins.__import__(self._name)
+                    module = sys.modules[self._name]
+                except Exception as e:
+                    self.__dict__['_error'] = e
+                    raise ImportError('module %s is not available: %s' % (self._name, e)) from e
+                finally:
+                    _record_lazy(self._name, time.perf_counter() - t0)
+                self.__dict__['_module'] = module
+        return self._module
+
+    def __getattr__(self, attr):
+        if attr.startswith('__') and attr.endswith('__'):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self.load(), attr, value)
+
+    def __dir__(self):
+        return dir(self.load())
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else ('failed' if self._error is not None else 'not loaded')
+        return '<lazy module %r (%s)>' % (self._name, state)
+
+
+def lazy(name: str) -> LazyModule:
+    """Shared stand-in for module name (the same object for every caller)."""
+    with _lock:
+        handle = _handles.get(name)
+        if handle is None:
+            handle = _handles[name] = LazyModule(name)
+        return handle
+
+
+# -------------------------- import-time report --------------------------
+class ImportTimer:
+    """Times imports made through builtins.__import__ while installed (cumulative and self time)."""
+
+    def __init__(self):
+        self.records = {}  # name -> [cumulative s, self s, count]
+        self._orig = None
+        self._local = threading.local()
+
+    def install(self):
+        if self._orig is None:
+            self._orig = builtins.__import__
+            builtins.__import__ = self._import
+        return self
+
+    def uninstall(self):
+        if self._orig is not None:
+            builtins.__import__ = self._orig
+            self._orig = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # only imports that actually load something are timed
+        if level or name in sys.modules:
+            return self._orig(name, globals, locals, fromlist, level)
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            return self._orig(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - t0
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.add(name, elapsed, elapsed - children)
+
+    def add(self, name, cumulative, self_time=None):
+        with _lock:
+            rec = self.records.setdefault(name, [0.0, 0.0, 0])
+            rec[0] += cumulative
+            rec[1] += cumulative if self_time is None else self_time
+            rec[2] += 1
+
+    def rows(self):
+        with _lock:
+            items = [(name, rec[0] * 1e3, rec[1] * 1e3, rec[2]) for name, rec in self.records.items()]
+        return sorted(items, key=lambda r: r[1], reverse=True)
+
+    def format(self, limit=30):
+        rows = self.rows()
+        lines = ['%-32s %10s %10s' % ('module', 'cum ms', 'self ms')]
+        for name, cum, own, _count in rows[:limit]:
+            lines.append('%-32s %10.1f %10.1f' % (name, cum, own))
+        if len(rows) > limit:
+            lines.append('... %d more' % (len(rows) - limit))
+        return '\n'.join(lines)
+
+
+_timer = None
+_lazy_times = {}
+
+
+def _record_lazy(name, seconds):
+    with _lock:
+        _lazy_times[name] = _lazy_times.get(name, 0.0) + seconds
+
+
+def start(hook=True) -> ImportTimer:
+    """Start recording import times (idempotent)."""
+    global _timer
+    with _lock:
+        if _timer is None:
+            _timer = ImportTimer()
+            if hook:
+                _timer.install()
+        return _timer
+
+
+def report() -> dict:
+    """{'imports': [{module, cumulative_ms, self_ms}], 'lazy': {module: ms}}."""
+    rows = _timer.rows() if _timer is not None else []
+    with _lock:
+        lazy_ms = {name: seconds * 1e3 for name, seconds in _lazy_times.items()}
+    return {'imports': [{'module': n, 'cumulative_ms': c, 'self_ms': s} for n, c, s, _ in rows],
+            'lazy': lazy_ms,
+            'deferred': sorted(name for name, h in _handles.items() if not h.loaded and h._error is None)}
+
+
+def print_report(limit=30, out=None):
+    out = out or sys.stdout
+    data = report()
+    out.write('=' * 60 + '\nImport times\n')
+    if _timer is not None:
+        out.write(_timer.format(limit) + '\n')
+    for name, ms in sorted(data['lazy'].items(), key=lambda kv: -kv[1]):
+        out.write('lazy %-27s %10.1f ms\n' % (name, ms))
+    if data['deferred']:
+        out.write('never imported: %s\n' % ', '.join(data['deferred']))
+    out.write('=' * 60 + '\n')
+
+
+def start_from_env():
+    """Start the import timer and report at exit when FC_IMPORT_REPORT is set; returns whether it is on."""
+    setting = os.environ.get(REPORT_ENV)
+    if not setting or setting == '0':
+        return False
+    first = _timer is None
+    start()
+    if first:
+        def _emit():
+            if setting.lower().endswith('.json'):
+                with open(setting, 'w', encoding='utf-8') as f:
+                    json.dump(report(), f, indent=2)
+            print_report()
+        atexit.register(_emit)
+    return True
@@ -0,0 +1,636 @@
+# -*- coding: utf-8 -*-
+"""
+Golden-output regression check for exported meshes (STL; STEP/BREP inside FreeCAD).
+
+A new export is compared with a reference ("golden") file: surface deviation
+(symmetric Hausdorff distance, RMS and mean), bounding box, volume and area,
+each checked against a tolerance:
+
+  import mesh_compare
+  report = mesh_compare.compare('golden/mesh_export.stl', 'outputs/mesh_export_20251103-114137.stl')
+  report['ok'], report['checks']['hausdorff']   # {'value': 0.0021, 'limit': 0.1, 'ok': True}
+  print(mesh_compare.format_report(report))
+
+Surface deviation is measured from area-weighted random samples of each
+surface (fixed seed; by default sample_count(facets) per side: 8 per facet,
+2000 to 100000, plus every corner of small meshes) to the other surface, as the
+exact point-to-triangle distance. The triangles are held in a KD-tree in
+NumPy (TriangleTree: triangles sorted along a Morton curve of their centroids,
+balanced implicit binary tree of bounding boxes, blocks of queries walked
+level by level in vectorized steps). A triangle next to each sample along
+the Morton curve gives an upper bound, and only triangles whose boxes lie
+within it are tested. STL files are read through stl_io's memory-mapped
+reader, so meshes with millions of facets are compared in seconds.
+
+Tolerances (DEFAULT_TOLERANCES): hausdorff, rms and bbox in mm; volume and
+area as relative differences. Names with a build_out/create_cube timestamp
+(mesh_export_20251103-114137.stl, cube-20251102-212532.FCStd) share the
+logical name of the untimestamped file, so directories are compared by
+logical name, newest file on each side, in a process pool:
+
+  python mesh_compare.py golden/mesh_export.stl outputs/mesh_export_20251103-114137.stl
+  python mesh_compare.py d:\\FreeCad\\golden d:\\FreeCad\\FreeCadTest\\STL --json report.json
+      [--hausdorff 0.1] [--rms 0.02] [--bbox 0.1] [--volume 0.005] [--area 0.005]
+      [--samples 20000] [--workers 4]
+
+The exit code is 0 when every comparison passes. .step/.brep files need
+FreeCAD (run under FreeCADCmd); they are tessellated with the STL export
+settings and compared in the calling process.
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+
+import numpy as np
+
+from output_files import logical_name
+
+DEFAULT_TOLERANCES = {'hausdorff': 0.1, 'rms': 0.02, 'bbox': 0.1, 'volume': 0.005, 'area': 0.005}
+DEFAULT_SAMPLES = 100000  # cap of sample_count() (per side)
+MIN_SAMPLES = 2000
+SAMPLES_PER_FACET = 8
+GOLDEN_ENV = 'FC_GOLDEN_DIR'
+MESH_EXTENSIONS = ('.stl', '.step', '.stp', '.brep', '.brp')
+# Tessellation of STEP/BREP input (same as create_cube's STL export)
+LINEAR_DEFLECTION = 0.1
+ANGULAR_DEFLECTION = 0.523599
+# distances below this fraction of the bounding-box diagonal are not searched further
+EXACT_SLACK = 1e-9
+
+
+# -------------------------- loading and properties --------------------------
+def load_triangles(path, linear_deflection=LINEAR_DEFLECTION, angular_deflection=ANGULAR_DEFLECTION):
+    """(F,3,3) float64 corner coordinates of an STL file, or (inside FreeCAD) a tessellated STEP/BREP file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.stl':
+        import stl_io
+        return np.asarray(stl_io.read_stl(path).triangles, dtype=np.float64)
+    import Part  # type: ignore
+    shape = Part.read(path)
+    try:
+        import tessellation_cache
+        v, f = tessellation_cache.tessellate(shape, linear_deflection, angular_deflection)
+    except ImportError:
+        import stl_io
+        v, f = stl_io.shape_arrays(shape, linear_deflection, angular_deflection)
+    return np.asarray(v, dtype=np.float64)[np.asarray(f, dtype=np.int64)]
+
+
+def _as_triangles(mesh):
+    if isinstance(mesh, str):
+        return load_triangles(mesh)
+    return np.asarray(mesh, dtype=np.float64).reshape(-1, 3, 3)
+
+
+def _bounds3(points):
+    """(min, max) corner of (..., 3) coordinates; per component, which is several times faster than axis=0."""
+    return (np.array([points[..., i].min() for i in range(3)]),
+            np.array([points[..., i].max() for i in range(3)]))
+
+
+def _normals(tri):
+    """Unnormalized facet normals (b - a) x (c - a); their lengths are twice the areas."""
+    return np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+
+
+def _triangle_areas(tri):
+    return 0.5 * np.linalg.norm(_normals(tri), axis=1)
+
+
+def mesh_properties(tri, normals=None) -> dict:
+    """Facet count, surface area, enclosed volume (absolute, for closed meshes) and bounding box."""
+    if len(tri) == 0:
+        return {'facets': 0, 'area': 0.0, 'volume': 0.0, 'bbox_min': None, 'bbox_max': None}
+    n = _normals(tri) if normals is None else normals
+    # a . ((b - a) x (c - a)) == a . (b x c): the signed volume of the tetrahedron with the origin, times 6
+    volume = float(np.einsum('ij,ij->', tri[:, 0], n)) / 6.0
+    lo, hi = _bounds3(tri)
+    return {'facets': len(tri), 'area': float(0.5 * np.linalg.norm(n, axis=1).sum()), 'volume': abs(volume),
+            'bbox_min': lo.tolist(), 'bbox_max': hi.tolist()}
+
+
+def sample_surface(tri, count, seed=0, areas=None):
+    """count area-weighted random points on the triangles: (points (N,3), triangle index (N,))."""
+    areas = _triangle_areas(tri) if areas is None else areas
+    total = areas.sum()
+    if len(tri) == 0 or count <= 0:
+        return np.zeros((0, 3)), np.zeros(0, dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    if total <= 0.0:
+        index = rng.integers(0, len(tri), count)
+    else:
+        index = np.searchsorted(np.cumsum(areas), rng.random(count) * total, side='right')
+        index = np.minimum(index, len(tri) - 1)
+    r1 = np.sqrt(rng.random(count))
+    r2 = rng.random(count)
+    t = tri[index]
+    points = (1.0 - r1)[:, None] * t[:, 0] + (r1 * (1.0 - r2))[:, None] * t[:, 1] + (r1 * r2)[:, None] * t[:, 2]
+    return points, index
+
+
+def sample_count(facets: int) -> int:
+    """Default samples per side: SAMPLES_PER_FACET per facet, clamped to MIN_SAMPLES..DEFAULT_SAMPLES."""
+    return int(min(DEFAULT_SAMPLES, max(MIN_SAMPLES, SAMPLES_PER_FACET * int(facets))))
+
+
+def _surface_points(tri, count, seed, areas=None):
+    """Samples plus, for small meshes, every corner (so sharp corners are always matched)."""
+    points, index = sample_surface(tri, count, seed, areas)
+    if 0 < 3 * len(tri) <= count:
+        points = np.concatenate([points, tri.reshape(-1, 3)])
+        index = np.concatenate([index, np.repeat(np.arange(len(tri)), 3)])
+    return points, index
+
+
+# -------------------------- KD-trees --------------------------
+def _spread_bits21(x):
+    """Interleave the low 21 bits of x with two zero bits each (for 63-bit Morton codes)."""
+    x = x.astype(np.uint64) & np.uint64(0x1FFFFF)
+    x = (x | (x << np.uint64(32))) & np.uint64(0x1F00000000FFFF)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x1F0000FF0000FF)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x100F00F00F00F00F)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x10C30C30C30C30C3)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return x
+
+
+class PointTree:
+    """KD-tree over 3D points for batched k-nearest-neighbour queries, in NumPy only.
+
+    Points are sorted along a Morton (Z-order) curve and cut into leaves of leaf_size;
+    the leaves are the bottom level of a complete binary tree stored heap-style
+    (node k has children 2k and 2k+1), each node holding the bounding box of its points.
+    Queries are sorted the same way and grouped into blocks of neighbouring queries.
+    Each query takes an upper bound from the leaves at its own Morton position; the
+    tree is then walked level by level with (block, node) pairs, dropping nodes farther
+    from the block's box than the block's largest bound, so every level is one
+    vectorized step. The leaves that remain are checked against each query's own bound
+    and their points scanned, queries with similar leaf counts batched together.
+    """
+
+    def __init__(self, points, leaf_size=16):
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.leaf_size = leaf_size
+        self.n = n = len(pts)
+        self.depth = self.leaves = 0
+        if n == 0:
+            return
+        self.origin, top = _bounds3(pts)
+        self.scale = float(2 ** 21 - 1) / max(float((top - self.origin).max()), 1e-300)
+        codes = self._codes(pts)
+        order = np.argsort(codes, kind='stable')
+        self.order, self.codes = order, codes[order]
+        self.leaves = m = -(-n // leaf_size)
+        # points of leaf i in blocks[i]; the last leaf is padded and blocks[m] is all padding (inf)
+        self.blocks = np.full(((m + 1) * leaf_size, 3), np.inf)
+        self.blocks[:n] = pts[order]
+        self.depth = depth = int(np.ceil(np.log2(m))) if m > 1 else 0
+        first = 1 << depth
+        lo = np.full((2 * first, 3), np.inf)
+        hi = np.full((2 * first, 3), -np.inf)
+        starts = np.arange(0, n, leaf_size)
+        lo[first:first + m] = np.minimum.reduceat(self.blocks[:n], starts, axis=0)
+        hi[first:first + m] = np.maximum.reduceat(self.blocks[:n], starts, axis=0)
+        self.blocks = self.blocks.reshape(m + 1, leaf_size, 3)
+        self.lo, self.hi = lo, hi
+        self._fill_levels()
+
+    def _fill_levels(self):
+        """Inner node boxes from the leaf boxes, bottom-up."""
+        lo, hi = self.lo, self.hi
+        for level in range(self.depth - 1, -1, -1):
+            k = np.arange(1 << level, 2 << level)
+            lo[k] = np.minimum(lo[2 * k], lo[2 * k + 1])
+            hi[k] = np.maximum(hi[2 * k], hi[2 * k + 1])
+
+    def __len__(self):
+        return self.n
+
+    def _codes(self, pts):
+        q = np.clip((pts - self.origin) * self.scale, 0, 2 ** 21 - 1).astype(np.int64)
+        return (_spread_bits21(q[:, 0]) << np.uint64(2)) | (_spread_bits21(q[:, 1]) << np.uint64(1)) | _spread_bits21(q[:, 2])
+
+    def _window(self, q, width):
+        """(N, width) indices of the consecutive leaves at each query's Morton position (padding leaf past the end)."""
+        first = np.searchsorted(self.codes, self._codes(q)) // self.leaf_size
+        first = np.clip(first, 0, max(self.leaves - width, 0))
+        return np.minimum(first[:, None] + np.arange(width), self.leaves)
+
+    def _initial_bounds(self, q, k):
+        """Squared distance of each query to its k-th nearest point among the leaves at its Morton position."""
+        width = -(-k // self.leaf_size) + 1  # the first leaf may be the last, partly filled one
+        leaves = self._window(q, width)
+        diff = self.blocks[leaves].reshape(len(q), -1, 3) - q[:, None, :]
+        d2 = np.einsum('ijk,ijk->ij', diff, diff)
+        return np.partition(d2, k - 1, axis=1)[:, k - 1]
+
+    def _candidates(self, q, bound_q, block):
+        """(query, leaf) pairs, sorted by query, of the leaves within sqrt(bound_q) of each query."""
+        m = len(q)
+        nb = -(-m // block)
+        if nb * block > m:  # pad the last block with copies of the last query
+            q = np.concatenate([q, np.repeat(q[-1:], nb * block - m, axis=0)])
+            bound_q = np.concatenate([bound_q, np.repeat(bound_q[-1:], nb * block - m)])
+        qb = q.reshape(nb, block, 3)
+        bound = bound_q.reshape(nb, block).max(axis=1)
+        blo, bhi = qb.min(axis=1), qb.max(axis=1)
+        bi = np.arange(nb)
+        node = np.ones(nb, dtype=np.int64)
+        for level in range(self.depth + 1):
+            gap = np.maximum(self.lo[node] - bhi[bi], 0.0) + np.maximum(blo[bi] - self.hi[node], 0.0)
+            keep = np.einsum('ij,ij->i', gap, gap) <= bound[bi]
+            bi, node = bi[keep], node[keep]
+            if level < self.depth:
+                bi = np.repeat(bi, 2)
+                node = (node[:, None] * 2 + np.array([0, 1])).ravel()
+        # every query of a block against the block's leaves, kept if within the query's own bound
+        x = qb[bi]
+        gap = np.maximum(self.lo[node][:, None, :] - x, 0.0) + np.maximum(x - self.hi[node][:, None, :], 0.0)
+        pair, j = np.nonzero(np.einsum('ijk,ijk->ij', gap, gap) <= bound_q.reshape(nb, block)[bi])
+        qi, node = bi[pair] * block + j, node[pair]
+        keep = qi < m
+        qi, node = qi[keep], node[keep]
+        order = np.argsort(qi, kind='stable')
+        return qi[order], node[order] - (1 << self.depth)
+
+    def _query(self, q, k, block, budget):
+        ls = self.leaf_size
+        m = len(q)
+        qi, leaf = self._candidates(q, self._initial_bounds(q, k), block)
+        counts = np.bincount(qi, minlength=m)
+        starts = np.cumsum(counts) - counts
+        out_d2 = np.empty((m, k))
+        out_idx = np.empty((m, k), dtype=np.int64)
+        # queries with similar leaf counts are scanned together, about budget distances at a time
+        by_count = np.argsort(counts, kind='stable')
+        sorted_counts = counts[by_count]
+        g = 0
+        while g < m:
+            cost = np.arange(1, m - g + 1) * np.maximum(sorted_counts[g:], 1) * ls  # rows g..e padded to the widest
+            e = g + max(1, int(np.searchsorted(cost, budget, side='right')))
+            rows = by_count[g:e]
+            width = max(int(counts[rows].max()), 1)
+            leaves = np.full((len(rows), width), self.leaves, dtype=np.int64)
+            r = np.repeat(np.arange(len(rows)), counts[rows])
+            c = np.arange(len(r)) - np.repeat(np.cumsum(counts[rows]) - counts[rows], counts[rows])
+            leaves[r, c] = leaf[np.repeat(starts[rows], counts[rows]) + c]
+            diff = self.blocks[leaves].reshape(len(rows), -1, 3) - q[rows][:, None, :]
+            d2 = np.einsum('ijk,ijk->ij', diff, diff)
+            if k == 1:
+                pick = d2.argmin(axis=1)[:, None]
+            else:
+                pick = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            best = np.take_along_axis(d2, pick, axis=1)
+            found = np.take_along_axis(leaves, pick // ls, axis=1) * ls + pick % ls
+            if k > 1:
+                order = np.argsort(best, axis=1)
+                best, found = np.take_along_axis(best, order, axis=1), np.take_along_axis(found, order, axis=1)
+            out_d2[rows], out_idx[rows] = best, found
+            g = e
+        return out_d2, out_idx
+
+    def query(self, queries, k=1, block=4, chunk=16384, budget=1 << 16):
+        """Distances and indices (into the original points) of the k nearest points, nearest first.
+
+        Returns 1-D arrays for k=1, else (N, k) arrays; missing neighbours are inf / -1.
+        """
+        q = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+        dist2 = np.full((len(q), k), np.inf)
+        index = np.full((len(q), k), -1, dtype=np.int64)
+        kk = min(k, self.n)
+        if kk > 0 and len(q):
+            order = np.argsort(self._codes(q), kind='stable')  # neighbouring queries share blocks
+            for s in range(0, len(q), chunk):
+                sel = order[s:s + chunk]
+                d2, idx = self._query(q[sel], kk, block, budget)
+                dist2[sel, :kk], index[sel, :kk] = d2, self.order[idx]
+        if k == 1:
+            return np.sqrt(dist2[:, 0]), index[:, 0]
+        return np.sqrt(dist2), index
+
+
+class TriangleTree(PointTree):
+    """PointTree over triangle centroids whose node boxes bound the whole triangles.
+
+    distances() gives the exact distance from points to the nearest triangle, scanning
+    only the leaves that can hold a triangle closer than a known upper bound.
+    """
+
+    def __init__(self, triangles, leaf_size=16):
+        tri = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+        super().__init__((tri[:, 0] + tri[:, 1] + tri[:, 2]) / 3.0, leaf_size)
+        if self.n == 0:
+            return
+        n, m = self.n, self.leaves
+        # triangles of leaf i in tri_blocks[i]; the last leaf is padded with copies of a real triangle
+        order = np.concatenate([self.order, np.repeat(self.order[-1:], m * leaf_size - n)])
+        self.tri_blocks = tri[order].reshape(m, leaf_size, 3, 3)
+        t = self.tri_blocks
+        self.tri_lo = np.minimum(np.minimum(t[:, :, 0], t[:, :, 1]), t[:, :, 2])
+        self.tri_hi = np.maximum(np.maximum(t[:, :, 0], t[:, :, 1]), t[:, :, 2])
+        first = 1 << self.depth
+        lo, hi = self.tri_lo[:, 0].copy(), self.tri_hi[:, 0].copy()
+        for j in range(1, leaf_size):  # a few whole-array passes beat min(axis=1) on (m, leaf_size, 3)
+            np.minimum(lo, self.tri_lo[:, j], out=lo)
+            np.maximum(hi, self.tri_hi[:, j], out=hi)
+        self.lo[first:first + m], self.hi[first:first + m] = lo, hi
+        self._fill_levels()
+
+    def _upper_bounds(self, q, chunk=65536):
+        ls = self.leaf_size
+        out = np.empty(len(q))
+        for s in range(0, len(q), chunk):
+            x = q[s:s + chunk]
+            leaves = self._window(x, 2)
+            diff = self.blocks[leaves].reshape(len(x), -1, 3) - x[:, None, :]
+            d2 = np.einsum('ijk,ijk->ij', diff, diff)
+            pick = d2.argmin(axis=1)
+            tri = self.tri_blocks[np.minimum(np.take_along_axis(leaves, (pick // ls)[:, None], axis=1)[:, 0],
+                                             self.leaves - 1), pick % ls]
+            exact = np.linalg.norm(x - closest_points_on_triangles(x, tri[:, 0], tri[:, 1], tri[:, 2]), axis=1)
+            # the centroid is on the triangle too, and stays finite for degenerate ones
+            out[s:s + chunk] = np.fmin(exact, np.sqrt(d2[np.arange(len(x)), pick]))
+        return out
+
+    def distances(self, queries, upper=None, slack=0.0, block=4, chunk=16384, budget=1 << 16):
+        """Exact distance from each query to the triangles.
+
+        upper: known upper bounds (distances to some point of the surface), which keep the
+        search small; by default the distance to the triangle with the nearest centroid
+        among the leaves at the query's Morton position. Queries with upper <= slack are
+        taken as they are.
+        """
+        q = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+        if self.n == 0:
+            return np.full(len(q), np.inf)
+        dist = self._upper_bounds(q) if upper is None else np.array(upper, dtype=np.float64)
+        todo = np.nonzero(dist > slack)[0]
+        todo = todo[np.argsort(self._codes(q[todo]), kind='stable')]
+        ls = self.leaf_size
+        for s in range(0, len(todo), chunk):
+            sel = todo[s:s + chunk]
+            qi, leaf = self._candidates(q[sel], dist[sel] ** 2, block)
+            x, best = q[sel], dist[sel] ** 2
+            step = max(1, budget // ls)
+            for p in range(0, len(qi), step):
+                rows, lf = qi[p:p + step], leaf[p:p + step]
+                # only triangles whose own box is within the bound get the exact test
+                y = x[rows][:, None, :]
+                gap = np.maximum(self.tri_lo[lf] - y, 0.0) + np.maximum(y - self.tri_hi[lf], 0.0)
+                r, j = np.nonzero(np.einsum('ijk,ijk->ij', gap, gap) < best[rows][:, None])
+                tri, y = self.tri_blocks[lf[r], j], x[rows[r]]
+                diff = y - closest_points_on_triangles(y, tri[:, 0], tri[:, 1], tri[:, 2])
+                np.fmin.at(best, rows[r], np.einsum('ij,ij->i', diff, diff))  # fmin: degenerate triangles give NaN
+            dist[sel] = np.sqrt(best)
+        return dist
+
+
+def closest_points_on_triangles(p, a, b, c):
+    """Closest point of triangle (a[i], b[i], c[i]) to p[i], for all i (Voronoi-region test)."""
+    ab, ac, ap = b - a, c - a, p - a
+    d1 = np.einsum('ij,ij->i', ab, ap)
+    d2 = np.einsum('ij,ij->i', ac, ap)
+    bp = p - b
+    d3 = np.einsum('ij,ij->i', ab, bp)
+    d4 = np.einsum('ij,ij->i', ac, bp)
+    cp = p - c
+    d5 = np.einsum('ij,ij->i', ab, cp)
+    d6 = np.einsum('ij,ij->i', ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = va + vb + vc
+        v, w = vb / denom, vc / denom
+        out = a + ab * v[:, None] + ac * w[:, None]  # inside the face
+        regions = (
+            ((va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+             lambda m: b[m] + ((d4 - d3) / ((d4 - d3) + (d5 - d6)))[m][:, None] * (c[m] - b[m])),
+            ((vb <= 0) & (d2 >= 0) & (d6 <= 0), lambda m: a[m] + (d2 / (d2 - d6))[m][:, None] * ac[m]),
+            ((d6 >= 0) & (d5 <= d6), lambda m: c[m]),
+            ((vc <= 0) & (d1 >= 0) & (d3 <= 0), lambda m: a[m] + (d1 / (d1 - d3))[m][:, None] * ab[m]),
+            ((d3 >= 0) & (d4 <= d3), lambda m: b[m]),
+            ((d1 <= 0) & (d2 <= 0), lambda m: a[m]),
+        )
+        # later regions take precedence, in the order of the scalar algorithm (vertex A first)
+        for mask, point in regions:
+            if mask.any():
+                out[mask] = point(mask)
+    return out
+
+
+class Surface:
+    """A triangle mesh prepared for comparison: properties, surface samples and a TriangleTree."""
+
+    def __init__(self, triangles, samples=None, seed=0):
+        self.triangles = tri = _as_triangles(triangles)
+        if samples is None:
+            samples = sample_count(len(tri))
+        normals = _normals(tri)
+        self.properties = mesh_properties(tri, normals)
+        # the query points when the other mesh is compared with this one
+        self.points, _ = _surface_points(tri, samples, seed, 0.5 * np.linalg.norm(normals, axis=1))
+        self._tree = None
+
+    def distances(self, queries):
+        """Exact distance from each query point to the surface."""
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 3)
+        if len(self.triangles) == 0 or len(queries) == 0:
+            return np.full(len(queries), np.inf)
+        if self._tree is None:
+            self._tree = TriangleTree(self.triangles)
+        diagonal = float(np.linalg.norm(np.subtract(self.properties['bbox_max'], self.properties['bbox_min'])))
+        return self._tree.distances(queries, slack=EXACT_SLACK * diagonal)
+
+
+def surface_distances(source, target, samples=None, seed=0):
+    """Distance from sample points of source to the surface of target (both (F,3,3)).
+
+    Returns (distances, points): one distance per source sample.
+    """
+    source = _as_triangles(source)
+    queries, _ = _surface_points(source, sample_count(len(source)) if samples is None else samples, seed)
+    return Surface(target, samples=0).distances(queries), queries
+
+
+# -------------------------- comparison --------------------------
+def compare(reference, candidate, tolerances=None, samples=None, seed=0) -> dict:
+    """Compare candidate with reference (paths or (F,3,3) triangle arrays); returns the report dict.
+
+    samples per side defaults to sample_count() of that side's facet count.
+    """
+    t0 = time.perf_counter()
+    limits = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+    report = {'reference': reference if isinstance(reference, str) else None,
+              'candidate': candidate if isinstance(candidate, str) else None}
+    ref, new = _as_triangles(reference), _as_triangles(candidate)
+    t_load = time.perf_counter()
+    # each side's samples are the queries one way and part of the tree the other way
+    ref, new = Surface(ref, samples, seed), Surface(new, samples, seed + 1)
+    props_ref, props_new = ref.properties, new.properties
+    p_fwd, p_bwd = new.points, ref.points
+    d_fwd = ref.distances(p_fwd)  # candidate -> reference
+    d_bwd = new.distances(p_bwd)  # reference -> candidate
+    both = np.concatenate([d_fwd, d_bwd])
+    deviation = {'hausdorff': float(both.max()) if len(both) else float('inf'),
+                 'rms': float(np.sqrt(np.mean(both ** 2))) if len(both) else float('inf'),
+                 'mean': float(both.mean()) if len(both) else float('inf'),
+                 'hausdorff_candidate_to_reference': float(d_fwd.max()) if len(d_fwd) else float('inf'),
+                 'hausdorff_reference_to_candidate': float(d_bwd.max()) if len(d_bwd) else float('inf'),
+                 'samples': len(both)}
+    if len(both):
+        worst = int(both.argmax())
+        deviation['max_at'] = (p_fwd[worst] if worst < len(d_fwd) else p_bwd[worst - len(d_fwd)]).tolist()
+    if props_ref['bbox_min'] is not None and props_new['bbox_min'] is not None:
+        bbox = float(np.abs(np.concatenate([np.subtract(props_new['bbox_min'], props_ref['bbox_min']),
+                                            np.subtract(props_new['bbox_max'], props_ref['bbox_max'])])).max())
+    else:
+        bbox = 0.0 if props_ref['facets'] == props_new['facets'] else float('inf')
+
+    def relative(key):
+        base = max(abs(props_ref[key]), 1e-12)
+        return abs(props_new[key] - props_ref[key]) / base
+
+    values = {'hausdorff': deviation['hausdorff'], 'rms': deviation['rms'], 'bbox': bbox,
+              'volume': relative('volume'), 'area': relative('area')}
+    checks = {k: {'value': v, 'limit': limits[k], 'ok': bool(v <= limits[k])} for k, v in values.items()}
+    report.update({'ok': all(c['ok'] for c in checks.values()), 'checks': checks, 'deviation': deviation,
+                   'reference_mesh': props_ref, 'candidate_mesh': props_new,
+                   'seconds': {'load': round(t_load - t0, 6), 'total': round(time.perf_counter() - t0, 6)}})
+    return report
+
+
+def format_report(report) -> str:
+    head = '%s  %s\n  reference: %s\n  candidate: %s' % (
+        'PASS' if report['ok'] else 'FAIL', report.get('candidate') or '', report.get('reference'),
+        report.get('candidate'))
+    if 'error' in report:
+        return head + '\n  error: ' + report['error']
+    lines = [head]
+    for name, c in report['checks'].items():
+        unit = '' if name in ('volume', 'area') else ' mm'
+        lines.append('  %-10s %12.6g%s  (limit %g%s)%s' % (name, c['value'], unit, c['limit'], unit,
+                                                          '' if c['ok'] else '  <-- exceeds'))
+    lines.append('  facets %d -> %d, %d samples, %.2f s' % (
+        report['reference_mesh']['facets'], report['candidate_mesh']['facets'],
+        report['deviation']['samples'], report['seconds']['total']))
+    return '\n'.join(lines)
+
+
+# -------------------------- golden files and directories --------------------------
+def latest_by_name(folder, extensions=MESH_EXTENSIONS) -> dict:
+    """{logical name: newest file of that name in folder}; an untimestamped file counts as newest."""
+    found = {}
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        if not entry.is_file() or os.path.splitext(entry.name)[1].lower() not in extensions:
+            continue
+        key = logical_name(entry.name)
+        plain = os.path.splitext(entry.name)[0] == os.path.splitext(key)[0]
+        current = found.get(key)
+        # timestamps sort by name; the plain name is the maintained reference
+        if current is None or plain or not current[1]:
+            found[key] = (entry.path, plain)
+    return {k: path for k, (path, _plain) in found.items()}
+
+
+def golden_for(path, golden_dir=None):
+    """The reference file for path in golden_dir (default env FC_GOLDEN_DIR), or None."""
+    golden_dir = golden_dir or os.environ.get(GOLDEN_ENV)
+    if not golden_dir or not os.path.isdir(golden_dir):
+        return None
+    return latest_by_name(golden_dir).get(logical_name(path))
+
+
+def check_golden(path, golden_dir=None, log=None, **options):
+    """Compare path with its golden file (if any); returns the report or None without a reference."""
+    reference = golden_for(path, golden_dir)
+    if reference is None:
+        return None
+    report = _compare_file(reference, path, options)
+    if log:
+        log('[golden] ' + format_report(report) + '\n')
+    return report
+
+
+def _compare_file(reference, candidate, options):
+    try:
+        return compare(reference, candidate, **options)
+    except Exception as e:
+        return {'reference': reference, 'candidate': candidate, 'ok': False, 'error': f'{type(e).__name__}: {e}'}
+
+
+def compare_dirs(golden_dir, new_dir, workers=None, log=None, **options):
+    """Compare every file of new_dir with the golden file of the same logical name.
+
+    STL pairs run in a process pool, STEP/BREP pairs (FreeCAD) in this process.
+    Returns (reports, summary); golden files without a new counterpart are listed as missing.
+    """
+    import concurrent.futures as cf
+    import process_pool
+    t0 = time.perf_counter()
+    golden, new = latest_by_name(golden_dir), latest_by_name(new_dir)
+    pairs = [(golden[k], new[k]) for k in sorted(golden) if k in new]
+    pooled = [p for p in pairs if p[0].lower().endswith('.stl') and p[1].lower().endswith('.stl')]
+    local = [p for p in pairs if p not in pooled]
+    reports = []
+
+    def done(report):
+        reports.append(report)
+        if log:
+            log(format_report(report) + '\n')
+
+    if len(pooled) > 1 and (workers or os.cpu_count() or 1) > 1 and process_pool.usable():
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            with process_pool.executor(workers) as pool:
+                futures = {pool.submit(_compare_file, ref, cand, options): cand for ref, cand in pooled}
+                for future in cf.as_completed(futures):
+                    done(future.result())
+        except (BrokenProcessPool, OSError):
+            pass  # whatever the pool did not finish is compared below
+    finished = {r['candidate'] for r in reports}
+    for ref, cand in pooled + local:
+        if cand not in finished:
+            done(_compare_file(ref, cand, options))
+    passed = sum(1 for r in reports if r['ok'])
+    summary = {'compared': len(reports), 'passed': passed, 'failed': len(reports) - passed,
+               'missing': sorted(k for k in golden if k not in new),
+               'seconds': round(time.perf_counter() - t0, 6)}
+    return reports, summary
+
+
+def main(argv=None):
+    import argparse
+    import json
+    ap = argparse.ArgumentParser(description='Compare exported meshes with golden references')
+    ap.add_argument('reference', help='golden file or folder')
+    ap.add_argument('candidate', help='new file or folder')
+    for name, value in DEFAULT_TOLERANCES.items():
+        unit = 'relative' if name in ('volume', 'area') else 'mm'
+        ap.add_argument('--' + name, type=float, default=value, help=f'tolerance ({unit}, default {value})')
+    ap.add_argument('--samples', type=int, default=None,
+                    help=f'surface samples per mesh (default {SAMPLES_PER_FACET} per facet, '
+                         f'{MIN_SAMPLES}-{DEFAULT_SAMPLES})')
+    ap.add_argument('--workers', type=int, default=None)
+    ap.add_argument('--json', help='write the report(s) to this file')
+    args = ap.parse_args(argv)
+    options = {'tolerances': {k: getattr(args, k) for k in DEFAULT_TOLERANCES}, 'samples': args.samples}
+    if os.path.isdir(args.reference):
+        reports, summary = compare_dirs(args.reference, args.candidate, args.workers, log=sys.stdout.write, **options)
+        print(f"{summary['passed']}/{summary['compared']} passed in {summary['seconds']:.2f} s"
+              + (f"; no new file for: {', '.join(summary['missing'])}" if summary['missing'] else ''))
+        data = {'summary': summary, 'reports': reports}
+        ok = summary['failed'] == 0 and summary['compared'] > 0
+    else:
+        report = _compare_file(args.reference, args.candidate, options)
+        print(format_report(report))
+        data, ok = report, report['ok']
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+File helpers shared by geometry_cache, mesh_compare and output_store.
+
+Plain Python (no NumPy, no FreeCAD), so the output store and its command line
+stay usable without the mesh-comparison code:
+
+  logical_name('STL/mesh_export_20251103-160811.stl')   # 'mesh_export.stl'
+  link_or_copy(blob, 'FreeCadTest/STL/part.stl')         # 'link' or 'copy'
+"""
+from __future__ import annotations
+import os
+import re
+import shutil
+import threading
+
+_TIMESTAMP = re.compile(r'[-_]\d{8}-\d{6}(?:-\d{4})?$')
+
+
+def logical_name(path) -> str:
+    """File name without its build_out/create_cube timestamp: mesh_export_20251103-114137.stl -> mesh_export.stl."""
+    stem, ext = os.path.splitext(os.path.basename(path))
+    return _TIMESTAMP.sub('', stem) + ext.lower()
+
+
+def link_or_copy(src: str, dst: str, link: bool = True) -> str:
+    """Place src at dst by hard link (same volume) or copy; returns 'link' or 'copy'."""
+    folder = os.path.dirname(dst)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder, exist_ok=True)
+    tmp = f"{dst}.tmp-{os.getpid()}-{threading.get_ident()}"
+    mode = 'copy'
+    try:
+        if link:
+            try:
+                os.link(src, tmp)
+                mode = 'link'
+            except OSError:
+                pass
+        if mode == 'copy':
+            shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return mode
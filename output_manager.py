@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Output paths and (optionally background) file writing for batch runs.
+
+OutputManager resolves the per-type folder of an extension once per run
+(reusing an existing folder whose name differs only in case, as
+freecadtest.build_out always did) and hands out stable paths:
+
+  outputs = OutputManager('FreeCadTest', timestamp='20251103-160811')
+  outputs.path('part_export', 'step')   # FreeCadTest/STEP/part_export_20251103-160811.step
+  outputs.path('part_export', 'step')   # same string again, no file system access
+  outputs.path('cube', 'stl', unique=True)   # cube_<ts>-0001.stl, cube_<ts>-0002.stl, ...
+
+Files produced by FreeCAD itself (saveAs, Part.export) are counted with
+track(path). Data produced in Python can be written through the manager:
+
+  outputs = OutputManager(root, background=True, queue_size=64, fsync_batch=32)
+  outputs.write('report', 'json', text)      # queued; blocks only while the queue is full
+  outputs.close()                            # drain the queue, fsync, stop the writer
+
+The background writer writes each file under a temporary name, then every
+fsync_batch files (or fsync_interval seconds, or when the queue runs empty)
+fsyncs the batch, renames the files into place and fsyncs their folders once.
+stats() returns files/bytes written, tracked outputs, fsync calls and errors.
+
+With dedup={'mode': 'link', 'keep': 5, 'max_bytes': 2 << 30} (see
+output_store.options_from_env) close() adds every tracked or written file to
+an output_store.OutputStore under its root, so identical outputs of repeated
+runs share one blob, and then runs the retention pass (keep newest N per name,
+stored-size limit) when keep or max_bytes is given. Nothing is linked or
+removed before close(): files can still be read (golden checks, reports)
+until the run is done.
+"""
+from __future__ import annotations
+import os
+import queue
+import threading
+import time
+
+TYPE_FOLDERS = {'fcstd': 'FCStd', 'step': 'STEP', 'stl': 'STL', 'pdf': 'PDF'}
+DEFAULT_FOLDER = 'Other'
+
+
+def type_folder(ext: str) -> str:
+    """Name of the type folder of an extension ('step' -> 'STEP', unknown -> 'Other')."""
+    return TYPE_FOLDERS.get(ext.lower().lstrip('.'), DEFAULT_FOLDER)
+
+
+def _fsync_dir(folder):
+    if os.name == 'nt':
+        return  # directories cannot be opened for fsync on Windows
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class OutputManager:
+    """Stable output paths under root/<type folder>/ plus counters and an optional background writer."""
+
+    def __init__(self, root, timestamp=None, folder_for=type_folder, background=False,
+                 queue_size=64, fsync=True, fsync_batch=32, fsync_interval=1.0, dedup=None):
+        self.timestamp = timestamp or time.strftime('%Y%m%d-%H%M%S')
+        self.folder_for = folder_for
+        self.fsync = fsync
+        self.fsync_batch = max(1, int(fsync_batch))
+        self.fsync_interval = float(fsync_interval)
+        self._lock = threading.Lock()
+        self._counters = {'files_written': 0, 'bytes_written': 0, 'files_tracked': 0, 'bytes_tracked': 0,
+                          'fsyncs': 0, 'errors': 0, 'max_queue': 0,
+                          'files_deduplicated': 0, 'bytes_deduplicated': 0, 'gc_files_removed': 0,
+                          'gc_bytes_freed': 0}
+        self.dedup = dict(dedup) if dedup else None
+        self._to_store = []  # (root, path) added to the output store by close()
+        self._unique = {}
+        self.errors = []
+        self.root = None
+        self.set_root(root)
+        self._queue = None
+        self._thread = None
+        if background:
+            self._queue = queue.Queue(maxsize=max(1, int(queue_size)))
+            self._thread = threading.Thread(target=self._run, name='output-writer', daemon=True)
+            self._thread.start()
+
+    # ---- paths ----
+    def set_root(self, root):
+        """Switch the base folder; resolved folders and paths are forgotten."""
+        with self._lock:
+            if root == self.root:
+                return
+            self.root = root
+            self._folders = {}
+            self._paths = {}
+
+    def folder(self, ext: str) -> str:
+        """Type folder for ext, resolved (and created) once; an existing folder of any case is reused."""
+        key = ext.lower()
+        found = self._folders.get(key)
+        if found is not None:
+            return found
+        preferred = self.folder_for(ext)
+        with self._lock:
+            found = self._folders.get(key)
+            if found is not None:
+                return found
+            try:
+                for entry in os.listdir(self.root):
+                    p = os.path.join(self.root, entry)
+                    if entry.lower() == preferred.lower() and os.path.isdir(p):
+                        found = p
+                        break
+            except OSError:
+                found = None
+            if found is None:
+                found = os.path.join(self.root, preferred)
+            os.makedirs(found, exist_ok=True)
+            self._folders[key] = found
+            return found
+
+    def path(self, name: str, ext: str, unique: bool = False) -> str:
+        """<root>/<type folder>/<name>_<timestamp>.<ext>; the same string on every call.
+
+        unique=True appends a per-name counter instead (-0001, -0002, ...) for runs that write
+        many files with the same name within one timestamp.
+        """
+        if unique:
+            with self._lock:
+                n = self._unique[(name, ext)] = self._unique.get((name, ext), 0) + 1
+            return os.path.join(self.folder(ext), f"{name}_{self.timestamp}-{n:04d}.{ext}")
+        key = (name, ext)
+        found = self._paths.get(key)
+        if found is None:
+            found = self._paths[key] = os.path.join(self.folder(ext), f"{name}_{self.timestamp}.{ext}")
+        return found
+
+    # ---- counters ----
+    def track(self, path: str) -> int:
+        """Count a file written by someone else (e.g. doc.saveAs); returns its size (0 if missing)."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return 0
+        with self._lock:
+            self._counters['files_tracked'] += 1
+            self._counters['bytes_tracked'] += size
+        if self.dedup:
+            with self._lock:
+                self._to_store.append((self.root, path))
+        return size
+
+    # ---- deduplication ----
+    def _deduplicate(self):
+        """Add the files of this run to the output store of their root, then apply the retention policy."""
+        with self._lock:
+            pending, self._to_store = self._to_store, []
+        by_root = {}
+        for root, path in pending:
+            by_root.setdefault(root, []).append(path)
+        keep, max_bytes = self.dedup.get('keep'), self.dedup.get('max_bytes')
+        import output_store
+        for root, paths in by_root.items():
+            try:
+                store = output_store.OutputStore(root, mode=self.dedup.get('mode', 'link'))
+            except Exception as e:
+                self._error(root, e)
+                continue
+            try:
+                for path in paths:
+                    try:
+                        info = store.add(path)
+                    except Exception as e:
+                        self._error(path, e)
+                        continue
+                    if info['duplicate'] and info['mode'] != 'copy':
+                        with self._lock:
+                            self._counters['files_deduplicated'] += 1
+                            self._counters['bytes_deduplicated'] += info['size']
+                if keep is not None or max_bytes is not None:
+                    result = store.gc(keep, max_bytes)
+                    with self._lock:
+                        self._counters['gc_files_removed'] += result['files_removed']
+                        self._counters['gc_bytes_freed'] += result['bytes_freed']
+            except Exception as e:
+                self._error(root, e)
+            finally:
+                store.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = dict(self._counters)
+        out['queued'] = self._queue.qsize() if self._queue is not None else 0
+        return out
+
+    # ---- writing ----
+    def write(self, name: str, ext: str, data, unique: bool = False) -> str:
+        """Write data (bytes or str) to path(name, ext); queued when the background writer is on."""
+        return self.write_to(self.path(name, ext, unique=unique), data)
+
+    def write_to(self, path: str, data) -> str:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if self._queue is None:
+            self._write_batch([self._open(path, data)])
+            return path
+        if self._thread is None:
+            raise RuntimeError('output writer is closed')
+        self._queue.put((path, data))
+        depth = self._queue.qsize()
+        with self._lock:
+            if depth > self._counters['max_queue']:
+                self._counters['max_queue'] = depth
+        return path
+
+    def _open(self, path, data):
+        tmp = f'{path}.tmp-{os.getpid()}'
+        f = open(tmp, 'wb')
+        try:
+            f.write(data)
+        except Exception:
+            f.close()
+            os.remove(tmp)
+            raise
+        return f, tmp, path, len(data)
+
+    def _write_batch(self, batch):
+        folders = set()
+        for f, tmp, path, size in batch:
+            try:
+                try:
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                finally:
+                    f.close()
+                os.replace(tmp, path)
+                folders.add(os.path.dirname(os.path.abspath(path)))
+                with self._lock:
+                    self._counters['files_written'] += 1
+                    self._counters['bytes_written'] += size
+                    self._counters['fsyncs'] += 1 if self.fsync else 0
+                if self.dedup:
+                    with self._lock:
+                        self._to_store.append((self.root, path))
+            except Exception as e:
+                self._error(path, e)
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+        if self.fsync:
+            for folder in folders:
+                _fsync_dir(folder)
+            with self._lock:
+                self._counters['fsyncs'] += len(folders) if os.name != 'nt' else 0
+
+    def _error(self, path, error):
+        with self._lock:
+            self._counters['errors'] += 1
+            self.errors.append((path, str(error)))
+
+    def _run(self):
+        pending = []
+        first = None
+        while True:
+            timeout = None
+            if pending:
+                timeout = max(0.0, self.fsync_interval - (time.monotonic() - first))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+            stop = item is None
+            if item:
+                try:
+                    pending.append(self._open(*item))
+                    if first is None:
+                        first = time.monotonic()
+                except Exception as e:
+                    self._error(item[0], e)
+            due = pending and (stop or len(pending) >= self.fsync_batch or self._queue.empty()
+                               or time.monotonic() - first >= self.fsync_interval)
+            if due:
+                self._write_batch(pending)
+                pending, first = [], None
+            if item != ():
+                self._queue.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """Wait until every queued write is on disk."""
+        if self._queue is not None and self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Drain the queue, stop the background writer and deduplicate the run's files (paths still work)."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self.dedup:
+            self._deduplicate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
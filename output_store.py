@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed, deduplicating store for timestamped outputs.
+
+build_out/create_cube put a timestamp in every file name, so repeated runs
+leave byte-identical api_test_result_*.FCStd, mesh_export_*.stl and
+part_export_*.step copies behind. OutputStore keeps one blob per SHA-256 of
+the content under <root>/.store/blobs and records every output file in an
+SQLite index next to it:
+
+  store = OutputStore('FreeCadTest')            # mode='link'
+  store.add('FreeCadTest/STL/mesh_export_20251103-160811.stl')
+  store.gc(keep=5, max_bytes=2 << 30)           # retention pass
+  print(store.stats())
+
+Modes:
+  link      the output file stays where it is and becomes a hard link to the
+            blob; a duplicate costs a directory entry, not its bytes. Where
+            linking is impossible (FAT, some network shares) the file is kept
+            as a plain copy.
+  manifest  a duplicate is removed and only recorded in the index;
+            materialize(path) puts a copy back.
+Linked outputs share their data with the store, so they must be replaced
+rather than edited in place (OutputManager and FreeCAD's saveAs do replace).
+
+Files are grouped by logical name: the folder relative to root plus the file
+name without its timestamp (STL/mesh_export.stl). gc() keeps the newest keep
+files of each logical name, then drops the oldest files (never the newest of
+a name) while the stored bytes exceed max_bytes, and finally deletes blobs
+nothing refers to.
+
+Command line (plain Python, FreeCAD not required):
+  python output_store.py FreeCadTest --adopt --keep 5 --max-mb 2048
+--adopt registers timestamped files already in the folder, so an existing
+pile is deduplicated in one go; --dry-run only reports what gc would remove.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from output_files import link_or_copy, logical_name as _file_logical_name
+
+STORE_DIR = '.store'
+MODES = ('link', 'manifest')
+DEDUP_ENV = 'FC_OUTPUT_DEDUP'        # 1/link or manifest
+KEEP_ENV = 'FC_OUTPUT_KEEP'          # files kept per logical name
+MAX_MB_ENV = 'FC_OUTPUT_MAX_MB'      # stored bytes limit
+_CHUNK = 1 << 20
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def logical_name(rel: str) -> str:
+    """Relative path without the timestamp of its file name: STL/mesh_export_20251103-160811.stl -> STL/mesh_export.stl."""
+    folder, base = os.path.split(rel)
+    name = _file_logical_name(base)
+    return f'{folder}/{name}' if folder else name
+
+
+def is_timestamped(path: str) -> bool:
+    """Whether the file name carries a build_out/create_cube timestamp."""
+    base = os.path.basename(path)
+    return os.path.splitext(_file_logical_name(base))[0] != os.path.splitext(base)[0]
+
+
+def _same_file(a, b) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+class OutputStore:
+    """One blob per content hash under root/.store; every output file is a link to it or an index entry."""
+
+    def __init__(self, root: str, mode: str = 'link'):
+        if mode not in MODES:
+            raise ValueError(f"mode must be 'link' or 'manifest', not {mode!r}")
+        self.root = os.path.abspath(root)
+        self.mode = mode
+        self.folder = os.path.join(self.root, STORE_DIR)
+        os.makedirs(os.path.join(self.folder, 'blobs'), exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(self.folder, 'index.sqlite3'), timeout=30,
+                                   check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, name TEXT, hash TEXT, '
+                         'size INTEGER, created REAL, mode TEXT)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS files_name ON files (name, created)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, size INTEGER)')
+        self._db.commit()
+        self.added = 0
+        self.duplicates = 0
+        self.bytes_saved = 0
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _blob(self, digest: str) -> str:
+        return os.path.join(self.folder, 'blobs', digest[:2], digest)
+
+    def _rel(self, path: str) -> str:
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel.startswith(os.pardir) or os.path.isabs(rel):
+            raise ValueError(f'{path} is not under {self.root}')
+        return rel.replace(os.sep, '/')
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, *rel.split('/'))
+
+    # ---- adding ----
+    def add(self, path: str) -> dict:
+        """Register an output file; a duplicate becomes a hard link (or an index entry in manifest mode).
+
+        Returns {'path', 'hash', 'size', 'mode', 'duplicate'}.
+        """
+        rel = self._rel(path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._db.execute('SELECT hash, size, mode FROM files WHERE path=?', (rel,)).fetchone()
+        if row and row[1] == st.st_size and row[2] == 'link' and _same_file(path, self._blob(row[0])):
+            # already linked to its blob (adopt run twice, or tracked twice): nothing to hash
+            return {'path': path, 'hash': row[0], 'size': st.st_size, 'mode': 'link', 'duplicate': False}
+        digest = file_hash(path)
+        blob = self._blob(digest)
+        with self._lock:
+            known = os.path.isfile(blob)
+            if not known:
+                mode = link_or_copy(path, blob)
+                self._db.execute('INSERT OR REPLACE INTO blobs VALUES (?, ?)', (digest, st.st_size))
+            elif self.mode == 'manifest':
+                os.remove(path)
+                mode = 'manifest'
+            else:
+                mode = 'link' if _same_file(path, blob) or self._relink(blob, path) else 'copy'
+            if known and mode != 'copy':
+                self.duplicates += 1
+                self.bytes_saved += st.st_size
+            self._db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                             (rel, logical_name(rel), digest, st.st_size, st.st_mtime, mode))
+            self._db.commit()
+            self.added += 1
+        return {'path': path, 'hash': digest, 'size': st.st_size, 'mode': mode, 'duplicate': known}
+
+    @staticmethod
+    def _relink(blob, path) -> bool:
+        tmp = f'{path}.tmp-{os.getpid()}-{threading.get_ident()}'
+        try:
+            os.link(blob, tmp)
+        except OSError:
+            return False
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            os.remove(tmp)
+            return False
+        return True
+
+    def adopt(self, folder: str = None, log=None) -> int:
+        """Register every timestamped file under folder (default root) not yet in the index; returns the count."""
+        folder = os.path.abspath(folder or self.root)
+        with self._lock:
+            known = {r[0] for r in self._db.execute("SELECT path FROM files WHERE mode='link'")}
+        count = 0
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = sorted(d for d in dirnames if d != STORE_DIR)
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                if not is_timestamped(filename) or '.tmp-' in filename or self._rel(path) in known:
+                    continue
+                try:
+                    info = self.add(path)
+                except OSError as e:
+                    if log:
+                        log(f'[output_store] {path}: {e}\n')
+                    continue
+                count += 1
+                if log and info['duplicate']:
+                    log(f"[output_store] {self._rel(path)} -> {info['hash'][:12]} ({info['mode']})\n")
+        return count
+
+    def materialize(self, path: str) -> str:
+        """Put the content of a manifest entry back at path (as a link where possible); returns path."""
+        rel = self._rel(path)
+        with self._lock:
+            row = self._db.execute('SELECT hash FROM files WHERE path=?', (rel,)).fetchone()
+            if row is None:
+                raise KeyError(f'{path} is not in the output store')
+            mode = link_or_copy(self._blob(row[0]), path, link=self.mode == 'link')
+            self._db.execute('UPDATE files SET mode=? WHERE path=?', (mode, rel))
+            self._db.commit()
+        return path
+
+    def entries(self, name: str = None) -> list:
+        """[{'path', 'name', 'hash', 'size', 'created', 'mode'}] newest first, optionally for one logical name."""
+        sql = 'SELECT path, name, hash, size, created, mode FROM files'
+        args = ()
+        if name is not None:
+            sql, args = sql + ' WHERE name=?', (name,)
+        with self._lock:
+            rows = self._db.execute(sql + ' ORDER BY created DESC, path DESC', args).fetchall()
+        keys = ('path', 'name', 'hash', 'size', 'created', 'mode')
+        return [dict(zip(keys, r)) for r in rows]
+
+    # ---- retention ----
+    def stored_bytes(self) -> int:
+        """Bytes on disk: every blob once, plus files that had to stay plain copies."""
+        with self._lock:
+            blobs = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+            copies = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM files WHERE mode='copy'").fetchone()[0]
+        return blobs + copies
+
+    def gc(self, keep: int = None, max_bytes: int = None, dry_run: bool = False, log=None) -> dict:
+        """Apply the retention policy; returns {'files_removed', 'blobs_removed', 'bytes_freed', 'stored_bytes'}."""
+        t0 = time.perf_counter()
+        with self._lock:
+            rows = self._db.execute('SELECT path, name, hash, size, created, mode FROM files '
+                                    'ORDER BY name, created DESC, path DESC').fetchall()
+            blob_size = dict(self._db.execute('SELECT hash, size FROM blobs'))
+            refs = {}
+            for r in rows:
+                refs[r[2]] = refs.get(r[2], 0) + 1
+            doomed = []
+            survivors = []  # (created, path, row) of files gc may still drop for space
+            rank = {}
+            for r in rows:
+                n = rank[r[1]] = rank.get(r[1], 0) + 1
+                if keep is not None and n > max(1, int(keep)):
+                    doomed.append(r)
+                elif n > 1:
+                    survivors.append(r)
+
+            def release(r):
+                refs[r[2]] -= 1
+                freed = r[3] if r[5] == 'copy' else 0
+                if refs[r[2]] == 0 and r[2] in blob_size:
+                    freed += blob_size[r[2]]
+                return freed
+
+            stored = sum(blob_size.values()) + sum(r[3] for r in rows if r[5] == 'copy')
+            freed = sum(release(r) for r in doomed)
+            if max_bytes is not None and stored - freed > max_bytes:
+                for r in sorted(survivors, key=lambda r: (r[4], r[0])):
+                    if stored - freed <= max_bytes:
+                        break
+                    doomed.append(r)
+                    freed += release(r)
+            orphans = [h for h in blob_size if refs.get(h, 0) == 0]
+            result = {'files_removed': len(doomed), 'blobs_removed': len(orphans), 'bytes_freed': freed,
+                      'stored_bytes': stored - freed, 'dry_run': dry_run}
+            if dry_run:
+                if log:
+                    for r in doomed:
+                        log(f'[output_store] would remove {r[0]}\n')
+                return result
+            for r in doomed:
+                self._remove_file(r, log)
+            for digest in orphans:
+                try:
+                    os.remove(self._blob(digest))
+                except FileNotFoundError:
+                    pass
+            self._db.executemany('DELETE FROM files WHERE path=?', [(r[0],) for r in doomed])
+            self._db.executemany('DELETE FROM blobs WHERE hash=?', [(h,) for h in orphans])
+            self._db.commit()
+        result['seconds'] = round(time.perf_counter() - t0, 6)
+        if log:
+            log('[output_store] gc: %d files, %d blobs removed, %.1f MB freed, %.1f MB stored\n'
+                % (len(doomed), len(orphans), freed / (1 << 20), result['stored_bytes'] / (1 << 20)))
+        return result
+
+    def _remove_file(self, row, log=None):
+        rel, _name, digest, size, _created, mode = row
+        if mode == 'manifest':
+            return
+        path = self._abs(rel)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return
+        # the file may have been rewritten since it was added; only delete what the index describes
+        same = _same_file(path, self._blob(digest)) if mode == 'link' else \
+            st.st_size == size and file_hash(path) == digest
+        if same:
+            os.remove(path)
+        elif log:
+            log(f'[output_store] {rel} changed since it was stored; left in place\n')
+
+    def stats(self) -> dict:
+        with self._lock:
+            files, logical = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files').fetchone()
+            blobs = self._db.execute('SELECT COUNT(*) FROM blobs').fetchone()[0]
+        return {'files': files, 'blobs': blobs, 'logical_bytes': logical, 'stored_bytes': self.stored_bytes(),
+                'added': self.added, 'duplicates': self.duplicates, 'bytes_saved': self.bytes_saved}
+
+
+def options_from_env() -> dict:
+    """Store settings from FC_OUTPUT_DEDUP / FC_OUTPUT_KEEP / FC_OUTPUT_MAX_MB ({} when dedup is off)."""
+    setting = (os.environ.get(DEDUP_ENV) or '').strip().lower()
+    if not setting or setting == '0':
+        return {}
+    keep = os.environ.get(KEEP_ENV)
+    max_mb = os.environ.get(MAX_MB_ENV)
+    return {'mode': 'manifest' if setting == 'manifest' else 'link',
+            'keep': int(keep) if keep else None,
+            'max_bytes': int(float(max_mb) * (1 << 20)) if max_mb else None}
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='Deduplicate timestamped outputs and apply a retention policy')
+    ap.add_argument('root', help='output folder (e.g. FreeCadTest)')
+    ap.add_argument('--mode', choices=MODES, default='link')
+    ap.add_argument('--adopt', action='store_true', help='register timestamped files already in root')
+    ap.add_argument('--keep', type=int, default=None, help='files kept per logical name')
+    ap.add_argument('--max-mb', type=float, default=None, help='stored size limit in MB')
+    ap.add_argument('--dry-run', action='store_true', help='only report what gc would remove')
+    args = ap.parse_args(argv)
+    with OutputStore(args.root, mode=args.mode) as store:
+        if args.adopt:
+            count = store.adopt(log=sys.stdout.write)
+            print(f'{count} files registered, {store.duplicates} duplicates, '
+                  f'{store.bytes_saved / (1 << 20):.1f} MB saved')
+        if args.keep is not None or args.max_mb is not None:
+            max_bytes = int(args.max_mb * (1 << 20)) if args.max_mb is not None else None
+            store.gc(args.keep, max_bytes, dry_run=args.dry_run, log=sys.stdout.write)
+        s = store.stats()
+        print(f"{s['files']} files -> {s['blobs']} blobs, {s['logical_bytes'] / (1 << 20):.1f} MB of outputs "
+              f"in {s['stored_bytes'] / (1 << 20):.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
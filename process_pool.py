@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Process pools for the NumPy/FreeCAD batch helpers (curve_projection,
+export_pipeline, mesh_compare, hidden_line).
+
+Worker processes are started with sys.executable, so they only work when
+that is a Python interpreter; under FreeCADCmd (or FreeCAD's GUI) it is not,
+and the callers fall back to threads or to working in the calling process:
+
+  import process_pool
+  if process_pool.usable():
+      with process_pool.executor(workers) as pool:
+          ...
+  # callers also catch BrokenProcessPool/OSError and finish locally
+
+Pools use the 'spawn' start method on every platform, so a worker never
+inherits FreeCAD state or threads from the parent.
+"""
+from __future__ import annotations
+import concurrent.futures as cf
+import os
+import sys
+
+
+def usable() -> bool:
+    """Whether worker processes can be started (sys.executable is a Python interpreter, not FreeCADCmd)."""
+    return 'python' in os.path.basename(sys.executable).lower()
+
+
+def executor(max_workers=None, initializer=None, initargs=()) -> cf.ProcessPoolExecutor:
+    """ProcessPoolExecutor using the 'spawn' start method."""
+    import multiprocessing
+    return cf.ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                                  initializer=initializer, initargs=initargs)
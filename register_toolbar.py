@@ -4,6 +4,8 @@ Register a temporary toolbar with commands wrapping the macros in this folder.
 Run this inside FreeCAD GUI Python console or with FreeCAD (not FreeCADCmd) to add a toolbar for this session.
 """
 import os
+import threading
+import time
 import FreeCAD as App
 import FreeCADGui as Gui
 try:
@@ -85,15 +87,49 @@ class _MacroCommand:
     def Activated(self):
         _exec_macro(self.path)
 
+# Compiled macros: path -> ((mtime_ns, size), code). A click only stats the file; the
+# code object is rebuilt when the file changed on disk.
+_CODE_CACHE = {}
+_CODE_LOCK = threading.Lock()
+
+def _compiled(path):
+    """Return (code, cached) for a macro file, compiling it only when path/mtime/size changed."""
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    with _CODE_LOCK:
+        hit = _CODE_CACHE.get(path)
+    if hit is not None and hit[0] == key:
+        return hit[1], True
+    with open(path, 'rb') as f:
+        source = f.read()
+    code = compile(source, path, 'exec')
+    with _CODE_LOCK:
+        _CODE_CACHE[path] = (key, code)
+    return code, False
+
+def _preload(paths):
+    """Compile macros ahead of the first click (background thread; errors surface on click)."""
+    for p in paths:
+        try:
+            _compiled(p)
+        except Exception:
+            pass
+
 def _exec_macro(path):
-    """Execute a macro file by reading and exec'ing its contents.
+    """Execute a macro file by exec'ing its (cached) code object.
     This avoids relying on Gui.MacroManager which may not exist in some builds.
     """
+    name = os.path.splitext(os.path.basename(path))[0]
     try:
-        with open(path, 'rb') as f:
-            code = f.read()
+        t0 = time.perf_counter()
+        code, cached = _compiled(path)
+        t1 = time.perf_counter()
         ns = {'__file__': path, '__name__': '__main__'}
-        exec(compile(code, path, 'exec'), ns)
+        exec(code, ns)
+        t2 = time.perf_counter()
+        App.Console.PrintMessage('[register_toolbar] %s: %.1f ms (%s %.1f ms, run %.1f ms)\n'
+                                 % (name, (t2 - t0) * 1e3, 'cached' if cached else 'compile',
+                                    (t1 - t0) * 1e3, (t2 - t1) * 1e3))
     except Exception as e:
         App.Console.PrintError('[register_toolbar] run macro failed: %s\n' % e)
 
@@ -101,6 +137,11 @@ def _exec_macro(path):
 for name, path in MACROS.items():
     Gui.addCommand(name, _MacroCommand(name, path))
 
+# Compile all macros in the background so the first click does not pay for it
+# (set FC_MACRO_PRELOAD=0 to disable)
+if os.environ.get('FC_MACRO_PRELOAD', '1') != '0':
+    threading.Thread(target=_preload, args=(list(MACROS.values()),), name='macro-preload', daemon=True).start()
+
 # Create toolbar (compatible way without relying on CommandManager)
 mw = Gui.getMainWindow()
 if mw is not None:
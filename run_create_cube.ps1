@@ -9,7 +9,9 @@ param(
     [string]$Rot,           # "rx,ry,rz" degrees
     [double]$HoleRadius = 0,
     [ValidateSet('X','Y','Z')]
-    [string]$HoleAxis = 'Z'
+    [string]$HoleAxis = 'Z',
+    [string]$Jobs,          # CSV/JSONL job file: batch mode, all jobs in one FreeCADCmd process
+    [string]$Manifest       # per-job result manifest (.jsonl), default <jobs>.manifest.jsonl
 )
 
 # Candidate FreeCADCmd paths (Scoop first)
@@ -39,6 +41,8 @@ if ($Pos)   { $env:FC_POS   = $Pos }   else { Remove-Item Env:FC_POS   -ErrorAct
 if ($Rot)   { $env:FC_ROT   = $Rot }   else { Remove-Item Env:FC_ROT   -ErrorAction SilentlyContinue }
 if ($HoleRadius -gt 0) { $env:FC_HOLE_RADIUS = $HoleRadius.ToString([System.Globalization.CultureInfo]::InvariantCulture) } else { Remove-Item Env:FC_HOLE_RADIUS -ErrorAction SilentlyContinue }
 if ($HoleAxis) { $env:FC_HOLE_AXIS = $HoleAxis.ToUpper() } else { Remove-Item Env:FC_HOLE_AXIS -ErrorAction SilentlyContinue }
+if ($Jobs)     { $env:FC_JOBS     = $Jobs }     else { Remove-Item Env:FC_JOBS     -ErrorAction SilentlyContinue }
+if ($Manifest) { $env:FC_MANIFEST = $Manifest } else { Remove-Item Env:FC_MANIFEST -ErrorAction SilentlyContinue }
 
 # Run
 & $fc 'd:\FreeCad\create_cube.py'
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""
+Binary/ASCII STL reading and writing with NumPy (no FreeCAD needed for files).
+
+Writing builds the whole record array in memory and writes it at once:
+  write_stl(path, vertices, facets)            # (V,3) floats + (F,3) vertex indices
+  write_triangles(path, triangles)             # (F,3,3) corner coordinates
+Inside FreeCAD, several objects are tessellated and merged into one file:
+  export_objects([obj1, obj2], path, linear_deflection=0.1, angular_deflection=0.523599)
+
+Reading returns an StlMesh whose arrays are views on a read-only memory map
+for binary files (nothing is copied until the data is touched):
+  mesh = read_stl(path)
+  mesh.triangles        # (F,3,3) float32
+  mesh.normals          # (F,3) float32
+  v, f = mesh.indexed() # shared vertices + facets
+
+Command line:
+  python stl_io.py info FreeCadTest/STL/mesh_export_20251103-130756.stl
+  python stl_io.py bench [--triangles 200000] [--out-dir <dir>]   # vs Mesh.export when FreeCAD is importable
+"""
+from __future__ import annotations
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+HEADER_SIZE = 80
+# One binary STL facet: normal, three corners, attribute byte count (50 bytes, little-endian)
+FACET_DTYPE = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attr', '<u2')])
+DEFAULT_HEADER = b'stl_io binary STL'
+
+
+class StlMesh:
+    """Triangles read from an STL file (views on the file data for binary input)."""
+
+    def __init__(self, triangles, normals, attributes=None, header=b'', name=None, binary=True):
+        self.triangles = triangles
+        self.normals = normals
+        self.attributes = attributes
+        self.header = header
+        self.name = name
+        self.binary = binary
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def bounds(self):
+        """(min xyz, max xyz) of all corners, or None for an empty mesh."""
+        if len(self.triangles) == 0:
+            return None
+        pts = self.triangles.reshape(-1, 3)
+        return pts.min(axis=0), pts.max(axis=0)
+
+    def indexed(self, decimals=None):
+        """Merge identical corners: returns (vertices (V,3), facets (F,3) int64).
+
+        decimals rounds coordinates first, welding corners closer than 10**-decimals.
+        """
+        pts = np.asarray(self.triangles, dtype=np.float64).reshape(-1, 3)
+        if decimals is not None:
+            pts = np.round(pts, decimals)
+        vertices, inverse = np.unique(pts, axis=0, return_inverse=True)
+        return vertices, inverse.reshape(-1, 3).astype(np.int64)
+
+
+# -------------------------- writing --------------------------
+def facet_normals(triangles):
+    """Unit normals of (F,3,3) triangles by the right-hand rule; degenerate facets get 0."""
+    tri = np.asarray(triangles, dtype=np.float64)
+    n = np.cross(tri[:, 1] - tri[:, 0], tri[:, 2] - tri[:, 0])
+    length = np.linalg.norm(n, axis=1, keepdims=True)
+    np.divide(n, length, out=n, where=length > 0)
+    n[length[:, 0] == 0] = 0.0
+    return n
+
+
+def _header(header):
+    if isinstance(header, str):
+        header = header.encode('ascii', 'replace')
+    header = bytes(header or b'')[:HEADER_SIZE]
+    # a binary file whose header starts with "solid" is taken for ASCII by some readers
+    if header[:5].lower() == b'solid':
+        header = b'STL ' + header[:HEADER_SIZE - 4]
+    return header.ljust(HEADER_SIZE, b' ')
+
+
+def write_triangles(path, triangles, normals=None, header=DEFAULT_HEADER):
+    """Write (F,3,3) triangles as binary STL in a single write; returns path."""
+    tri = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    records = np.zeros(len(tri), dtype=FACET_DTYPE)
+    records['vertices'] = tri
+    records['normal'] = facet_normals(tri) if normals is None else np.asarray(normals).reshape(-1, 3)
+    buf = bytearray(HEADER_SIZE + 4 + records.nbytes)
+    buf[:HEADER_SIZE] = _header(header)
+    buf[HEADER_SIZE:HEADER_SIZE + 4] = np.uint32(len(tri)).tobytes()
+    buf[HEADER_SIZE + 4:] = records.tobytes()
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(buf)
+    return path
+
+
+def write_stl(path, vertices, facets, header=DEFAULT_HEADER):
+    """Write an indexed mesh ((V,3) vertices, (F,3) facet indices) as binary STL; returns path."""
+    v = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    f = np.asarray(facets, dtype=np.int64).reshape(-1, 3)
+    return write_triangles(path, v[f], header=header)
+
+
+def merge_meshes(parts):
+    """Concatenate [(vertices, facets), ...] into one indexed mesh."""
+    vs, fs, offset = [], [], 0
+    for vertices, facets in parts:
+        v = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+        vs.append(v)
+        fs.append(np.asarray(facets, dtype=np.int64).reshape(-1, 3) + offset)
+        offset += len(v)
+    if not vs:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64)
+    return np.concatenate(vs), np.concatenate(fs)
+
+
+# -------------------------- FreeCAD adapters --------------------------
+def mesh_arrays(mesh):
+    """(vertices, facets) of a FreeCAD Mesh.Mesh."""
+    points, facets = mesh.Topology
+    v = np.array([(p.x, p.y, p.z) for p in points], dtype=np.float64).reshape(-1, 3)
+    return v, np.array(facets, dtype=np.int64).reshape(-1, 3)
+
+
+def shape_arrays(shape, linear_deflection=0.1, angular_deflection=0.523599):
+    """(vertices, facets) of a Part.Shape, tessellated with MeshPart when available."""
+    try:
+        import MeshPart  # type: ignore
+    except Exception:
+        MeshPart = None
+    if MeshPart is not None:
+        return mesh_arrays(MeshPart.meshFromShape(Shape=shape, LinearDeflection=linear_deflection,
+                                                  AngularDeflection=angular_deflection, Relative=False))
+    points, facets = shape.tessellate(linear_deflection)
+    v = np.array([(p.x, p.y, p.z) for p in points], dtype=np.float64).reshape(-1, 3)
+    return v, np.array(facets, dtype=np.int64).reshape(-1, 3)
+
+
+def object_arrays(obj, linear_deflection=0.1, angular_deflection=0.523599, cache=None):
+    """(vertices, facets) of a document object: its Mesh if it is a mesh feature, else its Shape.
+
+    cache is an optional tessellation_cache.TessellationCache for shapes.
+    """
+    mesh = getattr(obj, 'Mesh', None)
+    if mesh is not None and hasattr(mesh, 'Topology'):
+        # a Mesh::Feature keeps its Placement as the mesh transform: Topology is already placed
+        return mesh_arrays(mesh)
+    if cache is not None:
+        return cache.tessellate(obj.Shape, linear_deflection, angular_deflection)
+    return shape_arrays(obj.Shape, linear_deflection, angular_deflection)
+
+
+def export_objects(objs, path, linear_deflection=0.1, angular_deflection=0.523599, header=DEFAULT_HEADER,
+                   cache=None):
+    """Tessellate every object and write them merged into one binary STL; returns path."""
+    v, f = merge_meshes(object_arrays(o, linear_deflection, angular_deflection, cache) for o in objs)
+    return write_stl(path, v, f, header=header)
+
+
+# -------------------------- reading --------------------------
+def _is_binary(path, size):
+    if size < HEADER_SIZE + 4:
+        return False
+    with open(path, 'rb') as f:
+        head = f.read(HEADER_SIZE + 4)
+    count = int(np.frombuffer(head, dtype='<u4', count=1, offset=HEADER_SIZE)[0])
+    if size == HEADER_SIZE + 4 + count * FACET_DTYPE.itemsize:
+        return True
+    return not head.lstrip()[:5].lower() == b'solid'
+
+
+def read_binary(path, mmap=True):
+    """Binary STL as an StlMesh; with mmap the arrays are read-only views on the file."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(HEADER_SIZE + 4)
+    if len(head) < HEADER_SIZE + 4:
+        raise ValueError(f'{path}: truncated STL header')
+    count = int(np.frombuffer(head, dtype='<u4', count=1, offset=HEADER_SIZE)[0])
+    available = (size - HEADER_SIZE - 4) // FACET_DTYPE.itemsize
+    if count > available:
+        raise ValueError(f'{path}: header announces {count} facets, file holds {available}')
+    if count == 0:
+        records = np.zeros(0, dtype=FACET_DTYPE)
+    elif mmap:
+        records = np.memmap(path, dtype=FACET_DTYPE, mode='r', offset=HEADER_SIZE + 4, shape=(count,))
+    else:
+        records = np.fromfile(path, dtype=FACET_DTYPE, count=count, offset=HEADER_SIZE + 4)
+    return StlMesh(records['vertices'], records['normal'], records['attr'], head[:HEADER_SIZE], binary=True)
+
+
+def read_ascii(path):
+    """ASCII STL (all solids merged) as an StlMesh; normals are recomputed from the corners."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    tokens = np.array(data.split())
+    name = None
+    first = data.lstrip().split(b'\n', 1)[0].split(None, 1)
+    if len(first) > 1:
+        name = first[1].strip().decode('utf-8', 'replace')
+    at = np.flatnonzero(tokens == b'vertex')
+    if len(at) % 3:
+        raise ValueError(f'{path}: vertex count {len(at)} is not a multiple of 3')
+    coords = tokens[(at[:, None] + np.arange(1, 4)).ravel()].astype(np.float32)
+    tri = coords.reshape(-1, 3, 3)
+    return StlMesh(tri, facet_normals(tri).astype(np.float32), None, b'', name=name, binary=False)
+
+
+def read_stl(path, mmap=True):
+    """Read a binary or ASCII STL file (format detected from size and header)."""
+    if _is_binary(path, os.path.getsize(path)):
+        return read_binary(path, mmap=mmap)
+    return read_ascii(path)
+
+
+def write_ascii(path, triangles, name='mesh'):
+    """Write (F,3,3) triangles as ASCII STL (for interop/debugging); returns path."""
+    tri = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 3)
+    normals = facet_normals(tri)
+    rows = np.concatenate([normals[:, None, :], tri], axis=1).reshape(-1, 12)
+    facet = ('facet normal %e %e %e\n  outer loop\n' + '    vertex %e %e %e\n' * 3 + '  endloop\nendfacet\n')
+    with open(path, 'w', encoding='ascii') as f:
+        f.write(f'solid {name}\n')
+        f.writelines(facet % tuple(r) for r in rows)
+        f.write(f'endsolid {name}\n')
+    return path
+
+
+# -------------------------- command line --------------------------
+def _grid_triangles(n):
+    """About n triangles of a wavy height field, for benchmarking."""
+    side = max(2, int((n / 2) ** 0.5) + 1)
+    x, y = np.meshgrid(np.linspace(0, 100, side), np.linspace(0, 100, side))
+    z = np.sin(x / 7.0) * np.cos(y / 5.0) * 10.0
+    v = np.column_stack([x.ravel(), y.ravel(), z.ravel()])
+    i = np.arange(side * side).reshape(side, side)
+    a, b, c, d = i[:-1, :-1].ravel(), i[:-1, 1:].ravel(), i[1:, :-1].ravel(), i[1:, 1:].ravel()
+    f = np.concatenate([np.column_stack([a, b, d]), np.column_stack([a, d, c])])
+    return v, f
+
+
+def _timed(func, *args):
+    t = time.perf_counter()
+    out = func(*args)
+    return out, time.perf_counter() - t
+
+
+def _bench(n, out_dir):
+    v, f = _grid_triangles(n)
+    tri = v[f]
+    print(f'[bench] {len(f)} triangles')
+    path = os.path.join(out_dir, 'bench_stl_io.stl')
+    _, t = _timed(write_stl, path, v, f)
+    print(f'  stl_io.write_stl      : {t * 1000:9.2f} ms  ({os.path.getsize(path)} bytes)')
+    mesh, t = _timed(read_stl, path)
+    print(f'  stl_io.read_stl (mmap): {t * 1000:9.2f} ms')
+    _, t = _timed(lambda: float(np.asarray(mesh.triangles).sum()))
+    print(f'  touch all triangles   : {t * 1000:9.2f} ms')
+    _, t = _timed(read_stl, path, False)
+    print(f'  stl_io.read_stl (copy): {t * 1000:9.2f} ms')
+    try:
+        import Mesh  # type: ignore
+    except Exception:
+        print('  Mesh.export           : skipped (FreeCAD Mesh module not importable)')
+        return 0
+    fc_mesh, t = _timed(Mesh.Mesh, [[tuple(p) for p in t3] for t3 in tri.tolist()])
+    print(f'  Mesh.Mesh(build)      : {t * 1000:9.2f} ms')
+    fc_path = os.path.join(out_dir, 'bench_mesh_export.stl')
+    _, t = _timed(fc_mesh.write, fc_path)
+    print(f'  Mesh.write            : {t * 1000:9.2f} ms')
+    import FreeCAD  # type: ignore
+    doc = FreeCAD.newDocument('StlIoBench')
+    try:
+        feature = doc.addObject('Mesh::Feature', 'BenchMesh')
+        feature.Mesh = fc_mesh
+        _, t = _timed(Mesh.export, [feature], fc_path)
+        print(f'  Mesh.export           : {t * 1000:9.2f} ms')
+    finally:
+        FreeCAD.closeDocument(doc.Name)
+    _, t = _timed(Mesh.Mesh, fc_path)
+    print(f'  Mesh.Mesh(read)       : {t * 1000:9.2f} ms')
+    return 0
+
+
+def main(argv):
+    args = argv[1:]
+    if not args or args[0] not in ('info', 'bench'):
+        print(__doc__)
+        return 2
+    if args[0] == 'info':
+        for path in args[1:]:
+            mesh = read_stl(path)
+            bounds = mesh.bounds()
+            print(f"{path}: {'binary' if mesh.binary else 'ascii'}, {len(mesh)} triangles")
+            if bounds is not None:
+                print(f"  bbox min {np.round(bounds[0], 6).tolist()} max {np.round(bounds[1], 6).tolist()}")
+        return 0
+    n, out_dir = 200000, None
+    i = 1
+    while i < len(args):
+        if args[i] == '--triangles' and i + 1 < len(args):
+            n = int(args[i + 1])
+            i += 2
+        elif args[i] == '--out-dir' and i + 1 < len(args):
+            out_dir = args[i + 1]
+            i += 2
+        else:
+            i += 1
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        return _bench(n, out_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        return _bench(n, tmp)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
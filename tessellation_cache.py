@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Tessellation cache: reuse vertex/facet arrays of a shape across STL exports.
+
+Meshes are keyed by a hash of the shape geometry (its BREP text, so placement
+is included) and stored together with the deflections they were built with.
+A mesh built with a finer deflection satisfies a later request for a coarser
+one: the preview STL, the print STL and the thumbnail of the same body are
+tessellated once, at the finest setting asked for first.
+
+Inside FreeCAD:
+  import tessellation_cache as tc
+  v, f = tc.tessellate(body.Shape, 0.1, 0.523599)   # cached in default_cache()
+  stl_io.export_objects([body], path, 0.1, 0.523599, cache=tc.default_cache())
+
+The default cache lives in memory for the whole FreeCAD session; set
+FC_TESS_CACHE to a folder to also keep meshes on disk (.npz) between processes.
+The folder is kept under max_bytes (FC_TESS_CACHE_MAX_MB, default 1024) by
+removing the least recently used shapes once a write pushes it over.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+TESS_CACHE_ENV = 'FC_TESS_CACHE'
+TESS_CACHE_MAX_MB_ENV = 'FC_TESS_CACHE_MAX_MB'
+DEFAULT_MAX_SHAPES = 64
+DEFAULT_MAX_BYTES = 1 << 30
+
+
+def shape_key(shape) -> str:
+    """SHA-256 of the shape's BREP text (geometry, topology and placement)."""
+    return hashlib.sha256(shape.exportBrepToString().encode('utf-8')).hexdigest()
+
+
+def _satisfies(built, wanted):
+    """A mesh built at (linear, angular) may serve a request for coarser or equal deflections."""
+    return built[0] <= wanted[0] + 1e-12 and built[1] <= wanted[1] + 1e-12
+
+
+class TessellationCache:
+    """In-memory LRU of meshes per shape key, optionally backed by .npz files in root (LRU, max_bytes)."""
+
+    def __init__(self, root=None, max_shapes=DEFAULT_MAX_SHAPES, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_shapes = max(1, int(max_shapes))
+        self.max_bytes = int(max_bytes)
+        self._disk_bytes = None  # estimate, from one scan of root plus this process's writes
+        if root:
+            os.makedirs(root, exist_ok=True)
+        # key -> {(linear, angular): (vertices, facets)}
+        self._meshes = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.finer_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+
+    # ---- lookups ----
+    def lookup(self, key, linear, angular):
+        """Cached (vertices, facets) usable at the given deflections, or None.
+
+        Among the usable meshes the coarsest one (fewest facets) is returned.
+        """
+        wanted = (float(linear), float(angular))
+        with self._lock:
+            entries = self._entries(key)
+            usable = [d for d in entries if _satisfies(d, wanted)]
+            if not usable:
+                self.misses += 1
+                return None
+            best = max(usable)
+            self._meshes.move_to_end(key)
+            if best == wanted:
+                self.hits += 1
+            else:
+                self.finer_hits += 1
+            return entries[best]
+
+    def store(self, key, linear, angular, vertices, facets):
+        """Remember a mesh; meshes made redundant by it (coarser ones) are dropped."""
+        built = (float(linear), float(angular))
+        v = np.ascontiguousarray(vertices, dtype=np.float64).reshape(-1, 3)
+        f = np.ascontiguousarray(facets, dtype=np.int64).reshape(-1, 3)
+        v.flags.writeable = False
+        f.flags.writeable = False
+        with self._lock:
+            entries = self._entries(key)
+            for d in [d for d in entries if d != built and _satisfies(built, d)]:
+                del entries[d]
+                self._remove_file(key, d)
+            entries[built] = (v, f)
+            self._meshes.move_to_end(key)
+            while len(self._meshes) > self.max_shapes:
+                self._meshes.popitem(last=False)
+            if self.root:
+                path = self._file(key, built)
+                tmp = f'{path}.tmp-{os.getpid()}.npz'
+                np.savez(tmp, vertices=v, facets=f)
+                os.replace(tmp, path)
+                self._account(key, os.path.getsize(path))
+        return v, f
+
+    def tessellate(self, shape, linear, angular, key=None):
+        """(vertices, facets) of shape at the given deflections, tessellating only on a miss."""
+        key = key or shape_key(shape)
+        found = self.lookup(key, linear, angular)
+        if found is not None:
+            return found
+        from stl_io import shape_arrays
+        v, f = shape_arrays(shape, linear, angular)
+        return self.store(key, linear, angular, v, f)
+
+    def clear(self):
+        with self._lock:
+            self._meshes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'finer_hits': self.finer_hits, 'misses': self.misses,
+                    'shapes': len(self._meshes), 'meshes': sum(len(e) for e in self._meshes.values()),
+                    'disk_bytes': self._disk_bytes or 0, 'disk_evictions': self.disk_evictions}
+
+    # ---- disk backing ----
+    def _dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def _file(self, key, deflection):
+        folder = self._dir(key)
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, f'{deflection[0]!r}_{deflection[1]!r}.npz')
+
+    def _remove_file(self, key, deflection):
+        if self.root:
+            try:
+                os.remove(self._file(key, deflection))
+            except OSError:
+                pass
+
+    def _scan(self):
+        """[(last used, key, bytes)] of every shape folder under root."""
+        found = []
+        for prefix in os.listdir(self.root):
+            top = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(top):
+                continue
+            for key in os.listdir(top):
+                folder = os.path.join(top, key)
+                try:
+                    size = sum(e.stat().st_size for e in os.scandir(folder) if e.is_file())
+                    found.append((os.stat(folder).st_mtime, key, size))
+                except OSError:
+                    continue
+        return found
+
+    def _account(self, key, size):
+        """Count a written file; over max_bytes, drop least recently used shapes (never key itself)."""
+        if self._disk_bytes is None:
+            self._disk_bytes = sum(size for _t, _k, size in self._scan())
+        else:
+            self._disk_bytes += size
+        if self._disk_bytes <= self.max_bytes:
+            return
+        # other processes share the folder: rescan before deleting anything
+        found = sorted(self._scan())
+        total = sum(size for _t, _k, size in found)
+        for _t, old, size in found:
+            if total <= self.max_bytes:
+                break
+            if old == key:
+                continue
+            shutil.rmtree(self._dir(old), ignore_errors=True)
+            self._meshes.pop(old, None)
+            total -= size
+            self.disk_evictions += 1
+        self._disk_bytes = total
+
+    def _entries(self, key):
+        entries = self._meshes.get(key)
+        if entries is not None:
+            return entries
+        entries = self._meshes[key] = {}
+        if not self.root or not os.path.isdir(self._dir(key)):
+            return entries
+        try:
+            os.utime(self._dir(key))  # folder mtime = last use, for the disk LRU
+        except OSError:
+            pass
+        for name in os.listdir(self._dir(key)):
+            stem, ext = os.path.splitext(name)
+            try:
+                linear, angular = (float(x) for x in stem.split('_'))
+                with np.load(os.path.join(self._dir(key), name)) as data:
+                    entries[(linear, angular)] = (data['vertices'], data['facets'])
+            except (ValueError, OSError, KeyError):
+                continue
+        return entries
+
+
+_DEFAULT = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_cache() -> TessellationCache:
+    """Process-wide cache (disk-backed when FC_TESS_CACHE is set)."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            max_mb = os.environ.get(TESS_CACHE_MAX_MB_ENV)
+            _DEFAULT = TessellationCache(os.environ.get(TESS_CACHE_ENV) or None,
+                                         max_bytes=int(float(max_mb) * (1 << 20)) if max_mb else DEFAULT_MAX_BYTES)
+        return _DEFAULT
+
+
+def tessellate(shape, linear_deflection=0.1, angular_deflection=0.523599):
+    """default_cache().tessellate(...)"""
+    return default_cache().tessellate(shape, linear_deflection, angular_deflection)
+
+
+def to_mesh(vertices, facets):
+    """FreeCAD Mesh.Mesh built from cached arrays (for Mesh::Feature objects)."""
+    import Mesh  # type: ignore
+    tri = np.asarray(vertices)[np.asarray(facets)]
+    return Mesh.Mesh(tri.tolist())
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+"""
+Structured tracing spans for the FreeCAD scripts (create_cube, cube_farm
+workers, export_pipeline, freecadtouying).
+
+A span times one step with the monotonic clock, nests under the span that is
+open on the same thread and carries attributes (object count, file size, ...):
+
+  import tracing
+  with tracing.span('save_fcstd', path=path) as sp:
+      doc.saveAs(path)
+      if sp:                                  # False while tracing is off
+          sp.set(bytes=os.path.getsize(path))
+
+  @tracing.traced('build_part')
+  def build_part(cfg): ...
+
+  tracing.log('[hole] radius=3 mm axis=Z\\n', radius=3)   # console line + trace event
+
+Tracing is off unless enabled; span() then returns a shared no-op object and
+traced() calls straight through, so instrumented code costs one flag check.
+log() always writes its message to the console (FreeCAD's, or stdout) and
+only records an event when tracing is on.
+
+Switch it on with FC_TRACE in the environment and a call to
+tracing.start_from_env() early in the script:
+  FC_TRACE=1            print a per-run summary table on exit
+                        (count, total/self/mean/max ms per span name)
+  FC_TRACE=<file>.json  also write a Chrome trace-event file
+                        (open it in chrome://tracing or https://ui.perfetto.dev);
+                        "{pid}" in the name is replaced by the process id, so
+                        several worker processes can trace side by side.
+enable(), write_chrome(path), summary() and print_summary() can be called directly.
+"""
+from __future__ import annotations
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+TRACE_ENV = 'FC_TRACE'
+MAX_RECORDS = 200000  # spans + events kept per run; later ones are only counted
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+_records = []  # finished Span objects and event tuples, in completion order
+_dropped = 0
+_origin_ns = time.perf_counter_ns()
+_thread_names = {}
+_sink = None
+
+
+class _NoSpan:
+    """What span() returns while tracing is off: accepts everything, records nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def set(self, **attrs):
+        return self
+
+
+NO_SPAN = _NoSpan()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+        thread = threading.current_thread()
+        with _lock:
+            _thread_names[thread.ident] = thread.name
+    return stack
+
+
+def _keep(record):
+    global _dropped
+    with _lock:
+        if len(_records) < MAX_RECORDS:
+            _records.append(record)
+        else:
+            _dropped += 1
+
+
+class Span:
+    """One timed step; use through span() / traced()."""
+    __slots__ = ('name', 'attrs', 'start_ns', 'end_ns', 'tid', 'parent', 'depth', 'child_ns')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.start_ns = self.end_ns = 0
+        self.parent = None
+        self.depth = 0
+        self.child_ns = 0
+        self.tid = 0
+
+    def set(self, **attrs):
+        """Add or overwrite attributes (recorded when the span ends)."""
+        self.attrs.update(attrs)
+        return self
+
+    def __bool__(self):
+        return True
+
+    @property
+    def duration_ns(self):
+        return (self.end_ns or time.perf_counter_ns()) - self.start_ns
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1] if stack else None
+        self.depth = len(stack)
+        self.tid = threading.get_ident()
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.perf_counter_ns()
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        elif self in stack:
+            stack.remove(self)
+        if exc_type is not None:
+            self.attrs['error'] = f'{exc_type.__name__}: {exc}'
+        if self.parent is not None:
+            self.parent.child_ns += self.end_ns - self.start_ns
+        _keep(self)
+        return False
+
+
+def span(name: str, /, **attrs):
+    """Context manager timing the enclosed block as span name (a no-op while tracing is off)."""
+    if not _enabled:
+        return NO_SPAN
+    return Span(name, attrs)
+
+
+def current():
+    """The innermost open span of this thread, or NO_SPAN."""
+    if not _enabled:
+        return NO_SPAN
+    stack = _stack()
+    return stack[-1] if stack else NO_SPAN
+
+
+def traced(name=None):
+    """Decorator: run the function inside span(name or its qualified name)."""
+    def wrap(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(label, {}):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def event(name: str, /, **attrs):
+    """Record an instant event inside the current span."""
+    if _enabled:
+        _stack()
+        _keep((name, time.perf_counter_ns(), threading.get_ident(), attrs))
+
+
+def _console_write(message):
+    fc = sys.modules.get('FreeCAD')
+    console = getattr(fc, 'Console', None) if fc is not None else None
+    if console is not None:
+        console.PrintMessage(message)
+    else:
+        sys.stdout.write(message)
+
+
+def set_sink(write):
+    """Where log() writes its messages (default: FreeCAD.Console.PrintMessage, else stdout)."""
+    global _sink
+    _sink = write
+
+
+def log(message: str, /, **attrs):
+    """Write message to the console and, while tracing, record it as an event with attrs."""
+    (_sink or _console_write)(message)
+    if _enabled:
+        attrs['message'] = message.strip()
+        event('log', **attrs)
+
+
+# -------------------------- control --------------------------
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    """Drop everything recorded so far and restart the run clock."""
+    global _dropped, _origin_ns
+    with _lock:
+        _records.clear()
+        _dropped = 0
+        _origin_ns = time.perf_counter_ns()
+
+
+def _snapshot():
+    with _lock:
+        return list(_records), _dropped, dict(_thread_names)
+
+
+# -------------------------- output --------------------------
+def summary() -> dict:
+    """{'wall_ms', 'dropped', 'spans': [{name, count, total_ms, self_ms, mean_ms, max_ms}]} sorted by total."""
+    records, dropped, _names = _snapshot()
+    rows = {}
+    for r in records:
+        if not isinstance(r, Span):
+            continue
+        total = r.end_ns - r.start_ns
+        row = rows.get(r.name)
+        if row is None:
+            row = rows[r.name] = {'name': r.name, 'count': 0, 'total_ns': 0, 'self_ns': 0, 'max_ns': 0}
+        row['count'] += 1
+        row['total_ns'] += total
+        row['self_ns'] += total - r.child_ns
+        row['max_ns'] = max(row['max_ns'], total)
+    spans = []
+    for row in sorted(rows.values(), key=lambda row: -row['total_ns']):
+        spans.append({'name': row['name'], 'count': row['count'],
+                      'total_ms': row['total_ns'] / 1e6, 'self_ms': row['self_ns'] / 1e6,
+                      'mean_ms': row['total_ns'] / row['count'] / 1e6, 'max_ms': row['max_ns'] / 1e6})
+    return {'wall_ms': (time.perf_counter_ns() - _origin_ns) / 1e6, 'dropped': dropped, 'spans': spans}
+
+
+def format_summary(limit=40) -> str:
+    data = summary()
+    lines = ['%-32s %7s %11s %11s %10s %10s' % ('span', 'count', 'total ms', 'self ms', 'mean ms', 'max ms')]
+    for row in data['spans'][:limit]:
+        lines.append('%-32s %7d %11.2f %11.2f %10.2f %10.2f'
+                     % (row['name'][:32], row['count'], row['total_ms'], row['self_ms'], row['mean_ms'], row['max_ms']))
+    if len(data['spans']) > limit:
+        lines.append('... %d more span names' % (len(data['spans']) - limit))
+    lines.append('run wall time %.2f ms%s' % (data['wall_ms'],
+                                               ', %d records dropped' % data['dropped'] if data['dropped'] else ''))
+    return '\n'.join(lines)
+
+
+def print_summary(limit=40, out=None):
+    text = '=' * 60 + '\nTrace summary\n' + format_summary(limit) + '\n' + '=' * 60 + '\n'
+    if out is not None:
+        out.write(text)
+    else:
+        _console_write(text)
+
+
+def _json_safe(attrs):
+    safe = {}
+    for k, v in attrs.items():
+        safe[k] = v if isinstance(v, (str, int, float, bool, type(None))) else str(v)
+    return safe
+
+
+def chrome_trace() -> dict:
+    """The recorded spans/events in Chrome trace-event format (timestamps in microseconds)."""
+    records, dropped, names = _snapshot()
+    pid = os.getpid()
+    tids = {}
+
+    def tid_of(ident):
+        if ident not in tids:
+            tids[ident] = len(tids) + 1
+        return tids[ident]
+
+    events = []
+    for r in records:
+        if isinstance(r, Span):
+            args = _json_safe(r.attrs)
+            events.append({'name': r.name, 'ph': 'X', 'pid': pid, 'tid': tid_of(r.tid),
+                           'ts': (r.start_ns - _origin_ns) / 1e3, 'dur': (r.end_ns - r.start_ns) / 1e3,
+                           'args': args})
+        else:
+            name, ts_ns, ident, attrs = r
+            events.append({'name': name, 'ph': 'i', 's': 't', 'pid': pid, 'tid': tid_of(ident),
+                           'ts': (ts_ns - _origin_ns) / 1e3, 'args': _json_safe(attrs)})
+    events.sort(key=lambda e: e['ts'])
+    meta = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+             'args': {'name': os.path.basename(sys.argv[0] if sys.argv and sys.argv[0] else sys.executable)}}]
+    for ident, tid in tids.items():
+        meta.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                     'args': {'name': names.get(ident, str(ident))}})
+    return {'traceEvents': meta + events, 'displayTimeUnit': 'ms',
+            'otherData': {'dropped': dropped}}
+
+
+def write_chrome(path: str) -> str:
+    """Write chrome_trace() to path ("{pid}" is replaced by the process id); returns the path."""
+    path = path.replace('{pid}', str(os.getpid()))
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(chrome_trace(), f)
+    os.replace(tmp, path)
+    return path
+
+
+_from_env = False
+
+
+def start_from_env() -> bool:
+    """Enable tracing and report at exit when FC_TRACE is set; returns whether it is on."""
+    global _from_env
+    setting = os.environ.get(TRACE_ENV)
+    if not setting or setting == '0':
+        return False
+    enable()
+    with _lock:
+        first, _from_env = not _from_env, True
+    if first:
+        def _emit():
+            if setting.lower().endswith('.json'):
+                try:
+                    path = write_chrome(setting)
+                    _console_write(f'[trace] Chrome trace written to {path}\n')
+                except OSError as e:
+                    _console_write(f'[trace] could not write {setting}: {e}\n')
+            print_summary()
+        atexit.register(_emit)
+    return True
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Batched view-property updates for the GUI macros (SetColor,
+ToggleDisplayMode, ToggleBaseVisibility, ShowBodyFit, SaveExportFit) and
+create_cube's GUI focus step.
+
+Setting ViewObject.Visibility, ShapeColor or DisplayMode object by object
+lets every assignment notify the scene graph and schedule a redraw. A
+ViewBatch collects the changes first and applies them in one pass on exit,
+with scene-graph notification and widget repaints suspended, followed by a
+single redraw:
+
+  import view_batch
+  with view_batch.ViewBatch() as batch:
+      for o in targets:
+          batch.set(o, 'ShapeColor', rgb)
+  App.Console.PrintMessage('[SetColor] %s\n' % batch.summary())
+
+Assignments to the value a property already has are dropped, and the last
+value queued for an object/property wins. display_modes(view_object) caches
+listDisplayModes() per ViewProvider type (plus Python proxy class), so
+cycling the display mode of 5000 Part features asks FreeCAD once.
+
+Redraw suspension uses what is available: enableNotify(False) on the 3D
+view's scene-graph root (pivy) and setUpdatesEnabled(False) on the main
+window's central widget (PySide); the view is redrawn once afterwards.
+Without a GUI the batch still works, it only skips the suspension.
+summary() / stats report counts and collect/apply times in ms.
+"""
+from __future__ import annotations
+import threading
+import time
+
+DISPLAY_CYCLE = ('Shaded', 'Flat Lines', 'Wireframe')
+
+_lock = threading.Lock()
+_mode_cache = {}
+_mode_stats = {'hits': 0, 'misses': 0}
+
+
+# -------------------------- display-mode cache --------------------------
+def _provider_key(vo):
+    key = getattr(vo, 'TypeId', None) or type(vo).__name__
+    proxy = getattr(vo, 'Proxy', None)
+    if proxy is not None:
+        # Python view providers may add their own modes
+        key = (key, type(proxy).__module__, type(proxy).__name__)
+    return key
+
+
+def display_modes(vo) -> tuple:
+    """listDisplayModes() of vo, asked once per ViewProvider type."""
+    key = _provider_key(vo)
+    with _lock:
+        found = _mode_cache.get(key)
+        if found is not None:
+            _mode_stats['hits'] += 1
+            return found
+    try:
+        found = tuple(vo.listDisplayModes())
+    except Exception:
+        found = ()
+    with _lock:
+        _mode_cache[key] = found
+        _mode_stats['misses'] += 1
+    return found
+
+
+def next_display_mode(vo, cycle=DISPLAY_CYCLE):
+    """Next mode of cycle after vo's current one that vo supports, else its first mode (or None)."""
+    modes = display_modes(vo)
+    cur = getattr(vo, 'DisplayMode', None)
+    start = cycle.index(cur) + 1 if cur in cycle else 0
+    for mode in cycle[start:] + cycle[:start]:
+        if mode in modes:
+            return mode
+    return modes[0] if modes else None
+
+
+def clear_mode_cache():
+    with _lock:
+        _mode_cache.clear()
+
+
+def mode_cache_stats() -> dict:
+    with _lock:
+        return dict(_mode_stats, types=len(_mode_cache))
+
+
+# -------------------------- redraw suspension --------------------------
+def _active_view():
+    try:
+        import FreeCADGui as Gui  # type: ignore
+        return Gui.ActiveDocument.ActiveView
+    except Exception:
+        return None
+
+
+class _Suspended:
+    """Scene-graph notification and widget repaints switched off until resume()."""
+
+    def __init__(self):
+        self.view = _active_view()
+        self.root = None
+        self.widget = None
+        if self.view is None:
+            return
+        try:
+            root = self.view.getSceneGraph()
+            if root.isNotifyEnabled():
+                root.enableNotify(False)
+                self.root = root
+        except Exception:
+            self.root = None
+        try:
+            import FreeCADGui as Gui  # type: ignore
+            widget = Gui.getMainWindow().centralWidget()
+            if widget.updatesEnabled():
+                widget.setUpdatesEnabled(False)
+                self.widget = widget
+        except Exception:
+            self.widget = None
+
+    @property
+    def active(self) -> bool:
+        return self.root is not None or self.widget is not None
+
+    def resume(self):
+        if self.root is not None:
+            try:
+                self.root.enableNotify(True)
+                self.root.touch()
+            except Exception:
+                pass
+        if self.widget is not None:
+            try:
+                self.widget.setUpdatesEnabled(True)
+            except Exception:
+                pass
+        if self.view is not None:
+            try:
+                self.view.redraw()
+            except Exception:
+                pass
+
+
+# -------------------------- batch --------------------------
+def _same(current, value):
+    if isinstance(value, tuple) and isinstance(current, tuple) and len(current) > len(value):
+        current = current[:len(value)]  # ShapeColor reads back as (r, g, b, a)
+    return current == value
+
+
+class ViewBatch:
+    """Collects ViewObject property changes and applies them in one pass (on exit or apply())."""
+
+    def __init__(self, suspend=True):
+        self.suspend = suspend
+        self._pending = {}  # (object name, property) -> (object, property, value)
+        self._t0 = time.perf_counter()
+        self.stats = {'queued': 0, 'applied': 0, 'unchanged': 0, 'failed': 0, 'suspended': False,
+                      'collect_ms': 0.0, 'apply_ms': 0.0}
+        self.errors = []
+
+    def set(self, obj, prop, value):
+        """Queue obj.ViewObject.<prop> = value."""
+        self.stats['queued'] += 1
+        self._pending[(getattr(obj, 'Name', id(obj)), prop)] = (obj, prop, value)
+
+    def show_only(self, objects, keep):
+        """Queue Visibility = (o is keep) for every object of objects."""
+        for o in objects:
+            self.set(o, 'Visibility', o == keep)
+
+    def set_visibility(self, objects, visible):
+        for o in objects:
+            self.set(o, 'Visibility', bool(visible))
+
+    def set_color(self, objects, rgb):
+        for o in objects:
+            self.set(o, 'ShapeColor', tuple(rgb))
+
+    def cycle_display_mode(self, objects, cycle=DISPLAY_CYCLE):
+        """Queue the next display mode of cycle for every object (modes cached per provider type)."""
+        for o in objects:
+            vo = getattr(o, 'ViewObject', None)
+            if vo is None:
+                continue
+            mode = next_display_mode(vo, cycle)
+            if mode is not None:
+                self.set(o, 'DisplayMode', mode)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def apply(self):
+        """Apply every queued change (redraw suspended) and return stats."""
+        started = time.perf_counter()
+        self.stats['collect_ms'] += (started - self._t0) * 1e3
+        pending, self._pending = self._pending, {}
+        changes = []
+        for obj, prop, value in pending.values():
+            try:
+                vo = obj.ViewObject
+                if vo is None:
+                    continue
+                if _same(getattr(vo, prop), value):
+                    self.stats['unchanged'] += 1
+                    continue
+            except Exception:
+                vo = getattr(obj, 'ViewObject', None)
+                if vo is None:
+                    continue
+            changes.append((vo, obj, prop, value))
+        suspended = _Suspended() if (self.suspend and changes) else None
+        self.stats['suspended'] = bool(suspended and suspended.active)
+        try:
+            for vo, obj, prop, value in changes:
+                try:
+                    setattr(vo, prop, value)
+                    self.stats['applied'] += 1
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    self.errors.append((getattr(obj, 'Name', '?'), prop, str(e)))
+        finally:
+            if suspended is not None:
+                suspended.resume()
+        self.stats['apply_ms'] += (time.perf_counter() - started) * 1e3
+        self._t0 = time.perf_counter()
+        return self.stats
+
+    def summary(self) -> str:
+        s = self.stats
+        return ('%d changes applied, %d unchanged, %d failed; collect %.1f ms, apply %.1f ms%s'
+                % (s['applied'], s['unchanged'], s['failed'], s['collect_ms'], s['apply_ms'],
+                   ', redraw suspended' if s['suspended'] else ''))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.apply()